@@ -1,7 +1,7 @@
 import asyncio
 from logging.config import fileConfig
 
-from sqlalchemy import pool, MetaData, Table, Column, Integer, String, Boolean, Float, DateTime, ForeignKey, Text
+from sqlalchemy import pool, MetaData, Table, Column, Index, Integer, String, Boolean, Float, DateTime, ForeignKey, Text
 from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import async_engine_from_config
 
@@ -57,6 +57,41 @@ items = Table(
     Column('updated_at', DateTime, nullable=False),
 )
 
+Index('idx_items_owner_created_at', items.c.owner_id, items.c.created_at)
+
+# 定义按所有者汇总的物品统计表
+owner_item_stats = Table(
+    'owner_item_stats',
+    target_metadata,
+    Column('owner_id', Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+    Column('item_count', Integer, nullable=False, default=0),
+    Column('priced_count', Integer, nullable=False, default=0),
+    Column('total_price', Float, nullable=False, default=0),
+    Column('last_created_at', DateTime, nullable=True),
+    Column('updated_at', DateTime, nullable=False),
+)
+
+# 定义后台任务表
+jobs = Table(
+    'jobs',
+    target_metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('type', String(100), nullable=False),
+    Column('payload', Text, nullable=False, default='{}'),
+    Column('progress', Text, nullable=True),
+    Column('status', String(20), nullable=False, default='pending'),
+    Column('attempts', Integer, nullable=False, default=0),
+    Column('max_attempts', Integer, nullable=False, default=5),
+    Column('run_at', Float, nullable=False),
+    Column('locked_until', Float, nullable=True),
+    Column('last_error', Text, nullable=True),
+    Column('finished_at', Float, nullable=True),
+    Column('created_at', DateTime, nullable=False),
+    Column('updated_at', DateTime, nullable=False),
+    Index('idx_jobs_type_status_run_at', 'type', 'status', 'run_at'),
+    Index('idx_jobs_status_finished_at', 'status', 'finished_at'),
+)
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import health, users, items, auth
+from app.api.v1.endpoints import health, users, items, auth, admin
 
 # 创建API路由器
 api_router = APIRouter()
@@ -9,4 +9,5 @@ api_router = APIRouter()
 api_router.include_router(health.router, prefix="/health", tags=["health"])
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
-api_router.include_router(items.router, prefix="/items", tags=["items"]) 
\ No newline at end of file
+api_router.include_router(items.router, prefix="/items", tags=["items"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
@@ -0,0 +1,212 @@
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncConnection
+from starlette.concurrency import run_in_threadpool
+
+from app.db.repositories.job_repository import JOB_STATUSES
+from app.db.session import get_db
+from app.db.slow_query import slow_query_log
+from app.schemas.admin import (
+    JobInfo, JobQueueStats, MemorySnapshotSummary, MemoryStat, MemoryStatus, MemoryTraceStartRequest, ProfileArmRequest,
+    ProfilerStatus, ProfileSummary, RouteMemoryStats, SlowQueryEvent,
+)
+from app.schemas.response import ApiResponse, success_response
+from app.services.job_service import JobService
+from app.utils.auth import get_current_admin
+from app.utils.memory import memory_profiler
+from app.utils.profiler import request_profiler
+from config import settings
+
+# 管理接口，全部要求管理员权限
+router = APIRouter(dependencies=[Depends(get_current_admin)])
+
+
+@router.get("/slow-queries", response_model=ApiResponse[List[SlowQueryEvent]])
+async def get_slow_queries(limit: int = 100):
+    """获取最近的慢查询记录（按时间倒序）"""
+    events = list(slow_query_log.events)[-limit:][::-1] if limit > 0 else []
+    return success_response(data=events, message="获取慢查询记录成功")
+
+
+@router.delete("/slow-queries", response_model=ApiResponse[dict])
+async def clear_slow_queries():
+    """清空慢查询记录"""
+    slow_query_log.clear()
+    return success_response(data={}, message="慢查询记录已清空")
+
+
+def _check_profiling_enabled():
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="采样分析未启用")
+
+
+@router.post("/profiles/arm", response_model=ApiResponse[ProfilerStatus],
+             dependencies=[Depends(_check_profiling_enabled)])
+async def arm_profiler(request: ProfileArmRequest):
+    """为指定路由布防，接下来 count 个匹配的请求将被采样"""
+    request_profiler.arm(request.route, request.count, request.method, request.interval_ms)
+    return success_response(data=request_profiler.status(), message="采样已布防")
+
+
+@router.delete("/profiles/arm", response_model=ApiResponse[ProfilerStatus])
+async def disarm_profiler():
+    """取消布防"""
+    request_profiler.disarm()
+    return success_response(data=request_profiler.status(), message="采样已取消")
+
+
+@router.get("/profiles/arm", response_model=ApiResponse[ProfilerStatus])
+async def get_profiler_status():
+    """获取布防状态"""
+    return success_response(data=request_profiler.status(), message="获取采样状态成功")
+
+
+@router.get("/profiles", response_model=ApiResponse[List[ProfileSummary]])
+async def list_profiles():
+    """获取采样结果列表（按时间倒序）"""
+    profiles = [profile.summary() for profile in reversed(request_profiler.results)]
+    return success_response(data=profiles, message="获取采样结果成功")
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(profile_id: str, format: Literal["collapsed", "speedscope"] = "speedscope"):
+    """下载采样结果：collapsed 为折叠栈文本，speedscope 可直接导入 https://www.speedscope.app"""
+    profile = request_profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="采样结果不存在")
+
+    if format == "collapsed":
+        headers = {"Content-Disposition": f'attachment; filename="profile-{profile.id}.txt"'}
+        return PlainTextResponse(profile.collapsed(), headers=headers)
+    headers = {"Content-Disposition": f'attachment; filename="profile-{profile.id}.speedscope.json"'}
+    return JSONResponse(profile.speedscope(), headers=headers)
+
+
+@router.delete("/profiles", response_model=ApiResponse[dict])
+async def clear_profiles():
+    """清空采样结果"""
+    request_profiler.clear()
+    return success_response(data={}, message="采样结果已清空")
+
+
+def _check_memory_profiling_enabled():
+    if not settings.MEMORY_PROFILING_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="内存分析未启用")
+
+
+def _get_snapshot(snapshot_id: str):
+    snapshot = memory_profiler.get(snapshot_id)
+    if snapshot is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="内存快照不存在")
+    return snapshot
+
+
+@router.post("/memory/tracemalloc", response_model=ApiResponse[MemoryStatus],
+             dependencies=[Depends(_check_memory_profiling_enabled)])
+async def start_tracemalloc(request: MemoryTraceStartRequest):
+    """启动 tracemalloc，跟踪期间所有分配都有额外开销，排查完成后应及时停止"""
+    memory_profiler.start(request.frames, request.route_sample_rate)
+    return success_response(data=memory_profiler.status(), message="tracemalloc 已启动")
+
+
+@router.delete("/memory/tracemalloc", response_model=ApiResponse[MemoryStatus])
+async def stop_tracemalloc():
+    """停止 tracemalloc，已拍摄的快照保留"""
+    memory_profiler.stop()
+    return success_response(data=memory_profiler.status(), message="tracemalloc 已停止")
+
+
+@router.get("/memory/tracemalloc", response_model=ApiResponse[MemoryStatus])
+async def get_tracemalloc_status():
+    """获取 tracemalloc 状态"""
+    return success_response(data=memory_profiler.status(), message="获取内存分析状态成功")
+
+
+@router.post("/memory/snapshots", response_model=ApiResponse[MemorySnapshotSummary],
+             status_code=status.HTTP_201_CREATED)
+async def take_memory_snapshot():
+    """拍摄内存快照（在线程池中执行，不阻塞事件循环）"""
+    if not memory_profiler.status()["tracing"]:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="tracemalloc 未启动")
+    snapshot = await run_in_threadpool(memory_profiler.take_snapshot)
+    return success_response(data=snapshot.summary(), message="内存快照已拍摄", code=201)
+
+
+@router.get("/memory/snapshots", response_model=ApiResponse[List[MemorySnapshotSummary]])
+async def list_memory_snapshots():
+    """获取内存快照列表（按时间倒序）"""
+    snapshots = [snapshot.summary() for snapshot in memory_profiler.list_snapshots()]
+    return success_response(data=snapshots, message="获取内存快照成功")
+
+
+@router.get("/memory/snapshots/{snapshot_id}/top", response_model=ApiResponse[List[MemoryStat]])
+async def get_memory_top(
+    snapshot_id: str,
+    group_by: Literal["filename", "lineno", "traceback"] = "lineno",
+    limit: int = Query(20, ge=1, le=500),
+):
+    """快照中分配最多的位置"""
+    snapshot = _get_snapshot(snapshot_id)
+    stats = await run_in_threadpool(snapshot.top, group_by, limit)
+    return success_response(data=stats, message="获取内存分配排行成功")
+
+
+@router.get("/memory/snapshots/{snapshot_id}/diff", response_model=ApiResponse[List[MemoryStat]])
+async def diff_memory_snapshots(
+    snapshot_id: str,
+    base: str = Query(..., description="作为基准的较早快照 ID"),
+    group_by: Literal["filename", "lineno", "traceback"] = "lineno",
+    limit: int = Query(20, ge=1, le=500),
+):
+    """对比两个快照，列出相对基准快照变化最大的位置"""
+    snapshot = _get_snapshot(snapshot_id)
+    base_snapshot = _get_snapshot(base)
+    stats = await run_in_threadpool(snapshot.diff, base_snapshot, group_by, limit)
+    return success_response(data=stats, message="对比内存快照成功")
+
+
+@router.get("/memory/routes", response_model=ApiResponse[List[RouteMemoryStats]])
+async def get_route_memory_stats():
+    """按路由的采样请求峰值分配（按平均峰值倒序）"""
+    return success_response(data=memory_profiler.route_stats(), message="获取路由内存统计成功")
+
+
+@router.delete("/memory/snapshots", response_model=ApiResponse[dict])
+async def clear_memory_data():
+    """清空内存快照和路由统计"""
+    memory_profiler.clear()
+    return success_response(data={}, message="内存分析数据已清空")
+
+
+@router.get("/jobs/stats", response_model=ApiResponse[JobQueueStats])
+async def get_job_stats(
+        window: int = Query(300, ge=1, le=86400, description="吞吐统计窗口（秒）"),
+        conn: AsyncConnection = Depends(get_db),
+):
+    """后台任务队列深度和吞吐"""
+    stats = await JobService(conn).get_stats(window)
+    return success_response(data=stats, message="获取后台任务状态成功")
+
+
+@router.get("/jobs", response_model=ApiResponse[List[JobInfo]])
+async def list_jobs(
+        status_filter: Optional[str] = Query(None, alias="status", description=f"可选: {' / '.join(JOB_STATUSES)}"),
+        job_type: Optional[str] = Query(None, alias="type"),
+        limit: int = Query(100, ge=1, le=1000),
+        conn: AsyncConnection = Depends(get_db),
+):
+    """按 ID 倒序列出后台任务"""
+    if status_filter is not None and status_filter not in JOB_STATUSES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"未知的任务状态: {status_filter}")
+    jobs = await JobService(conn).get_jobs(status=status_filter, job_type=job_type, limit=limit)
+    return success_response(data=jobs, message="获取后台任务成功")
+
+
+@router.get("/jobs/{job_id}", response_model=ApiResponse[JobInfo])
+async def get_job(job_id: int, conn: AsyncConnection = Depends(get_db)):
+    """获取后台任务状态和进度"""
+    job = await JobService(conn).get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="任务不存在")
+    return success_response(data=job, message="获取后台任务成功")
@@ -1,7 +1,7 @@
-import logging
 from datetime import timedelta, datetime
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncConnection
 
 from app.db.session import get_db
@@ -40,8 +40,7 @@ async def login_for_access_token(
 
     # 创建访问令牌
     access_token_expires = timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
-    logging.info(f"用户 {user.username} 正在登录")
-    logging.info(f"JWT过期时间设置(分钟): {settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES}")
+    logger.debug("用户 {} 登录成功，令牌有效期 {} 分钟", user.username, settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
     
     user_data_for_token = {
         "username": user.username,
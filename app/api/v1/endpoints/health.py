@@ -1,30 +1,72 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.ext.asyncio import AsyncConnection
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from sqlalchemy import text
 
-from app.db.session import get_db
-from app.schemas.health import HealthResponse
-from app.schemas.response import ApiResponse, success_response
+from app.core.health import get_health_prober
+from app.db.session import engine
+from app.schemas.health import HealthResponse, ProbeResponse
+from app.schemas.response import ApiResponse, error_response, success_response
 
 router = APIRouter()
 
+# 挂载在根路径的探针路由，供编排系统使用
+probes_router = APIRouter()
+
 
 @router.get("", response_model=ApiResponse[HealthResponse])
-async def health_check(conn: AsyncConnection = Depends(get_db)):
+async def health_check():
     """
     健康检查端点，用于监控应用状态
+    
+    返回后台健康探测的缓存结果，不占用连接池；探测器未启动时直接检查数据库
     """
-    # 测试数据库连接
-    try:
-        await conn.execute(text("SELECT 1"))
-        db_status = "connected"
-    except Exception:
-        db_status = "disconnected"
+    prober = get_health_prober()
+    if prober is not None and prober.running:
+        health_data = prober.snapshot()
+        db_status = health_data["database"]
+    else:
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            db_status = "connected"
+        except Exception:
+            db_status = "disconnected"
+        health_data = {"database": db_status}
     
-    health_data = {
-        "status": "ok" if db_status == "connected" else "degraded",
-        "database": db_status,
-        "api_version": "v1"
-    }
+    health_data.update(
+        status="ok" if db_status == "connected" else "degraded",
+        api_version="v1",
+    )
     
-    return success_response(data=health_data, message="系统运行正常")
\ No newline at end of file
+    return success_response(data=health_data, message="系统运行正常")
+
+
+def _probe(reasons: list, ok_status: str):
+    if reasons:
+        return JSONResponse(
+            status_code=503,
+            content=error_response(
+                message="服务不可用",
+                code=503,
+                data={"status": "fail", "reasons": reasons},
+            ),
+        )
+    return success_response(data={"status": ok_status, "reasons": []})
+
+
+@probes_router.get("/livez", response_model=ApiResponse[ProbeResponse])
+async def liveness():
+    """
+    存活探针：事件循环能调度后台探测任务即为存活，失败时应重启进程
+    """
+    prober = get_health_prober()
+    return _probe(prober.liveness() if prober else ["健康探测未启动"], "alive")
+
+
+@probes_router.get("/readyz", response_model=ApiResponse[ProbeResponse])
+async def readiness():
+    """
+    就绪探针：数据库可用且连接池、bcrypt 队列未饱和时就绪，失败时应暂停分配流量
+    """
+    prober = get_health_prober()
+    return _probe(prober.readiness() if prober else ["健康探测未启动"], "ready")
@@ -1,18 +1,72 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncConnection
 
 from app.db.session import get_db
-from app.schemas.item import ItemCreate, ItemResponse, ItemUpdate
+from app.schemas.item import Item, ItemCreate, ItemLookupRequest, ItemLookupResponse, ItemResponse, ItemUpdate
 from app.schemas.response import ApiResponse, success_response
 from app.services.item_service import ItemService
+from app.services.loaders import get_owner_loader
 from app.utils.auth import get_current_user
+from app.utils.dataloader import DataLoader
+from app.utils.fields import parse_expand, parse_fields, sparse_dump, sparse_response
+from app.utils.lookup import check_ids, parse_ids
 from app.schemas.user import UserResponse
 
 router = APIRouter()
 
+# 支持 ?fields= 选择的字段（owner 是展开项，不对应数据库列）
+ITEM_FIELDS = tuple(name for name in ItemResponse.model_fields if name != "owner")
+FIELDS_QUERY = Query(None, description=f"仅返回指定字段，逗号分隔，可选: {','.join(ITEM_FIELDS)}")
 
-@router.post("", response_model=ApiResponse[ItemResponse], status_code=status.HTTP_201_CREATED)
+# 支持 ?expand= 展开的关联
+ITEM_EXPANDS = ("owner",)
+EXPAND_QUERY = Query(None, description=f"展开关联对象，逗号分隔，可选: {','.join(ITEM_EXPANDS)}")
+
+
+class _ReadOptions:
+    """读取接口的 fields / expand 参数"""
+
+    def __init__(self, fields: Optional[str], expand: Optional[str]):
+        self.columns = parse_fields(fields, ITEM_FIELDS)
+        self.expand_owner = "owner" in parse_expand(expand, ITEM_EXPANDS)
+
+    @property
+    def query_columns(self) -> Optional[tuple]:
+        """需要查询的列；展开 owner 时必须带上 owner_id"""
+        if self.columns and self.expand_owner and "owner_id" not in self.columns:
+            return self.columns + ("owner_id",)
+        return self.columns
+
+    @property
+    def output_fields(self) -> tuple:
+        """稀疏响应中输出的字段"""
+        return self.columns + ("owner",) if self.expand_owner else self.columns
+
+    async def expand(self, items: list, owner_loader: DataLoader) -> list:
+        """按需嵌入所有者公开信息，整页物品的所有者通过加载器一次查询获取"""
+        if not self.expand_owner:
+            return items
+        rows = [item.model_dump() if isinstance(item, Item) else item for item in items]
+        owners = iter(await owner_loader.load_many(row["owner_id"] for row in rows if row is not None))
+        return [None if row is None else {**row, "owner": next(owners)} for row in rows]
+
+
+async def _lookup_items(item_ids: List[int], options: _ReadOptions,
+                        conn: AsyncConnection, owner_loader: DataLoader):
+    """按 ID 批量获取物品，结果按请求顺序排列并给出缺失的 ID"""
+    item_service = ItemService(conn)
+    items, missing = await item_service.get_items_by_ids(item_ids, fields=options.query_columns)
+    items = await options.expand(items, owner_loader)
+    if options.columns:
+        data = {"items": sparse_dump(items, ItemResponse, options.output_fields), "missing": missing}
+        return JSONResponse(content=success_response(data=data, message="批量获取物品成功"))
+    return success_response(data={"items": items, "missing": missing}, message="批量获取物品成功")
+
+
+@router.post("", response_model=ApiResponse[ItemResponse], status_code=status.HTTP_201_CREATED,
+             response_model_exclude_unset=True)
 async def create_item(
     item_in: ItemCreate,
     conn: AsyncConnection = Depends(get_db),
@@ -24,35 +78,67 @@ async def create_item(
     return success_response(data=item, message="物品创建成功")
 
 
-@router.get("", response_model=ApiResponse[List[ItemResponse]])
+@router.get("", response_model=ApiResponse[Union[List[ItemResponse], ItemLookupResponse]],
+            response_model_exclude_unset=True)
 async def get_items(
     skip: int = 0,
     limit: int = 100,
-    conn: AsyncConnection = Depends(get_db)
+    ids: Optional[str] = Query(None, description="按ID批量获取，逗号分隔，如 1,2,3"),
+    fields: Optional[str] = FIELDS_QUERY,
+    expand: Optional[str] = EXPAND_QUERY,
+    conn: AsyncConnection = Depends(get_db),
+    owner_loader: DataLoader = Depends(get_owner_loader)
 ):
-    """获取物品列表"""
+    """获取物品列表；传入 ids 时按ID批量获取"""
+    options = _ReadOptions(fields, expand)
+    if ids is not None:
+        return await _lookup_items(parse_ids(ids), options, conn, owner_loader)
+    
     item_service = ItemService(conn)
-    items = await item_service.get_items(skip=skip, limit=limit)
+    items = await item_service.get_items(skip=skip, limit=limit, fields=options.query_columns)
+    items = await options.expand(items, owner_loader)
+    if options.columns:
+        return sparse_response(items, ItemResponse, options.output_fields, message="获取物品列表成功")
     return success_response(data=items, message="获取物品列表成功")
 
 
-@router.get("/{item_id}", response_model=ApiResponse[ItemResponse])
+@router.post("/lookup", response_model=ApiResponse[ItemLookupResponse], response_model_exclude_unset=True)
+async def lookup_items(
+    lookup_in: ItemLookupRequest,
+    fields: Optional[str] = FIELDS_QUERY,
+    expand: Optional[str] = EXPAND_QUERY,
+    conn: AsyncConnection = Depends(get_db),
+    owner_loader: DataLoader = Depends(get_owner_loader)
+):
+    """按ID批量获取物品"""
+    options = _ReadOptions(fields, expand)
+    return await _lookup_items(check_ids(lookup_in.ids), options, conn, owner_loader)
+
+
+@router.get("/{item_id}", response_model=ApiResponse[ItemResponse], response_model_exclude_unset=True)
 async def get_item(
     item_id: int,
-    conn: AsyncConnection = Depends(get_db)
+    fields: Optional[str] = FIELDS_QUERY,
+    expand: Optional[str] = EXPAND_QUERY,
+    conn: AsyncConnection = Depends(get_db),
+    owner_loader: DataLoader = Depends(get_owner_loader)
 ):
     """通过ID获取物品"""
+    options = _ReadOptions(fields, expand)
     item_service = ItemService(conn)
-    item = await item_service.get_item(item_id)
+    item = await item_service.get_item(item_id, fields=options.query_columns)
     if item is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="物品不存在"
         )
+    item = (await options.expand([item], owner_loader))[0]
+    if options.columns:
+        return sparse_response(item, ItemResponse, options.output_fields, message="获取物品成功")
     return success_response(data=item, message="获取物品成功")
 
 
-@router.put("/{item_id}", response_model=ApiResponse[ItemResponse])
+@router.put("/{item_id}", response_model=ApiResponse[ItemResponse], response_model_exclude_unset=True)
 async def update_item(
     item_id: int,
     item_in: ItemUpdate,
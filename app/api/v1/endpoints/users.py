@@ -1,16 +1,25 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncConnection
 
 from app.db.session import get_db
+from app.schemas.item import OwnerItemStats
 from app.schemas.role import Role
-from app.schemas.user import UserCreate, UserResponse, UserUpdate
+from app.schemas.user import UserCreate, UserLookupRequest, UserLookupResponse, UserResponse, UserUpdate
 from app.schemas.response import ApiResponse, success_response
+from app.services.item_service import ItemService
 from app.services.user_service import UserService
 from app.utils.auth import get_current_user, get_current_user_optional
+from app.utils.fields import parse_fields, sparse_dump, sparse_response
+from app.utils.lookup import check_ids, parse_ids
 
 router = APIRouter()
 
+# 支持 ?fields= 选择的字段
+USER_FIELDS = tuple(UserResponse.model_fields)
+FIELDS_QUERY = Query(None, description=f"仅返回指定字段，逗号分隔，可选: {','.join(USER_FIELDS)}")
+
 
 def _require_admin(current_user: UserResponse) -> None:
     if current_user.role != Role.ADMIN:
@@ -30,6 +39,16 @@ def _require_self_or_admin(current_user: UserResponse, target_user_id: int) -> N
         )
 
 
+async def _lookup_users(user_ids: List[int], columns: Optional[tuple], conn: AsyncConnection):
+    """按 ID 批量获取用户，结果按请求顺序排列并给出缺失的 ID"""
+    user_service = UserService(conn)
+    users, missing = await user_service.get_users_by_ids(user_ids, fields=columns)
+    if columns:
+        data = {"items": sparse_dump(users, UserResponse, columns), "missing": missing}
+        return JSONResponse(content=success_response(data=data, message="批量获取用户成功"))
+    return success_response(data={"items": users, "missing": missing}, message="批量获取用户成功")
+
+
 @router.post("", response_model=ApiResponse[UserResponse], status_code=status.HTTP_201_CREATED)
 async def create_user(
         user_in: UserCreate,
@@ -72,38 +91,80 @@ async def register_user(
     user = user_service.create_user(user_in)
     return success_response(data=user, message="用户注册成功")       
 
-@router.get("", response_model=ApiResponse[List[UserResponse]])
+@router.get("", response_model=ApiResponse[Union[List[UserResponse], UserLookupResponse]])
 async def get_users(
         skip: int = 0,
         limit: int = 100,
+        ids: Optional[str] = Query(None, description="按ID批量获取，逗号分隔，如 1,2,3"),
+        fields: Optional[str] = FIELDS_QUERY,
         conn: AsyncConnection = Depends(get_db),
         current_user: UserResponse = Depends(get_current_user)
 ):
-    """获取用户列表"""
+    """获取用户列表；传入 ids 时按ID批量获取"""
     _require_admin(current_user)
+    columns = parse_fields(fields, USER_FIELDS)
+    if ids is not None:
+        return await _lookup_users(parse_ids(ids), columns, conn)
+
     user_service = UserService(conn)
-    users = await user_service.get_users(skip=skip, limit=limit)
+    users = await user_service.get_users(skip=skip, limit=limit, fields=columns)
+    if columns:
+        return sparse_response(users, UserResponse, columns, message="获取用户列表成功")
     return success_response(data=users, message="获取用户列表成功")
 
 
+@router.post("/lookup", response_model=ApiResponse[UserLookupResponse])
+async def lookup_users(
+        lookup_in: UserLookupRequest,
+        fields: Optional[str] = FIELDS_QUERY,
+        conn: AsyncConnection = Depends(get_db),
+        current_user: UserResponse = Depends(get_current_user)
+):
+    """按ID批量获取用户（仅管理员）"""
+    _require_admin(current_user)
+    columns = parse_fields(fields, USER_FIELDS)
+    return await _lookup_users(check_ids(lookup_in.ids), columns, conn)
+
+
 @router.get("/{user_id}", response_model=ApiResponse[UserResponse])
 async def get_user(
         user_id: int,
+        fields: Optional[str] = FIELDS_QUERY,
         conn: AsyncConnection = Depends(get_db),
         current_user: UserResponse = Depends(get_current_user)
 ):
     """通过ID获取用户"""
     _require_self_or_admin(current_user, user_id)
+    columns = parse_fields(fields, USER_FIELDS)
     user_service = UserService(conn)
-    user = await user_service.get_user(user_id)
+    user = await user_service.get_user(user_id, fields=columns)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="用户不存在"
         )
+    if columns:
+        return sparse_response(user, UserResponse, columns, message="获取用户成功")
     return success_response(data=user, message="获取用户成功")
 
 
+@router.get("/{user_id}/items/stats", response_model=ApiResponse[OwnerItemStats])
+async def get_user_item_stats(
+        user_id: int,
+        conn: AsyncConnection = Depends(get_db),
+        current_user: UserResponse = Depends(get_current_user)
+):
+    """获取用户的物品统计：数量、价格总和与平均值、最近创建时间"""
+    _require_self_or_admin(current_user, user_id)
+    if await UserService(conn).get_user(user_id, fields=("id",)) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="用户不存在"
+        )
+    stats = await ItemService(conn).get_owner_stats(user_id)
+    return success_response(data=stats, message="获取物品统计成功")
+
+
 @router.put("/{user_id}", response_model=ApiResponse[UserResponse])
 async def update_user(
         user_id: int,
@@ -130,13 +191,18 @@ async def update_user(
     return success_response(data=user, message="更新用户成功")
 
 
-@router.delete("/{user_id}", response_model=ApiResponse[dict])
+@router.delete("/{user_id}", response_model=ApiResponse[dict], status_code=status.HTTP_202_ACCEPTED)
 async def delete_user(
         user_id: int,
         conn: AsyncConnection = Depends(get_db),
         current_user: UserResponse = Depends(get_current_user)
 ):
-    """删除用户"""
+    """
+    删除用户：立即停用，物品和用户记录由后台任务删除
+
+    管理员的响应带任务 ID 和进度查询地址 /api/admin/jobs/{job_id}；
+    用户删除自己后即被停用、无法再访问接口，响应中不返回进度地址
+    """
     _require_self_or_admin(current_user, user_id)
 
     user_service = UserService(conn)
@@ -148,11 +214,14 @@ async def delete_user(
             detail="用户不存在"
         )
     
-    success = await user_service.delete_user(user_id)
-    if not success:
+    job_id = await user_service.delete_user(user_id)
+    if job_id is None:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="删除用户失败"
         )
     
-    return success_response(data={"user_id": user_id}, message="删除用户成功")
+    data = {"user_id": user_id}
+    if current_user.role == Role.ADMIN:
+        data.update(job_id=job_id, status_url=f"/api/admin/jobs/{job_id}")
+    return success_response(data=data, message="用户已停用，正在后台删除")
@@ -1,9 +1,25 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from config import settings
 from app.api.v1.api import api_router
+from app.api.v1.endpoints.health import probes_router
+from app.middlewares.access_log import AccessLogMiddleware
+from app.middlewares.admission import AdmissionControlMiddleware, parse_limits
+from app.middlewares.compression import CompressionMiddleware
+from app.middlewares.deadline import DeadlineMiddleware, parse_deadlines
+from app.middlewares.etag import ETagMiddleware, parse_routes
 from app.middlewares.exception_handler import add_exception_handlers
+from app.middlewares.loop_budget import LoopBudgetMiddleware
+from app.middlewares.memory_profiling import MemoryProfilingMiddleware
+from app.middlewares.metrics import MetricsMiddleware
+from app.middlewares.profiling import ProfilingMiddleware
+from app.middlewares.rate_limit import RateLimitMiddleware, create_rate_limit_backend
+from app.middlewares.server_timing import ServerTimingMiddleware, instrument_endpoints
+from app.utils.logger import setup_logging
+from app.utils.metrics import REGISTRY
+from app.utils.rate_limit import parse_rules
 from app.core.events import startup_event_handler, shutdown_event_handler
 
 
@@ -11,6 +27,8 @@ def create_app() -> FastAPI:
     """
     应用工厂函数，创建FastAPI应用实例
     """
+    setup_logging()
+    
     app = FastAPI(
         title=settings.APP_NAME,
         version=settings.APP_VERSION,
@@ -27,8 +45,87 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
     
+    # 配置 ETag 与条件请求（位于压缩之内，压缩缓存以该 ETag 为键）
+    if settings.ETAG_ENABLED:
+        app.add_middleware(ETagMiddleware, routes=parse_routes(settings.ETAG_ROUTES))
+    
+    # 配置响应压缩
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+            threadpool_min_size=settings.COMPRESSION_THREADPOOL_MIN_SIZE,
+        )
+    
+    # 配置事件循环阻塞预算（开发模式，仅非生产环境）
+    if settings.LOOP_MONITOR_ENABLED and settings.LOOP_BLOCK_BUDGET_MS > 0 and settings.APP_ENV != "production":
+        app.add_middleware(LoopBudgetMiddleware)
+    
+    # 配置按需采样（仅在管理员布防后生效）
+    if settings.PROFILING_ENABLED:
+        app.add_middleware(ProfilingMiddleware)
+    
+    # 配置按路由内存采样（仅在管理员启动 tracemalloc 并开启按路由采样后生效）
+    if settings.MEMORY_PROFILING_ENABLED:
+        app.add_middleware(MemoryProfilingMiddleware)
+    
+    # 配置 Server-Timing 与查询预算（查询预算仅在非生产环境检查）
+    query_budget = settings.QUERY_BUDGET if settings.APP_ENV != "production" else 0
+    if settings.SERVER_TIMING_ENABLED or query_budget > 0:
+        app.add_middleware(
+            ServerTimingMiddleware,
+            emit_header=settings.SERVER_TIMING_ENABLED,
+            query_budget=query_budget,
+            raise_on_budget=settings.QUERY_BUDGET_ACTION == "raise",
+        )
+    
+    # 配置准入控制（位于指标和访问日志之内，被拒绝的请求同样计入）
+    if settings.ADMISSION_ENABLED:
+        app.add_middleware(
+            AdmissionControlMiddleware,
+            limits=parse_limits(settings.ADMISSION_LIMITS),
+            max_queue=settings.ADMISSION_MAX_QUEUE,
+            queue_timeout_ms=settings.ADMISSION_QUEUE_TIMEOUT_MS,
+            retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+            adaptive=settings.ADMISSION_ADAPTIVE,
+            target_latency_ms=settings.ADMISSION_TARGET_LATENCY_MS,
+            min_limit=settings.ADMISSION_MIN_LIMIT,
+        )
+    
+    # 配置限流（在准入控制之外，被限流的请求不占用并发额度）
+    if settings.RATE_LIMIT_ENABLED:
+        app.add_middleware(
+            RateLimitMiddleware,
+            rules=parse_rules(settings.RATE_LIMITS),
+            backend=create_rate_limit_backend(),
+            trust_forwarded=settings.RATE_LIMIT_TRUST_FORWARDED,
+        )
+    
+    # 配置请求截止时间（在准入控制之外，排队时间也计入）
+    deadlines = parse_deadlines(settings.REQUEST_DEADLINES)
+    if settings.REQUEST_DEADLINE_MS > 0 or deadlines:
+        app.add_middleware(
+            DeadlineMiddleware,
+            default_ms=settings.REQUEST_DEADLINE_MS,
+            routes=deadlines,
+        )
+    
+    # 配置请求指标采集
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+    
+    # 配置访问日志与请求 ID（最外层，耗时包含其他中间件）
+    if settings.ACCESS_LOG_ENABLED:
+        app.add_middleware(
+            AccessLogMiddleware,
+            header=settings.REQUEST_ID_HEADER,
+            sample_rate=settings.ACCESS_LOG_SAMPLE_RATE,
+            slow_ms=settings.ACCESS_LOG_SLOW_MS,
+        )
+    
     # 注册路由
     app.include_router(api_router, prefix="/api")
+    app.include_router(probes_router, tags=["health"])
     
     # 注册事件处理器
     app.add_event_handler("startup", startup_event_handler(app))
@@ -46,4 +143,13 @@ def create_app() -> FastAPI:
             "docs": "/docs",
         }
     
+    if settings.METRICS_ENABLED:
+        @app.get("/metrics", include_in_schema=False)
+        async def metrics():
+            """Prometheus 文本格式指标"""
+            return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+    
+    if settings.SERVER_TIMING_ENABLED:
+        instrument_endpoints(app)
+    
     return app 
\ No newline at end of file
@@ -5,7 +5,13 @@ from typing import Callable
 from fastapi import FastAPI
 from loguru import logger
 
+from app.core.health import start_health_prober, stop_health_prober
+from app.core.jobs import start_job_runner, stop_job_runner
+from app.core.startup import startup_step, warm_up
 from app.db.session import engine, close_db
+from app.middlewares.rate_limit import close_rate_limit_backends
+from app.utils.loop_monitor import start_loop_monitor, stop_loop_monitor
+from app.utils.metrics import REGISTRY, start_metrics_publisher, stop_metrics_publisher
 from app.db.init_db import init_database
 from config import settings
 
@@ -17,12 +23,39 @@ def startup_event_handler(app: FastAPI) -> Callable:
         
         # 初始化数据库连接和表结构
         try:
-            await init_database(engine)
+            with startup_step("init_database"):
+                await init_database(engine)
             logger.info("数据库初始化成功")
         except Exception as e:
             logger.error(f"数据库初始化失败: {e}")
             raise
         
+        # 预热连接池、语句和响应序列化，避免首个请求变慢
+        if settings.WARMUP_ENABLED:
+            await warm_up(app, engine, settings.DATABASE_POOL_SIZE)
+        
+        # 启动事件循环阻塞监控
+        if settings.LOOP_MONITOR_ENABLED:
+            budget = settings.LOOP_BLOCK_BUDGET_MS if settings.APP_ENV != "production" else 0
+            await start_loop_monitor(
+                interval=settings.LOOP_MONITOR_INTERVAL_MS / 1000,
+                threshold=settings.LOOP_BLOCK_THRESHOLD_MS / 1000,
+                budget=budget / 1000,
+            )
+        
+        # 启动后台健康探测，探针端点只读取其缓存结果
+        with startup_step("health_prober"):
+            await start_health_prober(engine)
+        
+        # 启动后台任务调度
+        if settings.JOBS_ENABLED:
+            with startup_step("job_runner"):
+                await start_job_runner(engine)
+        
+        # 生产模式多个工作进程共享指标时，定期发布本进程的连接池、缓存等回调指标
+        if REGISTRY.shared:
+            start_metrics_publisher(settings.METRICS_PUBLISH_INTERVAL_SECONDS)
+        
         logger.info("Application startup complete")
     
     return startup
@@ -33,9 +66,21 @@ def shutdown_event_handler(app: FastAPI) -> Callable:
     async def shutdown() -> None:
         logger.info("Shutting down application")
         
-        # 关闭数据库连接
+        # 先停止健康探测，/readyz 随即返回未就绪
+        await stop_health_prober()
+        await stop_loop_monitor()
+        await stop_metrics_publisher()
+        
+        # 等待执行中的后台任务，超时未完成的归还到队列
+        await stop_job_runner()
+        
+        # 关闭数据库连接和限流使用的 Redis 连接
         await close_db()
+        await close_rate_limit_backends()
         
         logger.info("Application shutdown complete")
+        
+        # 等待后台线程写完队列中的日志
+        await logger.complete()
     
     return shutdown
\ No newline at end of file
@@ -0,0 +1,190 @@
+"""
+后台健康探测
+按固定间隔检查数据库并采样事件循环延迟，结果缓存在内存中；
+/livez、/readyz 和 /api/health 直接读取缓存，不占用连接池
+"""
+import asyncio
+from datetime import datetime, timezone
+from time import monotonic, perf_counter
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.utils import loop_monitor
+from app.utils.metrics import REGISTRY, CallbackGauge
+from app.utils.security import bcrypt_pending
+from config import settings
+
+# 事件循环延迟采样间隔（秒）
+_LAG_SAMPLE_INTERVAL = 0.5
+
+
+def pool_usage(engine: AsyncEngine) -> Dict[str, Any]:
+    """连接池使用情况；不限容量的连接池（NullPool / StaticPool）capacity 为 None"""
+    pool = engine.sync_engine.pool
+    checked_out = pool.checkedout() if hasattr(pool, "checkedout") else 0
+    capacity = None
+    if hasattr(pool, "size") and getattr(pool, "_max_overflow", -1) >= 0:
+        capacity = pool.size() + pool._max_overflow
+    return {"checked_out": checked_out, "capacity": capacity}
+
+
+class HealthProber:
+    """
+    健康探测器
+
+    Args:
+        engine: 数据库引擎
+        interval: 数据库检查间隔（秒）
+        timeout: 单次数据库检查超时（秒）
+    """
+
+    def __init__(self, engine: AsyncEngine, interval: float, timeout: float):
+        self.engine = engine
+        self.interval = interval
+        self.timeout = timeout
+        self.db_ok: Optional[bool] = None
+        self.db_latency: Optional[float] = None
+        self.db_error: Optional[str] = None
+        self.checked_at: Optional[datetime] = None
+        self.loop_lag = 0.0
+        self.heartbeat = monotonic()
+        self.shutting_down = False
+        self._task: Optional[asyncio.Task] = None
+        self._check: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self.shutting_down = False
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="health-prober")
+
+    async def stop(self) -> None:
+        self.shutting_down = True
+        for task in (self._task, self._check):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._check = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def event_loop_lag(self) -> float:
+        """事件循环延迟，启用阻塞监控时使用其更高频的采样结果"""
+        monitor = loop_monitor.loop_monitor
+        if monitor is not None and monitor.running:
+            return monitor.lag
+        return self.loop_lag
+
+    async def _ping(self) -> None:
+        async with self.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def check_database(self) -> None:
+        start = perf_counter()
+        try:
+            # 超时包括从连接池获取连接，连接池耗尽或建立连接卡住时同样按超时失败
+            await asyncio.wait_for(self._ping(), self.timeout)
+            self.db_ok, self.db_error = True, None
+        except Exception as e:
+            if self.db_ok is not False:
+                logger.warning(f"数据库健康检查失败: {e!r}")
+            self.db_ok, self.db_error = False, repr(e)
+        self.db_latency = perf_counter() - start
+        self.checked_at = datetime.now(timezone.utc)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        # 启动时的首次检查由 start_health_prober 完成
+        next_check = monotonic() + self.interval
+        while True:
+            now = monotonic()
+            # 同一时刻只进行一次数据库检查，数据库变慢时探测请求不会堆积
+            if now >= next_check and (self._check is None or self._check.done()):
+                self._check = loop.create_task(self.check_database())
+                next_check = now + self.interval
+            start = loop.time()
+            await asyncio.sleep(_LAG_SAMPLE_INTERVAL)
+            self.loop_lag = max(loop.time() - start - _LAG_SAMPLE_INTERVAL, 0.0)
+            self.heartbeat = monotonic()
+
+    def liveness(self) -> List[str]:
+        """存活检查失败原因，为空表示存活"""
+        if not self.running:
+            return ["健康探测任务未运行"]
+        stale = monotonic() - self.heartbeat
+        if stale > max(self.interval, _LAG_SAMPLE_INTERVAL) * 3:
+            return [f"健康探测已 {stale:.1f} 秒未更新"]
+        return []
+
+    def readiness(self) -> List[str]:
+        """就绪检查失败原因，为空表示可以接收流量"""
+        reasons = self.liveness()
+        if self.shutting_down:
+            reasons.append("应用正在关闭")
+        if self.db_ok is None:
+            reasons.append("数据库尚未完成首次检查")
+        elif not self.db_ok:
+            reasons.append(f"数据库不可用: {self.db_error}")
+
+        pool = pool_usage(self.engine)
+        if settings.READINESS_MAX_POOL_USAGE > 0 and pool["capacity"] and pool["checked_out"] >= pool["capacity"] * settings.READINESS_MAX_POOL_USAGE:
+            reasons.append(f"连接池已饱和: {pool['checked_out']}/{pool['capacity']}")
+
+        pending = bcrypt_pending()
+        if settings.READINESS_MAX_BCRYPT_PENDING > 0 and pending >= settings.READINESS_MAX_BCRYPT_PENDING:
+            reasons.append(f"密码哈希队列已饱和: {pending}")
+
+        lag = self.event_loop_lag
+        if settings.READINESS_MAX_LOOP_LAG_MS > 0 and lag * 1000 >= settings.READINESS_MAX_LOOP_LAG_MS:
+            reasons.append(f"事件循环延迟过高: {lag * 1000:.0f}ms")
+        return reasons
+
+    def snapshot(self) -> Dict[str, Any]:
+        pool = pool_usage(self.engine)
+        return {
+            "database": "connected" if self.db_ok else ("unknown" if self.db_ok is None else "disconnected"),
+            "database_latency_ms": round(self.db_latency * 1000, 3) if self.db_latency is not None else None,
+            "checked_at": self.checked_at,
+            "pool_checked_out": pool["checked_out"],
+            "pool_capacity": pool["capacity"],
+            "bcrypt_pending": bcrypt_pending(),
+            "event_loop_lag_ms": round(self.event_loop_lag * 1000, 3),
+        }
+
+
+# 由应用生命周期启动和停止
+health_prober: Optional[HealthProber] = None
+
+
+def get_health_prober() -> Optional[HealthProber]:
+    return health_prober
+
+
+async def start_health_prober(engine: AsyncEngine) -> HealthProber:
+    global health_prober
+    health_prober = HealthProber(
+        engine,
+        interval=settings.HEALTH_CHECK_INTERVAL_SECONDS,
+        timeout=settings.HEALTH_CHECK_TIMEOUT_SECONDS,
+    )
+    health_prober.start()
+    # 启动时先完成一次检查，就绪状态不必等待第一个间隔
+    await health_prober.check_database()
+    return health_prober
+
+
+async def stop_health_prober() -> None:
+    if health_prober is not None:
+        await health_prober.stop()
+
+
+REGISTRY.register(CallbackGauge(
+    "health_database_up", "后台健康探测的数据库状态（1 正常，0 异常）",
+    lambda: {(): 1 if health_prober and health_prober.db_ok else 0}, aggregate="min"))
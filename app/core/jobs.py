@@ -0,0 +1,361 @@
+"""
+后台任务
+任务持久化在 jobs 表中，由应用生命周期内的调度任务领取执行，不占用请求路径：
+- 业务代码通过 enqueue_job 在自己的事务中加入任务，随业务修改一起提交后立即返回；事务提交、连接归还后才唤醒调度
+- 空闲时每个轮询间隔只执行一条只读查询找出有到期任务的类型，只对这些类型执行领取
+- 领取是一条 UPDATE ... RETURNING 语句，生产模式下多个工作进程可同时调度而不会重复领取
+- 每种任务在每个进程内的并发数由 JOB_CONCURRENCY 限制
+- 执行中的任务持有租约并定期续租；进程崩溃后租约过期，任务被重新领取。
+  每次领取有独立的 lock_token，失去租约的执行者不能再写回结果或进度（续租失败时取消执行）
+- 失败后按指数退避（带随机抖动）重试，超过最大次数标记为 failed
+- 处理函数可在自己的事务中保存进度，任务被重新领取（重试、进程重启）后从保存的进度继续
+"""
+import asyncio
+import random
+from dataclasses import dataclass
+from time import perf_counter, time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.db.repositories.job_repository import JobRepository
+from app.utils.metrics import REGISTRY, CallbackGauge, Counter, Histogram
+from config import settings
+
+JOBS_PROCESSED = REGISTRY.register(Counter(
+    "jobs_processed_total", "结束执行的后台任务数（succeeded / retried / failed / released / lost）", ("type", "result")))
+JOB_DURATION = REGISTRY.register(Histogram(
+    "job_duration_seconds", "后台任务执行耗时（秒）", ("type",),
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)))
+
+# 停止时等待执行中任务完成的时间（秒），超时后取消并归还任务
+_SHUTDOWN_GRACE = 5.0
+# 清理已成功任务的间隔（秒）
+_PURGE_INTERVAL = 60.0
+
+# 连接 info 中的标记：事务中加入了需要立即执行的任务 / 该事务已提交
+_ENQUEUED = "jobs_enqueued"
+_COMMITTED = "jobs_committed"
+
+
+class LeaseLost(Exception):
+    """任务租约已失效（已被其他进程重新领取或任务已取消），本次执行的结果不再写回"""
+
+
+@dataclass
+class Job:
+    """交给处理函数的任务"""
+    id: int
+    type: str
+    payload: Dict[str, Any]
+    progress: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+    lock_token: str
+    engine: AsyncEngine
+
+    async def save_progress(self, conn: AsyncConnection, progress: Optional[Dict[str, Any]] = None) -> None:
+        """
+        在 conn 的事务中保存进度，与该事务中的修改一起提交
+
+        Raises:
+            LeaseLost: 任务已被其他进程接管或已取消，调用方的事务随异常回滚
+        """
+        if progress is not None:
+            self.progress = progress
+        if not await JobRepository(conn).set_progress(self.id, self.lock_token, self.progress):
+            raise LeaseLost(f"后台任务 {self.type}#{self.id} 的租约已失效")
+
+
+JobHandler = Callable[[Job], Awaitable[None]]
+
+_HANDLERS: Dict[str, JobHandler] = {}
+
+
+def job_handler(job_type: str) -> Callable[[JobHandler], JobHandler]:
+    """注册任务处理函数，处理函数抛出异常时任务按退避重试"""
+    def decorator(handler: JobHandler) -> JobHandler:
+        _HANDLERS[job_type] = handler
+        return handler
+    return decorator
+
+
+def parse_concurrency(spec: str) -> Dict[str, int]:
+    """
+    解析各任务类型的并发数，如 "purge_user=1,*=2"
+
+    Returns:
+        {任务类型: 并发数}，"*" 为未单独配置的类型的默认值
+    """
+    limits: Dict[str, int] = {}
+    for part in spec.split(","):
+        name, _, limit = part.strip().partition("=")
+        name = name.strip()
+        if name and limit:
+            limits[name] = max(int(limit), 1)
+    return limits
+
+
+class JobRunner:
+    """
+    后台任务调度器
+
+    Args:
+        engine: 数据库引擎，领取、完成任务和处理函数各自使用短事务
+        concurrency: {任务类型: 本进程内的并发数}，"*" 为默认值
+        poll_interval: 没有任务时的轮询间隔（秒），本进程加入任务时立即唤醒
+        lease: 任务租约（秒），执行期间每 lease / 3 续租一次
+        backoff: 第一次重试的等待时间（秒），之后每次翻倍
+        backoff_max: 重试等待时间上限（秒）
+        retention: 已成功任务的保留时间（秒）
+    """
+
+    def __init__(self, engine: AsyncEngine, concurrency: Dict[str, int], poll_interval: float = 1.0,
+                 lease: float = 300, backoff: float = 5, backoff_max: float = 600, retention: float = 86400):
+        self.engine = engine
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.retention = retention
+        # 任务 ID -> (任务类型, lock_token, 执行任务)
+        self.running: Dict[int, Tuple[str, str, asyncio.Task]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+    def limit(self, job_type: str) -> int:
+        return self.concurrency.get(job_type, self.concurrency.get("*", 1))
+
+    def in_flight(self, job_type: str) -> int:
+        return sum(1 for running_type, _, _ in self.running.values() if running_type == job_type)
+
+    def retry_delay(self, attempts: int) -> float:
+        """第 attempts 次执行失败后的重试等待时间：指数退避，乘以 [0.5, 1] 的随机抖动"""
+        return min(self.backoff * 2 ** (attempts - 1), self.backoff_max) * random.uniform(0.5, 1.0)
+
+    def notify(self) -> None:
+        """唤醒调度任务立即领取（可在其他线程调用）"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def start(self) -> None:
+        self._stopping = False
+        self._loop = asyncio.get_running_loop()
+        self._task = self._loop.create_task(self._run(), name="job-runner")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            # 3.11 及以前 wait_for 的内部操作与取消同时完成时会吞掉取消，调度循环还要检查停止标记
+            self._stopping = True
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        tasks = [task for _, _, task in self.running.values()]
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=_SHUTDOWN_GRACE)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _run(self) -> None:
+        next_renew = time() + self.lease / 3
+        next_purge = time()
+        while not self._stopping:
+            self._wakeup.clear()
+            claimed = False
+            try:
+                claimed = await self._dispatch()
+                now = time()
+                if self.running and now >= next_renew:
+                    leases = {job_id: token for job_id, (_, token, _) in self.running.items()}
+                    async with self.engine.begin() as conn:
+                        lost = await JobRepository(conn).renew(leases, self.lease)
+                    for job_id in lost:
+                        # 已被其他进程接管或已取消，停止本地执行（续租期间已结束的任务不在 running 中）
+                        running = self.running.get(job_id)
+                        if running is not None:
+                            logger.warning(f"后台任务 #{job_id} 续租失败，租约已被接管，取消本地执行")
+                            running[2].cancel()
+                    next_renew = now + self.lease / 3
+                if now >= next_purge:
+                    async with self.engine.begin() as conn:
+                        await JobRepository(conn).purge_finished(now - self.retention)
+                    next_purge = now + _PURGE_INTERVAL
+            except Exception as e:
+                logger.warning(f"后台任务调度失败: {e!r}")
+            if claimed or self._stopping:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _dispatch(self) -> bool:
+        """为有空闲并发且有到期任务的类型领取任务，返回是否领取到"""
+        idle = [job_type for job_type in _HANDLERS if self.in_flight(job_type) < self.limit(job_type)]
+        if not idle:
+            return False
+        async with self.engine.connect() as conn:
+            due = await JobRepository(conn).due_types(idle)
+
+        claimed = False
+        for job_type in due:
+            handler = _HANDLERS[job_type]
+            while self.in_flight(job_type) < self.limit(job_type):
+                async with self.engine.begin() as conn:
+                    row = await JobRepository(conn).claim(job_type, self.lease)
+                if row is None:
+                    break
+                claimed = True
+                job = Job(engine=self.engine, **row)
+                task = asyncio.get_running_loop().create_task(self._execute(job, handler), name=f"job-{job.id}")
+                self.running[job.id] = (job_type, job.lock_token, task)
+        return claimed
+
+    async def _execute(self, job: Job, handler: JobHandler) -> None:
+        start = perf_counter()
+        result = "succeeded"
+        try:
+            await handler(job)
+        except asyncio.CancelledError:
+            # 进程退出，归还任务由其他进程或重启后继续；续租失败被取消时归还不会生效
+            applied = await self._update(job, JobRepository.release)
+            result = "released" if applied else "lost"
+            raise
+        except LeaseLost as e:
+            result = "lost"
+            logger.warning(f"{e}，放弃本次执行")
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"[:1000]
+            if job.attempts >= job.max_attempts:
+                result = "failed"
+                logger.error(f"后台任务 {job.type}#{job.id} 第 {job.attempts} 次执行失败，不再重试: {error}")
+                applied = await self._update(job, JobRepository.fail, error)
+            else:
+                result = "retried"
+                delay = self.retry_delay(job.attempts)
+                logger.warning(f"后台任务 {job.type}#{job.id} 第 {job.attempts} 次执行失败，{delay:.1f}s 后重试: {error}")
+                applied = await self._update(job, JobRepository.retry, delay, error)
+            if not applied:
+                result = "lost"
+        else:
+            if not await self._update(job, JobRepository.complete):
+                result = "lost"
+        finally:
+            self.running.pop(job.id, None)
+            JOB_DURATION.observe(perf_counter() - start, (job.type,))
+            JOBS_PROCESSED.inc((job.type, result))
+            self.notify()
+
+    async def _update(self, job: Job, method: Callable, *args: Any) -> bool:
+        """在本次领取仍有效时写回任务状态，返回是否生效"""
+        try:
+            async with self.engine.begin() as conn:
+                applied = await method(JobRepository(conn), job.id, job.lock_token, *args)
+        except Exception as e:
+            # 状态未能写回时任务保持 running，租约过期后会被重新领取
+            logger.error(f"更新后台任务状态失败: {e!r}")
+            return False
+        if not applied:
+            logger.warning(f"后台任务 {job.type}#{job.id} 的租约已被接管，本次执行结果未写回")
+        return applied
+
+    def status(self) -> Dict[str, Dict[str, int]]:
+        """本进程各任务类型的执行中数量和并发上限"""
+        return {
+            job_type: {"in_flight": self.in_flight(job_type), "concurrency": self.limit(job_type)}
+            for job_type in _HANDLERS
+        }
+
+
+# 由应用生命周期启动和停止
+job_runner: Optional[JobRunner] = None
+
+
+async def enqueue_job(conn: AsyncConnection, job_type: str, payload: Optional[Dict[str, Any]] = None,
+                      delay: float = 0, max_attempts: Optional[int] = None) -> int:
+    """
+    在 conn 的事务中加入后台任务，返回任务 ID
+
+    Args:
+        conn: 调用方的数据库连接，任务随其事务一起提交
+        job_type: 任务类型，需有 job_handler 注册的处理函数
+        payload: 任务参数（可 JSON 序列化）
+        delay: 延迟执行的秒数
+        max_attempts: 最多执行次数，默认 JOB_MAX_ATTEMPTS
+    """
+    job_id = await JobRepository(conn).enqueue(
+        job_type, payload, delay=delay, max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+    if delay <= 0:
+        # 事务提交前任务对调度不可见，提交后再唤醒（见 _on_commit / _on_checkin）
+        conn.info[_ENQUEUED] = True
+    return job_id
+
+
+def _on_commit(conn) -> None:
+    # commit 事件在实际提交之前触发，这里只做标记
+    if conn.info.pop(_ENQUEUED, False):
+        conn.info[_COMMITTED] = True
+
+
+def _on_rollback(conn) -> None:
+    conn.info.pop(_ENQUEUED, None)
+
+
+def _on_checkin(dbapi_connection, connection_record) -> None:
+    # 连接归还连接池时事务已提交完成，此时唤醒调度才能领取到任务
+    if connection_record is None:
+        return
+    connection_record.info.pop(_ENQUEUED, None)
+    if connection_record.info.pop(_COMMITTED, False) and job_runner is not None:
+        job_runner.notify()
+
+
+def install_commit_notify(engine: AsyncEngine) -> None:
+    """注册事务事件，使 enqueue_job 加入的任务在事务提交后唤醒调度"""
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "commit", _on_commit):
+        return
+    event.listen(sync_engine, "commit", _on_commit)
+    event.listen(sync_engine, "rollback", _on_rollback)
+    event.listen(sync_engine, "checkin", _on_checkin)
+
+
+async def start_job_runner(engine: AsyncEngine) -> JobRunner:
+    global job_runner
+    install_commit_notify(engine)
+    job_runner = JobRunner(
+        engine,
+        parse_concurrency(settings.JOB_CONCURRENCY),
+        poll_interval=settings.JOB_POLL_INTERVAL_SECONDS,
+        lease=settings.JOB_LEASE_SECONDS,
+        backoff=settings.JOB_RETRY_BACKOFF_SECONDS,
+        backoff_max=settings.JOB_RETRY_BACKOFF_MAX_SECONDS,
+        retention=settings.JOB_RETENTION_HOURS * 3600,
+    )
+    job_runner.start()
+    return job_runner
+
+
+async def stop_job_runner() -> None:
+    global job_runner
+    if job_runner is not None:
+        # 先清空，停止后提交的事务不再唤醒已关闭的事件循环
+        runner, job_runner = job_runner, None
+        await runner.stop()
+
+
+REGISTRY.register(CallbackGauge(
+    "jobs_in_flight", "本进程正在执行的后台任务数",
+    lambda: {(job_type,): float(job_runner.in_flight(job_type)) for job_type in _HANDLERS} if job_runner else {},
+    ("type",)))
@@ -0,0 +1,252 @@
+"""
+生产模式进程管理
+主进程导入应用并绑定监听套接字后再 fork 工作进程，模块、路由表和编译缓存以写时复制方式共享；
+主进程负责：
+- 按可用 CPU 数（考虑 CPU 亲和性和 cgroup 配额）确定工作进程数
+- 工作进程处理 max_requests（加随机抖动）个请求后退出并由主进程补上，RSS 超过阈值时主动回收
+- 工作进程异常退出时按指数退避重启，避免启动即崩溃时反复 fork
+- 收到 SIGTERM / SIGINT 时通知所有工作进程优雅退出，超时后强制结束
+- fork 前创建共享指标内存，每个工作进程写自己的槽位，任一进程的 /metrics 都输出全部进程的汇总
+工作进程日志经 loguru 的进程间队列交给主进程写出（LOG_ENQUEUE=true）
+"""
+import math
+import os
+import random
+import signal
+import socket
+from dataclasses import dataclass
+from pathlib import Path
+from time import monotonic, sleep
+from typing import Any, List, Optional
+
+import uvicorn
+from loguru import logger
+
+from app.utils.metrics import REGISTRY
+from app.utils.shared_metrics import SharedMetricsRegion, SlotStore
+
+# 主循环轮询间隔（秒）
+_POLL_INTERVAL = 0.5
+# 检查工作进程内存的间隔（秒）
+_RSS_CHECK_INTERVAL = 5.0
+# 工作进程存活超过该时间后再崩溃，退避从头计算（秒）
+_STABLE_AFTER = 60.0
+_MAX_BACKOFF = 30.0
+
+
+def available_cpus() -> int:
+    """当前进程可用的 CPU 数，容器中按 cgroup v2 的 cpu.max 配额向上取整"""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            count = min(count, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return count
+
+
+def rss_bytes(pid: int) -> int:
+    """读取进程常驻内存（Linux /proc），无法读取时返回 0"""
+    try:
+        resident = int(Path(f"/proc/{pid}/statm").read_text().split()[1])
+    except (OSError, ValueError, IndexError):
+        return 0
+    return resident * os.sysconf("SC_PAGE_SIZE")
+
+
+def event_loop_backends() -> str:
+    """loop / http 为 auto 时 uvicorn 实际使用的实现"""
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+    try:
+        import httptools  # noqa: F401
+        http = "httptools"
+    except ImportError:
+        http = "h11"
+    return f"{loop} + {http}"
+
+
+@dataclass
+class WorkerSlot:
+    """一个工作进程位置，进程退出后在同一位置重启"""
+    index: int
+    pid: Optional[int] = None
+    started: float = 0.0
+    failures: int = 0
+    restart_at: float = 0.0
+    recycling: bool = False
+
+
+class Supervisor:
+    """
+    预 fork 进程管理器
+
+    Args:
+        app: 已导入的 ASGI 应用
+        workers: 工作进程数，0 表示按可用 CPU 数
+        max_requests: 工作进程处理多少个请求后重启，0 表示不限
+        max_requests_jitter: max_requests 的随机增量上限，避免所有进程同时重启
+        max_rss_mb: 工作进程常驻内存上限（MB），超过后回收，0 表示不检查
+        graceful_timeout: 优雅退出的最长等待时间（秒）
+        metrics_slot_kb: 每个工作进程的共享指标槽位大小（KB），0 表示各进程只输出自己的指标
+        **server_options: 传给 uvicorn.Config 的其他参数（host、port、backlog 等）
+    """
+
+    def __init__(self, app: Any, workers: int = 0, max_requests: int = 0, max_requests_jitter: int = 0,
+                 max_rss_mb: int = 0, graceful_timeout: float = 30, metrics_slot_kb: int = 0,
+                 **server_options: Any):
+        self.app = app
+        self.workers = workers or available_cpus()
+        self.max_rss = max_rss_mb * 1024 * 1024
+        self.graceful_timeout = graceful_timeout
+        self.config = uvicorn.Config(
+            app,
+            loop="auto",
+            http="auto",
+            limit_max_requests=max_requests or None,
+            limit_max_requests_jitter=max_requests_jitter if max_requests else 0,
+            timeout_graceful_shutdown=math.ceil(graceful_timeout),
+            log_config=None,
+            **server_options,
+        )
+        self.slots = [WorkerSlot(index) for index in range(self.workers)]
+        self.metrics = SharedMetricsRegion(self.workers, metrics_slot_kb * 1024) if metrics_slot_kb else None
+        self.socket: Optional[socket.socket] = None
+        self._stopping = False
+
+    # ---- 工作进程 ----
+
+    def _run_worker(self, slot: WorkerSlot) -> None:
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+        random.seed()
+        if self.metrics is not None:
+            self.metrics.activate(slot.index, os.getpid())
+            REGISTRY.use_store(SlotStore(self.metrics, slot.index))
+        uvicorn.Server(self.config).run(sockets=[self.socket])
+
+    def _spawn(self, slot: WorkerSlot) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._run_worker(slot)
+            except BaseException:
+                logger.exception(f"工作进程 {slot.index} 异常退出")
+                code = 1
+            finally:
+                os._exit(code)
+        slot.pid = pid
+        slot.started = monotonic()
+        slot.recycling = False
+        logger.info(f"工作进程 {slot.index} 已启动 (pid {pid})")
+
+    # ---- 主进程 ----
+
+    def _on_exit(self, slot: WorkerSlot, status: int) -> None:
+        code = os.waitstatus_to_exitcode(status)
+        lived = monotonic() - slot.started
+        slot.pid = None
+        if self.metrics is not None:
+            self.metrics.deactivate(slot.index)
+        if self._stopping:
+            return
+        if code == 0 or slot.recycling:
+            # 达到 max_requests 或被回收，立即补上
+            slot.failures = 0
+            slot.restart_at = 0.0
+            logger.info(f"工作进程 {slot.index} 已退出（运行 {lived:.0f}s），重新启动")
+            return
+        slot.failures = 1 if lived >= _STABLE_AFTER else slot.failures + 1
+        delay = min(2 ** (slot.failures - 1), _MAX_BACKOFF)
+        slot.restart_at = monotonic() + delay
+        logger.warning(f"工作进程 {slot.index} 异常退出（退出码 {code}，运行 {lived:.1f}s），{delay:.0f}s 后重启")
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            for slot in self.slots:
+                if slot.pid == pid:
+                    self._on_exit(slot, status)
+                    break
+
+    def _check_memory(self) -> None:
+        """每次最多回收一个超出内存上限的工作进程，其余进程继续接收请求"""
+        for slot in self.slots:
+            if slot.pid is None or slot.recycling:
+                continue
+            rss = rss_bytes(slot.pid)
+            if rss > self.max_rss:
+                logger.info(f"工作进程 {slot.index} 内存 {rss / 1024 / 1024:.0f}MB 超过上限，回收")
+                slot.recycling = True
+                os.kill(slot.pid, signal.SIGTERM)
+                return
+
+    def _handle_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _shutdown(self) -> None:
+        running = [slot for slot in self.slots if slot.pid is not None]
+        for slot in running:
+            try:
+                os.kill(slot.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = monotonic() + self.graceful_timeout + 5
+        while any(slot.pid is not None for slot in self.slots) and monotonic() < deadline:
+            self._reap()
+            sleep(0.1)
+        for slot in self.slots:
+            if slot.pid is not None:
+                logger.warning(f"工作进程 {slot.index} 未能按时退出，强制结束")
+                try:
+                    os.kill(slot.pid, signal.SIGKILL)
+                    os.waitpid(slot.pid, 0)
+                except (ProcessLookupError, ChildProcessError):
+                    pass
+                slot.pid = None
+
+    def run(self) -> None:
+        self.socket = self.config.bind_socket()
+        logger.info(
+            f"主进程 {os.getpid()} 监听 {self.config.host}:{self.config.port}，"
+            f"{self.workers} 个工作进程，{event_loop_backends()}"
+        )
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+
+        next_rss_check = monotonic() + _RSS_CHECK_INTERVAL
+        try:
+            while not self._stopping:
+                self._reap()
+                now = monotonic()
+                for slot in self.slots:
+                    if slot.pid is None and slot.restart_at <= now and not self._stopping:
+                        self._spawn(slot)
+                if self.max_rss and now >= next_rss_check:
+                    self._check_memory()
+                    next_rss_check = now + _RSS_CHECK_INTERVAL
+                sleep(_POLL_INTERVAL)
+        finally:
+            logger.info("正在停止工作进程")
+            self._shutdown()
+            self.socket.close()
+
+
+def serve(app: Any, host: str, port: int, workers: int, **options: Any) -> None:
+    """以生产模式运行应用（仅支持可 fork 的平台）"""
+    if not hasattr(os, "fork"):
+        raise RuntimeError("生产模式进程管理需要支持 fork 的平台")
+    Supervisor(app, workers=workers, host=host, port=port, **options).run()
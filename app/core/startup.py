@@ -0,0 +1,108 @@
+"""
+启动阶段计时与预热
+记录生命周期各步骤耗时，并在开始接收请求前预先打开连接池连接、编译 Repository 语句、初始化响应序列化，
+避免第一个请求承担这些冷启动开销
+"""
+import asyncio
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Iterator, List, Tuple
+
+import anyio.to_thread
+from fastapi import FastAPI
+from fastapi.routing import APIRoute, serialize_response
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db.repositories.item_repository import ItemRepository
+from app.db.repositories.user_repository import UserRepository
+from app.schemas.response import success_response
+
+# (步骤名, 耗时秒数)
+startup_timings: List[Tuple[str, float]] = []
+
+
+@contextmanager
+def startup_step(name: str) -> Iterator[None]:
+    """记录一个启动步骤的耗时"""
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        duration = perf_counter() - start
+        startup_timings.append((name, duration))
+        logger.debug(f"Startup step {name}: {duration * 1000:.1f}ms")
+
+
+async def warm_pool(engine: AsyncEngine, size: int) -> None:
+    """同时打开 size 个连接并归还连接池"""
+    if size <= 0:
+        return
+    connections = await asyncio.gather(*(engine.connect().start() for _ in range(size)))
+    try:
+        for conn in connections:
+            await conn.execute(text("SELECT 1"))
+    finally:
+        for conn in connections:
+            await conn.close()
+
+
+async def warm_statements(engine: AsyncEngine) -> None:
+    """用不命中任何记录的参数执行各只读语句，填充语句构造缓存和 SQLAlchemy 编译缓存"""
+    async with engine.connect() as conn:
+        items = ItemRepository(conn)
+        users = UserRepository(conn)
+        await items.get_by_id(0)
+        await items.get_many([0])
+        await items.get_all(limit=0)
+        await items.get_items_by_owner(0, limit=0)
+        await items.count()
+        await items.count_by_owner(0)
+        await users.get_by_id(0)
+        await users.get_many([0])
+        await users.get_by_email("")
+        await users.get_by_username("")
+        await users.get_all(limit=0)
+        await users.count()
+
+
+async def warm_serializers(app: FastAPI) -> int:
+    """
+    用空的统一响应体走一遍各路由的响应校验和序列化
+
+    Returns:
+        成功预热的路由数（响应模型不是 ApiResponse 的路由会被跳过）
+    """
+    warmed = 0
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or route.response_field is None:
+            continue
+        try:
+            await serialize_response(
+                field=route.response_field,
+                response_content=success_response(),
+                exclude_unset=route.response_model_exclude_unset,
+            )
+            warmed += 1
+        except Exception:
+            continue
+    return warmed
+
+
+async def warm_threadpool() -> None:
+    """启动 anyio 工作线程（同步依赖和 run_in_threadpool 使用），并加载其按需导入的 asyncio 后端"""
+    await anyio.to_thread.run_sync(lambda: None)
+
+
+async def warm_up(app: FastAPI, engine: AsyncEngine, pool_size: int) -> None:
+    """执行全部预热步骤"""
+    with startup_step("warm_threadpool"):
+        await warm_threadpool()
+    with startup_step("warm_pool"):
+        await warm_pool(engine, pool_size)
+    with startup_step("warm_statements"):
+        await warm_statements(engine)
+    with startup_step("warm_serializers"):
+        warmed = await warm_serializers(app)
+    logger.info(f"Warm-up complete: {pool_size} connections, {warmed} response serializers")
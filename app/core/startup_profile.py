@@ -0,0 +1,103 @@
+"""
+启动耗时分析
+
+1. 在新的解释器中以 -X importtime 导入 main，按模块列出累计导入耗时，并按顶层包汇总自身耗时
+2. 在当前进程中执行应用生命周期，列出各启动步骤耗时
+3. 对比预热后前两次请求的延迟
+
+    python -m app.core.startup_profile --top 20
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.paths import PROJECT_ROOT
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int, int]]:
+    """
+    解析 -X importtime 输出
+
+    Returns:
+        [(模块名, 嵌套深度, 自身耗时 us, 累计耗时 us)]
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line.split(":", 1)[1].split("|")
+        module = module.rstrip()
+        # 模块名前有 1 个空格，每层嵌套再加 2 个空格
+        depth = (len(module) - len(module.lstrip()) - 1) // 2
+        entries.append((module.strip(), depth, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def profile_imports(top: int) -> None:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, env=os.environ.copy(),
+    )
+    entries = parse_importtime(result.stderr)
+    if not entries:
+        print(result.stderr[-2000:], file=sys.stderr)
+        raise SystemExit("无法获取导入耗时")
+
+    total = next((cumulative for module, _, _, cumulative in entries if module == "main"), 0)
+    print(f"\n== 导入耗时（import main 共 {total / 1000:.1f}ms）==")
+    print(f"{'累计 ms':>10} {'自身 ms':>10}  模块")
+    for module, depth, self_us, cumulative in sorted(entries, key=lambda entry: -entry[3])[:top]:
+        print(f"{cumulative / 1000:>10.1f} {self_us / 1000:>10.1f}  {'  ' * min(depth, 6)}{module}")
+
+    packages: Dict[str, int] = defaultdict(int)
+    for module, _, self_us, _ in entries:
+        packages[module.split(".")[0]] += self_us
+    print("\n== 按顶层包汇总的自身耗时 ==")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"{self_us / 1000:>10.1f}  {package}")
+
+
+async def profile_lifespan() -> None:
+    import httpx
+
+    start = perf_counter()
+    from main import app
+    print(f"\n== 当前进程 import main: {(perf_counter() - start) * 1000:.1f}ms ==")
+
+    from app.core.startup import startup_timings
+
+    start = perf_counter()
+    async with app.router.lifespan_context(app):
+        print(f"\n== 生命周期启动共 {(perf_counter() - start) * 1000:.1f}ms ==")
+        for name, duration in startup_timings:
+            print(f"{duration * 1000:>10.1f}ms  {name}")
+
+        print("\n== 首次请求延迟 ==")
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            for path in ("/api/health", "/api/items?limit=10"):
+                for attempt in ("第 1 次", "第 2 次"):
+                    start = perf_counter()
+                    response = await client.get(path)
+                    print(f"{(perf_counter() - start) * 1000:>10.1f}ms  {attempt} GET {path} -> {response.status_code}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="启动耗时分析")
+    parser.add_argument("--top", type=int, default=25, help="显示的模块数")
+    parser.add_argument("--skip-imports", action="store_true", help="不分析导入耗时")
+    args = parser.parse_args(argv)
+
+    if not args.skip_imports:
+        profile_imports(args.top)
+    asyncio.run(profile_lifespan())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
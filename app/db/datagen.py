@@ -0,0 +1,311 @@
+"""
+大规模测试数据生成
+
+直接写入配置的数据库（DATABASE_URL），用于深分页、搜索、计数等规模测试：
+- 通过 DBAPI executemany 批量插入，大事务提交
+- bcrypt 哈希预先计算（默认所有用户共用一个，可用 --password-hashes 并行计算多个）
+- 物品所有者服从 Zipf 分布（--owner-skew），created_at 在指定时间范围内随 ID 递增
+- 相同 --seed 生成相同数据
+
+    python -m app.db.datagen --users 100000 --items 10000000 --seed 1
+"""
+import argparse
+import itertools
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Iterator, List, Optional, Sequence
+
+import bcrypt
+from loguru import logger
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+
+from app.db.repositories.item_repository import REBUILD_OWNER_STATS
+
+SCHEMA_FILE = Path(__file__).parent / "schema.sql"
+
+# 异步驱动到同步驱动的映射
+_SYNC_DRIVERS = {"+aiosqlite": "", "+asyncpg": "+psycopg2", "+aiomysql": "+pymysql"}
+
+_ADJECTIVES = (
+    "Vintage", "Compact", "Wireless", "Handmade", "Portable", "Classic", "Ergonomic", "Smart",
+    "Organic", "Durable", "Premium", "Minimal", "Rustic", "Modern", "Foldable", "Waterproof",
+)
+_NOUNS = (
+    "Lamp", "Backpack", "Keyboard", "Mug", "Chair", "Headphones", "Notebook", "Jacket",
+    "Watch", "Bottle", "Speaker", "Camera", "Desk", "Blanket", "Charger", "Sneakers",
+)
+_FIRST_NAMES = (
+    "alex", "sam", "li", "wei", "maria", "john", "yuki", "omar", "anna", "chen",
+    "lucas", "sofia", "ivan", "mei", "noah", "zoe",
+)
+_DOMAINS = ("example.com", "example.org", "example.net", "mail.example.com")
+
+
+def sync_database_url(url: str) -> str:
+    """把异步驱动 URL 转换为同步驱动"""
+    for async_driver, sync_driver in _SYNC_DRIVERS.items():
+        if async_driver in url:
+            return url.replace(async_driver, sync_driver, 1)
+    return url
+
+
+def _placeholders(engine: Engine, count: int) -> str:
+    paramstyle = engine.dialect.paramstyle
+    if paramstyle == "qmark":
+        return ", ".join("?" * count)
+    if paramstyle == "numeric":
+        return ", ".join(f":{i}" for i in range(1, count + 1))
+    return ", ".join(["%s"] * count)
+
+
+def _index_statements() -> List[str]:
+    statements = [stmt.strip() for stmt in SCHEMA_FILE.read_text(encoding="utf-8").split(";")]
+    return [stmt for stmt in statements if stmt.upper().startswith("CREATE INDEX")]
+
+
+def hash_passwords(password: str, count: int, workers: int) -> List[str]:
+    """并行计算 count 个 bcrypt 哈希（bcrypt 计算时释放 GIL，线程池即可并行）"""
+    def compute(_):
+        return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(compute, range(count)))
+
+
+class OwnerSampler:
+    """
+    按 Zipf 分布抽取所有者 ID
+
+    权重 1 / rank^skew，skew 为 0 时为均匀分布；排名到用户 ID 的映射随机打乱，热门用户不集中在小 ID
+    """
+
+    def __init__(self, user_ids: Sequence[int], skew: float, rng: random.Random):
+        self.rng = rng
+        self.user_ids = list(user_ids)
+        self.cum_weights: Optional[List[float]] = None
+        if skew > 0:
+            rng.shuffle(self.user_ids)
+            weights = (1 / rank ** skew for rank in range(1, len(self.user_ids) + 1))
+            self.cum_weights = list(itertools.accumulate(weights))
+
+    def sample(self, count: int) -> List[int]:
+        if self.cum_weights is None:
+            choice = self.rng.choice
+            return [choice(self.user_ids) for _ in range(count)]
+        return self.rng.choices(self.user_ids, cum_weights=self.cum_weights, k=count)
+
+
+def _timestamps(start: datetime, span: timedelta, count: int, rng: random.Random) -> Iterator[tuple]:
+    """生成随序号递增的 (created_at, updated_at)，约 20% 的记录在之后被更新过"""
+    step = span.total_seconds() / max(count, 1)
+    end = start + span
+    for index in range(count):
+        created = start + timedelta(seconds=index * step + rng.random() * step)
+        updated = created
+        if rng.random() < 0.2:
+            updated = created + (end - created) * rng.random()
+        yield created.isoformat(" ", "seconds"), updated.isoformat(" ", "seconds")
+
+
+class DataGenerator:
+    """
+    测试数据生成器
+
+    Args:
+        engine: 同步数据库引擎
+        seed: 随机种子
+        batch_size: 每次 executemany 的行数
+        commit_every: 每个事务的最大行数
+    """
+
+    def __init__(self, engine: Engine, seed: int = 0, batch_size: int = 50_000, commit_every: int = 1_000_000):
+        self.engine = engine
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.commit_every = commit_every
+
+    def ensure_schema(self) -> None:
+        """SQLite 直接执行 schema.sql，其他数据库需先执行 alembic upgrade head"""
+        if self.engine.dialect.name != "sqlite":
+            return
+        statements = [stmt.strip() for stmt in SCHEMA_FILE.read_text(encoding="utf-8").split(";") if stmt.strip()]
+        with self.engine.begin() as conn:
+            for statement in statements:
+                conn.execute(text(statement))
+
+    def _max_id(self, table: str) -> int:
+        with self.engine.connect() as conn:
+            return conn.execute(text(f"SELECT COALESCE(MAX(id), 0) FROM {table}")).scalar_one()
+
+    def _insert(self, sql: str, rows: Iterator[tuple], total: int, label: str) -> None:
+        raw = self.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            if self.engine.dialect.name == "sqlite":
+                # 仅影响本连接：关闭同步写盘、放大页缓存
+                cursor.execute("PRAGMA synchronous=OFF")
+                cursor.execute("PRAGMA cache_size=-262144")
+            started = perf_counter()
+            written = in_transaction = 0
+            while True:
+                batch = list(itertools.islice(rows, self.batch_size))
+                if not batch:
+                    break
+                cursor.executemany(sql, batch)
+                written += len(batch)
+                in_transaction += len(batch)
+                if in_transaction >= self.commit_every:
+                    raw.commit()
+                    in_transaction = 0
+                    elapsed = perf_counter() - started
+                    logger.info(f"{label}: {written}/{total} ({written / elapsed:,.0f} 行/秒)")
+            raw.commit()
+            cursor.close()
+            elapsed = perf_counter() - started
+            logger.info(f"{label}: 写入 {written} 行，用时 {elapsed:.1f}s")
+        finally:
+            raw.close()
+
+    def generate_users(self, count: int, hashes: Sequence[str], start: datetime, span: timedelta,
+                       usernames: Optional[Callable[[int], str]] = None, inactive_rate: float = 0.02) -> None:
+        """
+        写入 count 个用户，数据库中还没有用户时第一个用户为管理员
+
+        Args:
+            usernames: 按本批次内的序号（从 0 开始）生成用户名，默认为随机名字加用户 ID
+            inactive_rate: 停用用户的比例（管理员不会被停用）
+        """
+        first_id = self._max_id("users") + 1
+        rng = self.rng
+        has_admin = first_id > 1
+
+        def rows() -> Iterator[tuple]:
+            times = _timestamps(start, span, count, rng)
+            for offset, (created, updated) in enumerate(times):
+                user_id = first_id + offset
+                username = usernames(offset) if usernames else f"{rng.choice(_FIRST_NAMES)}{user_id}"
+                role = "admin" if not has_admin and offset == 0 else "user"
+                # 管理员始终启用（仍消耗一次随机数，保证相同种子生成相同数据）
+                is_active = 0 if rng.random() < inactive_rate and role != "admin" else 1
+                yield (
+                    f"{username}@{rng.choice(_DOMAINS)}", username, hashes[offset % len(hashes)],
+                    is_active, role, created, updated,
+                )
+
+        sql = (
+            "INSERT INTO users (email, username, hashed_password, is_active, role, created_at, updated_at) "
+            f"VALUES ({_placeholders(self.engine, 7)})"
+        )
+        self._insert(sql, rows(), count, "users")
+
+    def generate_items(self, count: int, skew: float, start: datetime, span: timedelta) -> None:
+        max_user_id = self._max_id("users")
+        if max_user_id == 0:
+            raise ValueError("没有用户，无法生成物品")
+        first_index = self._max_id("items")
+        rng = self.rng
+        sampler = OwnerSampler(range(1, max_user_id + 1), skew, rng)
+
+        def rows() -> Iterator[tuple]:
+            times = _timestamps(start, span, count, rng)
+            done = 0
+            while done < count:
+                size = min(self.batch_size, count - done)
+                owners = sampler.sample(size)
+                for owner_id in owners:
+                    created, updated = next(times)
+                    number = first_index + done + 1
+                    description = None if rng.random() < 0.3 else f"{rng.choice(_ADJECTIVES).lower()} item #{number}"
+                    price = round(rng.lognormvariate(3, 1), 2) if rng.random() < 0.9 else None
+                    yield (
+                        f"{rng.choice(_ADJECTIVES)} {rng.choice(_NOUNS)} {number}",
+                        description, price, owner_id, created, updated,
+                    )
+                    done += 1
+
+        sql = (
+            "INSERT INTO items (title, description, price, owner_id, created_at, updated_at) "
+            f"VALUES ({_placeholders(self.engine, 6)})"
+        )
+        self._insert(sql, rows(), count, "items")
+
+    def rebuild_owner_stats(self) -> None:
+        """直接写入的物品不经过 ItemRepository，写完后重建所有者统计"""
+        started = perf_counter()
+        with self.engine.begin() as conn:
+            for statement in REBUILD_OWNER_STATS:
+                conn.execute(text(statement))
+        logger.info(f"重建所有者物品统计用时 {perf_counter() - started:.1f}s")
+
+    def drop_indexes(self) -> None:
+        with self.engine.begin() as conn:
+            for statement in _index_statements():
+                name = statement.split()[5] if "IF NOT EXISTS" in statement.upper() else statement.split()[2]
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+    def create_indexes(self) -> None:
+        started = perf_counter()
+        with self.engine.begin() as conn:
+            for statement in _index_statements():
+                conn.execute(text(statement))
+        logger.info(f"重建索引用时 {perf_counter() - started:.1f}s")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="生成大规模测试数据")
+    parser.add_argument("--users", type=int, default=10_000, help="新增用户数")
+    parser.add_argument("--items", type=int, default=1_000_000, help="新增物品数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--database-url", type=str, default=None, help="数据库 URL，默认使用 DATABASE_URL")
+    parser.add_argument("--password", type=str, default="password123", help="所有用户的密码")
+    parser.add_argument("--password-hashes", type=int, default=1, help="预先计算的不同哈希数，用户循环使用")
+    parser.add_argument("--hash-workers", type=int, default=4, help="并行计算哈希的线程数")
+    parser.add_argument("--owner-skew", type=float, default=1.1, help="所有者 Zipf 分布指数，0 为均匀分布")
+    parser.add_argument("--start", type=str, default="2023-01-01", help="created_at 起始日期")
+    parser.add_argument("--days", type=float, default=365, help="created_at 分布的天数")
+    parser.add_argument("--batch-size", type=int, default=50_000, help="每次 executemany 的行数")
+    parser.add_argument("--commit-every", type=int, default=1_000_000, help="每个事务的最大行数")
+    parser.add_argument("--keep-indexes", action="store_true", help="写入期间保留二级索引（默认先删除后重建）")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    # 配置在导入时读取环境变量；延迟导入，使 benchmarks.seed 等调用方可以先导入本模块再设置环境变量
+    from config import settings
+
+    args = parse_args(argv)
+    engine = create_engine(sync_database_url(args.database_url or settings.DATABASE_URL))
+    generator = DataGenerator(engine, seed=args.seed, batch_size=args.batch_size, commit_every=args.commit_every)
+    start = datetime.fromisoformat(args.start)
+    span = timedelta(days=args.days)
+
+    started = perf_counter()
+    try:
+        generator.ensure_schema()
+        if not args.keep_indexes:
+            generator.drop_indexes()
+        try:
+            if args.users:
+                hashes = hash_passwords(args.password, max(args.password_hashes, 1), args.hash_workers)
+                generator.generate_users(args.users, hashes, start, span)
+            if args.items:
+                generator.generate_items(args.items, args.owner_skew, start, span)
+        finally:
+            if not args.keep_indexes:
+                generator.create_indexes()
+        if args.items:
+            generator.rebuild_owner_stats()
+    finally:
+        engine.dispose()
+
+    logger.info(f"数据生成完成，总用时 {perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,7 +5,9 @@
 import logging
 from pathlib import Path
 from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncConnection
+
+from app.db.repositories.item_repository import ItemRepository
 
 logger = logging.getLogger(__name__)
 
@@ -38,9 +40,24 @@ async def init_database(engine: AsyncEngine) -> None:
         for sql in sql_statements:
             try:
                 await conn.execute(text(sql))
-                logger.info(f"Executed SQL: {sql[:50]}...")
+                logger.debug(f"Executed SQL: {sql[:50]}...")
             except Exception as e:
                 logger.error(f"Failed to execute SQL: {sql[:50]}... Error: {e}")
                 raise
+        await _backfill_owner_stats(conn)
     
     logger.info("数据库表结构初始化完成")
+
+
+async def _backfill_owner_stats(conn: AsyncConnection) -> None:
+    """
+    升级已有数据库时 owner_item_stats 是新建的空表，而 items 已有数据；
+    增量维护以统计行已存在为前提，因此在这里从 items 重建一次
+    """
+    result = await conn.execute(text(
+        "SELECT EXISTS(SELECT 1 FROM items) AND NOT EXISTS(SELECT 1 FROM owner_item_stats)"
+    ))
+    if not result.scalar_one():
+        return
+    owners = await ItemRepository(conn).rebuild_owner_stats()
+    logger.info(f"owner_item_stats 为空，已从 items 重建 {owners} 个所有者的物品统计")
@@ -0,0 +1,65 @@
+"""
+SQLite 语句中断
+aiosqlite 在独立线程中执行语句，取消等待的协程并不能停止正在执行的语句，连接会一直被占用。
+这里为每个连接注册进度回调：执行语句前把当前请求的截止时间写入连接，回调在 SQLite 线程中
+每执行 PROGRESS_STEPS 条虚拟机指令检查一次，超时后返回非零值让 SQLite 中断语句
+"""
+from time import monotonic
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.utils.deadline import request_deadline
+
+# 进度回调的调用间隔（SQLite 虚拟机指令数）
+PROGRESS_STEPS = 1000
+
+
+class _ConnectionDeadline:
+    """单个连接上正在执行的语句的截止时间"""
+
+    __slots__ = ("deadline",)
+
+    def __init__(self):
+        self.deadline: Optional[float] = None
+
+    def __call__(self) -> int:
+        deadline = self.deadline
+        return 1 if deadline is not None and monotonic() > deadline else 0
+
+
+def _connect(dbapi_connection, connection_record):
+    holder = connection_record.info["deadline"] = _ConnectionDeadline()
+    dbapi_connection.run_async(lambda conn: conn.set_progress_handler(holder, PROGRESS_STEPS))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    holder = conn.info.get("deadline")
+    if holder is not None:
+        holder.deadline = request_deadline.get()
+
+
+def _clear(conn) -> None:
+    holder = conn.info.get("deadline") if conn is not None else None
+    if holder is not None:
+        holder.deadline = None
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _clear(conn)
+
+
+def _handle_error(exception_context):
+    _clear(exception_context.connection)
+
+
+def install_sqlite_interrupt(engine: AsyncEngine) -> None:
+    """为 aiosqlite 引擎注册进度回调，其他数据库由驱动在取消时自行中断语句"""
+    if engine.dialect.driver != "aiosqlite":
+        return
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "connect", _connect)
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
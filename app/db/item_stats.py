@@ -0,0 +1,37 @@
+"""
+重建按所有者汇总的物品统计（owner_item_stats）
+
+正常运行时由 ItemRepository 增量维护；绕过 Repository 写入 items（批量导入、手工修改）后，
+或怀疑统计与 items 不一致时执行。重建在一个事务中完成，期间持有写锁
+
+    python -m app.db.item_stats
+"""
+import asyncio
+import sys
+from time import perf_counter
+
+from loguru import logger
+
+from app.db.repositories.item_repository import ItemRepository
+from app.db.session import close_db, engine
+
+
+async def rebuild() -> int:
+    """重建统计，返回统计行数"""
+    started = perf_counter()
+    async with engine.begin() as conn:
+        owners = await ItemRepository(conn).rebuild_owner_stats()
+    logger.info(f"已重建 {owners} 个所有者的物品统计，用时 {perf_counter() - started:.1f}s")
+    return owners
+
+
+async def _main() -> None:
+    try:
+        await rebuild()
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
+    sys.exit(0)
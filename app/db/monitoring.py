@@ -0,0 +1,90 @@
+"""
+数据库查询监控
+通过 SQLAlchemy before/after_cursor_execute 事件统计每条语句的耗时（按规范化语句分组），
+并把超过阈值的语句交给慢查询日志
+"""
+import re
+from functools import lru_cache
+from time import perf_counter
+from typing import Dict, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db.slow_query import slow_query_log
+from app.utils.metrics import DB_STATEMENT_DURATION, DB_STATEMENT_ERRORS, REGISTRY, CallbackGauge
+from app.utils.timing import request_timings
+from config import settings
+
+# 规范化后不同语句数量上限，超出后归入 "other"，防止标签无限增长
+MAX_DISTINCT_STATEMENTS = 500
+
+_WHITESPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\(\s*(?:\?|%s|:\w+)(?:\s*,\s*(?:\?|%s|:\w+))*\s*\)")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+
+_seen_statements: set = set()
+
+
+@lru_cache(maxsize=2048)
+def normalize_statement(statement: str) -> str:
+    """
+    规范化 SQL 语句：合并空白、折叠 IN 参数列表、替换字面量
+
+    同一模板的语句（如分块数量不同的 IN 查询）会得到相同的结果
+    """
+    normalized = _WHITESPACE.sub(" ", statement).strip()
+    normalized = _IN_LIST.sub("(?...)", normalized)
+    normalized = _STRING_LITERAL.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    if normalized not in _seen_statements:
+        if len(_seen_statements) >= MAX_DISTINCT_STATEMENTS:
+            return "other"
+        _seen_statements.add(normalized)
+    return normalized
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = request_timings.get()
+    if timings is not None:
+        timings.count_query()
+    context._query_start_time = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = perf_counter() - context._query_start_time
+    timings = request_timings.get()
+    if timings is not None:
+        timings.db_time += duration
+    if settings.METRICS_ENABLED:
+        DB_STATEMENT_DURATION.observe(duration, (normalize_statement(statement),))
+    if duration >= slow_query_log.threshold:
+        slow_query_log.record(conn, statement, normalize_statement(statement), parameters, executemany, duration)
+
+
+def _handle_error(exception_context):
+    statement = exception_context.statement
+    if statement:
+        DB_STATEMENT_ERRORS.inc((normalize_statement(statement),))
+
+
+def _pool_stats(engine: AsyncEngine) -> Dict[Tuple[str, ...], float]:
+    pool = engine.sync_engine.pool
+    stats = {}
+    for name in ("size", "checkedout", "overflow", "checkedin"):
+        getter = getattr(pool, name, None)
+        if getter is not None:
+            stats[(name,)] = getter()
+    return stats
+
+
+def install_query_instrumentation(engine: AsyncEngine) -> None:
+    """为引擎注册查询耗时统计、慢查询日志和连接池状态指标"""
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+    REGISTRY.register(CallbackGauge(
+        "db_pool_connections", "连接池状态（size / checkedout / overflow / checkedin）",
+        lambda: _pool_stats(engine), ("state",)))
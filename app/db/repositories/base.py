@@ -0,0 +1,45 @@
+"""
+Repository 基类
+"""
+import asyncio
+import sys
+from typing import Any, Optional
+
+from sqlalchemy.engine import Result
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db.slow_query import statement_origin
+from app.utils.deadline import DeadlineExceeded, remaining_time
+
+
+class BaseRepository:
+    """Repository 基类，语句执行受当前请求截止时间约束"""
+    
+    def __init__(self, conn: AsyncConnection):
+        self.conn = conn
+    
+    async def _execute(self, statement: Any, parameters: Optional[Any] = None) -> Result:
+        """
+        执行语句，请求设置了截止时间时以剩余时间为超时
+        
+        Raises:
+            DeadlineExceeded: 执行前已超时，或语句因超时被取消 / 被 SQLite 中断
+        """
+        timeout = remaining_time()
+        if timeout is None:
+            return await self.conn.execute(statement, parameters)
+        # wait_for 在新任务中执行语句，记录调用方供慢查询日志使用
+        origin = statement_origin.set(sys._getframe(1))
+        try:
+            # asyncio.timeout() 需要 Python 3.11，这里用 wait_for 兼容 3.10
+            return await asyncio.wait_for(self.conn.execute(statement, parameters), timeout)
+        except asyncio.TimeoutError as e:
+            raise DeadlineExceeded("数据库查询超时") from e
+        except OperationalError as e:
+            # SQLite 进度回调中断语句时抛出 "interrupted"
+            if "interrupted" in str(e.orig):
+                raise DeadlineExceeded("数据库查询超时") from e
+            raise
+        finally:
+            statement_origin.reset(origin)
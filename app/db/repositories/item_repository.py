@@ -1,51 +1,137 @@
 """
 物品数据访问层 - 使用原生 SQL
+写物品的方法在同一事务中增量维护 owner_item_stats（按所有者汇总的数量、价格和最近创建时间），
+统计查询只读一行，与物品数量无关
 """
-from typing import Optional
-from sqlalchemy.ext.asyncio import AsyncConnection
-from sqlalchemy import text
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+from sqlalchemy import bindparam, text
+from sqlalchemy.sql.elements import TextClause
 
+from app.db.repositories.base import BaseRepository
 
-class ItemRepository:
+# items 表可查询的列
+ITEM_COLUMNS = ("id", "title", "description", "price", "owner_id", "created_at", "updated_at")
+
+# 单条 IN 查询的最大参数个数（低于 SQLite 旧版本 999 个变量的限制）
+IN_CHUNK_SIZE = 500
+
+_BY_ID = "WHERE id = :item_id"
+_PAGE = "ORDER BY created_at DESC LIMIT :limit OFFSET :skip"
+_BY_OWNER_PAGE = "WHERE owner_id = :owner_id ORDER BY created_at DESC LIMIT :limit OFFSET :skip"
+
+# 新增物品计入所有者统计
+_STATS_ADD = text("""
+    INSERT INTO owner_item_stats (owner_id, item_count, priced_count, total_price, last_created_at)
+    VALUES (:owner_id, 1, :price IS NOT NULL, COALESCE(:price, 0), :created_at)
+    ON CONFLICT (owner_id) DO UPDATE SET
+        item_count = item_count + 1,
+        priced_count = priced_count + excluded.priced_count,
+        total_price = total_price + excluded.total_price,
+        last_created_at = MAX(COALESCE(last_created_at, excluded.last_created_at), excluded.last_created_at),
+        updated_at = CURRENT_TIMESTAMP
+""")
+
+# 修改价格：在更新物品之前执行，读取旧价格和写入统计在同一条语句中完成
+_STATS_REPRICE = text("""
+    UPDATE owner_item_stats SET
+        priced_count = priced_count - (SELECT price IS NOT NULL FROM items WHERE id = :item_id)
+                       + (:price IS NOT NULL),
+        total_price = total_price - (SELECT COALESCE(price, 0) FROM items WHERE id = :item_id)
+                      + COALESCE(:price, 0),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE owner_id = (SELECT owner_id FROM items WHERE id = :item_id)
+""")
+
+# 删除物品后扣减统计；删掉的是最近创建的物品时按 (owner_id, created_at) 索引重新取最大值
+_STATS_REMOVE = text("""
+    UPDATE owner_item_stats SET
+        item_count = item_count - :count,
+        priced_count = priced_count - :priced_count,
+        total_price = total_price - :total_price,
+        last_created_at = CASE
+            WHEN last_created_at <= :max_created_at
+            THEN (SELECT MAX(created_at) FROM items WHERE owner_id = :owner_id)
+            ELSE last_created_at
+        END,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE owner_id = :owner_id
+""")
+
+# 从 items 全量重建所有者统计
+REBUILD_OWNER_STATS = (
+    "DELETE FROM owner_item_stats",
+    """
+    INSERT INTO owner_item_stats (owner_id, item_count, priced_count, total_price, last_created_at)
+    SELECT owner_id, COUNT(*), COUNT(price), COALESCE(SUM(price), 0), MAX(created_at)
+    FROM items
+    GROUP BY owner_id
+    """,
+)
+
+
+@lru_cache(maxsize=256)
+def _select(columns: Tuple[str, ...], clause: str) -> TextClause:
+    """按列集合构建 SELECT 语句并缓存，列名必须来自 ITEM_COLUMNS"""
+    unknown = set(columns) - set(ITEM_COLUMNS)
+    if unknown:
+        raise ValueError(f"未知的物品字段: {', '.join(sorted(unknown))}")
+    return text(f"SELECT {', '.join(columns)} FROM items {clause}")
+
+
+@lru_cache(maxsize=256)
+def _select_in(columns: Tuple[str, ...]) -> TextClause:
+    """按列集合构建 WHERE id IN (...) 语句并缓存"""
+    return _select(columns, "WHERE id IN :ids").bindparams(bindparam("ids", expanding=True))
+
+
+class ItemRepository(BaseRepository):
     """物品仓库 - 使用原生 SQL 查询"""
     
-    def __init__(self, conn: AsyncConnection):
-        self.conn = conn
-    
-    async def get_by_id(self, item_id: int) -> Optional[dict]:
-        """通过 ID 获取物品"""
-        sql = """
-            SELECT id, title, description, price, owner_id, created_at, updated_at
-            FROM items
-            WHERE id = :item_id
-        """
-        result = await self.conn.execute(text(sql), {"item_id": item_id})
+    async def get_by_id(self, item_id: int, columns: Optional[Sequence[str]] = None) -> Optional[dict]:
+        """通过 ID 获取物品，columns 指定时只查询这些列"""
+        stmt = _select(tuple(columns or ITEM_COLUMNS), _BY_ID)
+        result = await self._execute(stmt, {"item_id": item_id})
         row = result.first()
         return dict(row._mapping) if row else None
     
-    async def get_all(self, skip: int = 0, limit: int = 100) -> list[dict]:
-        """获取所有物品（分页）"""
-        sql = """
-            SELECT id, title, description, price, owner_id, created_at, updated_at
-            FROM items
-            ORDER BY created_at DESC
-            LIMIT :limit OFFSET :skip
+    async def get_many(self, item_ids: Sequence[int],
+                       columns: Optional[Sequence[str]] = None) -> dict[int, dict]:
         """
-        result = await self.conn.execute(text(sql), {"skip": skip, "limit": limit})
+        按 ID 批量获取物品，按 IN_CHUNK_SIZE 分块执行 WHERE id IN (...)
+        
+        Returns:
+            {id: 物品} 字典，不存在的 ID 不包含在结果中；columns 未包含 id 时仍会查询 id 用作键
+        """
+        columns = tuple(columns or ITEM_COLUMNS)
+        if "id" not in columns:
+            columns = ("id",) + columns
+        stmt = _select_in(columns)
+        
+        unique_ids = list(dict.fromkeys(item_ids))
+        found: dict[int, dict] = {}
+        for start in range(0, len(unique_ids), IN_CHUNK_SIZE):
+            chunk = unique_ids[start:start + IN_CHUNK_SIZE]
+            result = await self._execute(stmt, {"ids": chunk})
+            for row in result.fetchall():
+                data = dict(row._mapping)
+                found[data["id"]] = data
+        return found
+    
+    async def get_all(self, skip: int = 0, limit: int = 100,
+                      columns: Optional[Sequence[str]] = None) -> list[dict]:
+        """获取所有物品（分页）"""
+        stmt = _select(tuple(columns or ITEM_COLUMNS), _PAGE)
+        result = await self._execute(stmt, {"skip": skip, "limit": limit})
         rows = result.fetchall()
         return [dict(row._mapping) for row in rows]
     
-    async def get_items_by_owner(self, owner_id: int, skip: int = 0, limit: int = 100) -> list[dict]:
+    async def get_items_by_owner(self, owner_id: int, skip: int = 0, limit: int = 100,
+                                 columns: Optional[Sequence[str]] = None) -> list[dict]:
         """获取指定用户的所有物品"""
-        sql = """
-            SELECT id, title, description, price, owner_id, created_at, updated_at
-            FROM items
-            WHERE owner_id = :owner_id
-            ORDER BY created_at DESC
-            LIMIT :limit OFFSET :skip
-        """
-        result = await self.conn.execute(
-            text(sql),
+        stmt = _select(tuple(columns or ITEM_COLUMNS), _BY_OWNER_PAGE)
+        result = await self._execute(
+            stmt,
             {"owner_id": owner_id, "skip": skip, "limit": limit}
         )
         rows = result.fetchall()
@@ -58,7 +144,7 @@ class ItemRepository:
             VALUES (:title, :description, :price, :owner_id)
             RETURNING id, title, description, price, owner_id, created_at, updated_at
         """
-        result = await self.conn.execute(
+        result = await self._execute(
             text(sql),
             {
                 "title": title,
@@ -68,7 +154,13 @@ class ItemRepository:
             }
         )
         row = result.first()
-        return dict(row._mapping) if row else None
+        if row is None:
+            return None
+        item = dict(row._mapping)
+        await self._execute(_STATS_ADD, {
+            "owner_id": owner_id, "price": price, "created_at": item["created_at"],
+        })
+        return item
     
     async def update(self, item_id: int, **kwargs) -> Optional[dict]:
         """更新物品信息"""
@@ -83,32 +175,80 @@ class ItemRepository:
         if not update_fields:
             return await self.get_by_id(item_id)
         
+        if "price" in params:
+            await self._execute(_STATS_REPRICE, {"item_id": item_id, "price": params["price"]})
+        
         sql = f"""
             UPDATE items
             SET {', '.join(update_fields)}, updated_at = CURRENT_TIMESTAMP
             WHERE id = :item_id
             RETURNING id, title, description, price, owner_id, created_at, updated_at
         """
-        result = await self.conn.execute(text(sql), params)
+        result = await self._execute(text(sql), params)
         row = result.first()
         return dict(row._mapping) if row else None
     
     async def delete(self, item_id: int) -> bool:
         """删除物品"""
-        sql = "DELETE FROM items WHERE id = :item_id"
-        result = await self.conn.execute(text(sql), {"item_id": item_id})
-        return result.rowcount > 0
+        sql = "DELETE FROM items WHERE id = :item_id RETURNING owner_id, price, created_at"
+        result = await self._execute(text(sql), {"item_id": item_id})
+        row = result.first()
+        if row is None:
+            return False
+        await self._remove_from_stats(row.owner_id, [row])
+        return True
+    
+    async def delete_by_owner(self, owner_id: int, limit: int) -> int:
+        """删除指定用户的至多 limit 个物品，返回删除数"""
+        sql = """
+            DELETE FROM items
+            WHERE id IN (SELECT id FROM items WHERE owner_id = :owner_id LIMIT :limit)
+            RETURNING price, created_at
+        """
+        result = await self._execute(text(sql), {"owner_id": owner_id, "limit": limit})
+        rows = result.fetchall()
+        if rows:
+            await self._remove_from_stats(owner_id, rows)
+        return len(rows)
+    
+    async def _remove_from_stats(self, owner_id: int, rows: Sequence) -> None:
+        prices = [row.price for row in rows if row.price is not None]
+        await self._execute(_STATS_REMOVE, {
+            "owner_id": owner_id,
+            "count": len(rows),
+            "priced_count": len(prices),
+            "total_price": sum(prices),
+            "max_created_at": max(row.created_at for row in rows),
+        })
+    
+    async def get_owner_stats(self, owner_id: int) -> Optional[dict]:
+        """读取所有者的物品统计（单行查询），没有物品时返回 None"""
+        sql = """
+            SELECT owner_id, item_count, priced_count, total_price, last_created_at
+            FROM owner_item_stats
+            WHERE owner_id = :owner_id
+        """
+        result = await self._execute(text(sql), {"owner_id": owner_id})
+        row = result.first()
+        return dict(row._mapping) if row else None
+    
+    async def rebuild_owner_stats(self) -> int:
+        """从 items 全量重建所有者统计，返回统计行数"""
+        for sql in REBUILD_OWNER_STATS:
+            await self._execute(text(sql))
+        result = await self._execute(text("SELECT COUNT(*) FROM owner_item_stats"))
+        return result.scalar_one()
     
     async def count(self) -> int:
         """获取物品总数"""
         sql = "SELECT COUNT(*) as count FROM items"
-        result = await self.conn.execute(text(sql))
+        result = await self._execute(text(sql))
         row = result.first()
         return row.count if row else 0
     
     async def count_by_owner(self, owner_id: int) -> int:
         """获取指定用户的物品总数"""
         sql = "SELECT COUNT(*) as count FROM items WHERE owner_id = :owner_id"
-        result = await self.conn.execute(text(sql), {"owner_id": owner_id})
+        result = await self._execute(text(sql), {"owner_id": owner_id})
         row = result.first()
         return row.count if row else 0
\ No newline at end of file
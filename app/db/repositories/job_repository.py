@@ -0,0 +1,246 @@
+"""
+后台任务数据访问层 - 使用原生 SQL
+run_at / locked_until / finished_at 保存 Unix 时间戳（秒），便于计算重试退避和租约
+每次领取生成新的 lock_token，执行结果和进度只在 lock_token 仍匹配时写回：
+租约过期、任务已被其他进程重新领取后，原执行者的更新不会生效
+"""
+import json
+from time import time
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import uuid4
+
+from sqlalchemy import bindparam, text
+
+from app.db.repositories.base import BaseRepository
+
+JOB_STATUSES = ("pending", "running", "succeeded", "failed", "cancelled")
+
+_JOB_COLUMNS = (
+    "id, type, payload, progress, status, attempts, max_attempts, run_at, last_error, created_at, finished_at"
+)
+
+# 单条语句完成查找和占用，多个工作进程同时领取时不会拿到同一个任务；
+# 租约过期的 running 任务（进程崩溃或被强制结束）可被重新领取
+_CLAIM = text("""
+    UPDATE jobs
+    SET status = 'running', attempts = attempts + 1, locked_until = :locked_until, lock_token = :lock_token,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = (
+        SELECT id FROM jobs
+        WHERE type = :type
+          AND ((status = 'pending' AND run_at <= :now) OR (status = 'running' AND locked_until < :now))
+        ORDER BY run_at, id
+        LIMIT 1
+    )
+    RETURNING id, type, payload, progress, attempts, max_attempts, lock_token
+""")
+
+# 有可领取任务的类型（只读查询，空闲时轮询不需要写锁）
+_DUE_TYPES = text("""
+    SELECT DISTINCT type FROM jobs
+    WHERE type IN :types
+      AND ((status = 'pending' AND run_at <= :now) OR (status = 'running' AND locked_until < :now))
+""").bindparams(bindparam("types", expanding=True))
+
+# 只更新仍由本次领取持有的任务
+_OWNED = "id = :job_id AND status = 'running' AND lock_token = :lock_token"
+
+
+def _decode(job: dict) -> dict:
+    job["payload"] = json.loads(job["payload"])
+    job["progress"] = json.loads(job["progress"]) if job["progress"] else {}
+    return job
+
+
+class JobRepository(BaseRepository):
+    """后台任务仓库"""
+
+    async def enqueue(self, job_type: str, payload: Optional[Dict[str, Any]] = None,
+                      delay: float = 0, max_attempts: int = 5) -> int:
+        """
+        加入任务，返回任务 ID
+
+        使用调用方的连接，任务与同一事务中的业务修改一起提交或回滚
+        """
+        sql = """
+            INSERT INTO jobs (type, payload, status, max_attempts, run_at)
+            VALUES (:type, :payload, 'pending', :max_attempts, :run_at)
+            RETURNING id
+        """
+        result = await self._execute(text(sql), {
+            "type": job_type,
+            "payload": json.dumps(payload or {}, ensure_ascii=False),
+            "max_attempts": max_attempts,
+            "run_at": time() + delay,
+        })
+        return result.scalar_one()
+
+    async def due_types(self, job_types: Sequence[str]) -> List[str]:
+        """job_types 中有可领取任务的类型"""
+        if not job_types:
+            return []
+        result = await self._execute(_DUE_TYPES, {"types": list(job_types), "now": time()})
+        return [row[0] for row in result.fetchall()]
+
+    async def claim(self, job_type: str, lease: float) -> Optional[dict]:
+        """领取一个到期的任务并加租约，返回的任务带本次领取的 lock_token；没有可领取的任务时返回 None"""
+        now = time()
+        result = await self._execute(_CLAIM, {
+            "type": job_type, "now": now, "locked_until": now + lease, "lock_token": uuid4().hex,
+        })
+        row = result.first()
+        if row is None:
+            return None
+        return _decode(dict(row._mapping))
+
+    async def get_by_id(self, job_id: int) -> Optional[dict]:
+        """通过 ID 获取任务"""
+        result = await self._execute(text(f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = :job_id"), {"job_id": job_id})
+        row = result.first()
+        return _decode(dict(row._mapping)) if row else None
+
+    async def find_active(self, job_type: str, payload_key: str, value: Any) -> Optional[int]:
+        """查找 payload[payload_key] == value 且尚未结束的任务，返回任务 ID"""
+        if not payload_key.isidentifier():
+            raise ValueError(f"无效的 payload 键: {payload_key}")
+        sql = f"""
+            SELECT id FROM jobs
+            WHERE type = :type AND status IN ('pending', 'running')
+              AND json_extract(payload, '$.{payload_key}') = :value
+            ORDER BY id LIMIT 1
+        """
+        result = await self._execute(text(sql), {"type": job_type, "value": value})
+        return result.scalar()
+
+    async def set_progress(self, job_id: int, lock_token: str, progress: Dict[str, Any]) -> bool:
+        """保存任务进度，返回是否仍持有该任务"""
+        sql = f"UPDATE jobs SET progress = :progress, updated_at = CURRENT_TIMESTAMP WHERE {_OWNED}"
+        result = await self._execute(text(sql), {
+            "job_id": job_id, "lock_token": lock_token, "progress": json.dumps(progress, ensure_ascii=False),
+        })
+        return result.rowcount == 1
+
+    async def renew(self, leases: Dict[int, str], lease: float) -> List[int]:
+        """
+        延长正在执行的任务的租约
+
+        Args:
+            leases: {任务 ID: lock_token}
+
+        Returns:
+            已失去租约（被其他进程重新领取或已结束）的任务 ID
+        """
+        sql = text(f"UPDATE jobs SET locked_until = :locked_until WHERE {_OWNED}")
+        lost = []
+        for job_id, lock_token in leases.items():
+            result = await self._execute(sql, {
+                "job_id": job_id, "lock_token": lock_token, "locked_until": time() + lease,
+            })
+            if result.rowcount != 1:
+                lost.append(job_id)
+        return lost
+
+    async def complete(self, job_id: int, lock_token: str) -> bool:
+        """标记任务成功，返回是否生效（租约已被他人接管时不生效）"""
+        sql = f"""
+            UPDATE jobs
+            SET status = 'succeeded', locked_until = NULL, lock_token = NULL, last_error = NULL, finished_at = :now,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE {_OWNED}
+        """
+        result = await self._execute(text(sql), {"job_id": job_id, "lock_token": lock_token, "now": time()})
+        return result.rowcount == 1
+
+    async def retry(self, job_id: int, lock_token: str, delay: float, error: str) -> bool:
+        """任务失败，delay 秒后重试，返回是否生效"""
+        sql = f"""
+            UPDATE jobs
+            SET status = 'pending', locked_until = NULL, lock_token = NULL, run_at = :run_at, last_error = :error,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE {_OWNED}
+        """
+        result = await self._execute(text(sql), {
+            "job_id": job_id, "lock_token": lock_token, "run_at": time() + delay, "error": error,
+        })
+        return result.rowcount == 1
+
+    async def fail(self, job_id: int, lock_token: str, error: str) -> bool:
+        """任务失败且不再重试，返回是否生效"""
+        sql = f"""
+            UPDATE jobs
+            SET status = 'failed', locked_until = NULL, lock_token = NULL, last_error = :error, finished_at = :now,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE {_OWNED}
+        """
+        result = await self._execute(text(sql), {
+            "job_id": job_id, "lock_token": lock_token, "error": error, "now": time(),
+        })
+        return result.rowcount == 1
+
+    async def release(self, job_id: int, lock_token: str) -> bool:
+        """归还未执行完的任务（进程退出时），本次领取不计入重试次数，返回是否生效"""
+        sql = f"""
+            UPDATE jobs
+            SET status = 'pending', locked_until = NULL, lock_token = NULL, attempts = MAX(attempts - 1, 0),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE {_OWNED}
+        """
+        result = await self._execute(text(sql), {"job_id": job_id, "lock_token": lock_token})
+        return result.rowcount == 1
+
+    async def cancel(self, job_id: int) -> bool:
+        """
+        取消尚未结束的任务，返回是否生效
+
+        执行中的任务随之失去租约：之后的 set_progress / complete 不再生效，处理函数的事务回滚
+        """
+        sql = """
+            UPDATE jobs
+            SET status = 'cancelled', locked_until = NULL, lock_token = NULL, finished_at = :now,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = :job_id AND status IN ('pending', 'running')
+        """
+        result = await self._execute(text(sql), {"job_id": job_id, "now": time()})
+        return result.rowcount == 1
+
+    async def purge_finished(self, before: float) -> int:
+        """删除 before 之前已成功或已取消的任务，返回删除数"""
+        sql = "DELETE FROM jobs WHERE status IN ('succeeded', 'cancelled') AND finished_at < :before"
+        result = await self._execute(text(sql), {"before": before})
+        return result.rowcount
+
+    async def get_all(self, status: Optional[str] = None, job_type: Optional[str] = None,
+                      limit: int = 100) -> List[dict]:
+        """按 ID 倒序列出任务"""
+        sql = f"""
+            SELECT {_JOB_COLUMNS} FROM jobs
+            WHERE (:status IS NULL OR status = :status) AND (:type IS NULL OR type = :type)
+            ORDER BY id DESC LIMIT :limit
+        """
+        result = await self._execute(text(sql), {"status": status, "type": job_type, "limit": limit})
+        return [_decode(dict(row._mapping)) for row in result.fetchall()]
+
+    async def stats(self, window: float) -> List[dict]:
+        """
+        按任务类型统计队列深度和最近 window 秒的吞吐
+
+        Returns:
+            [{type, pending, due, running, failed, oldest_due_age, succeeded_recent, failed_recent}]
+        """
+        sql = """
+            SELECT type,
+                   SUM(status = 'pending') AS pending,
+                   SUM(status = 'pending' AND run_at <= :now) AS due,
+                   SUM(status = 'running') AS running,
+                   SUM(status = 'failed') AS failed,
+                   MAX(CASE WHEN status = 'pending' AND run_at <= :now THEN :now - run_at ELSE 0 END)
+                       AS oldest_due_age,
+                   SUM(status = 'succeeded' AND finished_at >= :since) AS succeeded_recent,
+                   SUM(status = 'failed' AND finished_at >= :since) AS failed_recent
+            FROM jobs
+            GROUP BY type
+            ORDER BY type
+        """
+        now = time()
+        result = await self._execute(text(sql), {"now": now, "since": now - window})
+        return [dict(row._mapping) for row in result.fetchall()]
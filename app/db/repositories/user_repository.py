@@ -1,28 +1,71 @@
 """
 用户数据访问层 - 使用原生 SQL
 """
-from typing import Optional
-from sqlalchemy.ext.asyncio import AsyncConnection
-from sqlalchemy import text
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+from sqlalchemy import bindparam, text
+from sqlalchemy.sql.elements import TextClause
 
+from app.db.repositories.base import BaseRepository
 
-class UserRepository:
+# users 表可查询的列
+USER_COLUMNS = ("id", "email", "username", "hashed_password", "is_active", "role", "created_at", "updated_at")
+
+# 单条 IN 查询的最大参数个数（低于 SQLite 旧版本 999 个变量的限制）
+IN_CHUNK_SIZE = 500
+
+_BY_ID = "WHERE id = :user_id"
+_PAGE = "ORDER BY created_at DESC LIMIT :limit OFFSET :skip"
+
+
+@lru_cache(maxsize=256)
+def _select(columns: Tuple[str, ...], clause: str) -> TextClause:
+    """按列集合构建 SELECT 语句并缓存，列名必须来自 USER_COLUMNS"""
+    unknown = set(columns) - set(USER_COLUMNS)
+    if unknown:
+        raise ValueError(f"未知的用户字段: {', '.join(sorted(unknown))}")
+    return text(f"SELECT {', '.join(columns)} FROM users {clause}")
+
+
+@lru_cache(maxsize=256)
+def _select_in(columns: Tuple[str, ...]) -> TextClause:
+    """按列集合构建 WHERE id IN (...) 语句并缓存"""
+    return _select(columns, "WHERE id IN :ids").bindparams(bindparam("ids", expanding=True))
+
+
+class UserRepository(BaseRepository):
     """用户仓库 - 使用原生 SQL 查询"""
     
-    def __init__(self, conn: AsyncConnection):
-        self.conn = conn
-    
-    async def get_by_id(self, user_id: int) -> Optional[dict]:
-        """通过 ID 获取用户"""
-        sql = """
-            SELECT id, email, username, hashed_password, is_active, role, created_at, updated_at
-            FROM users
-            WHERE id = :user_id
-        """
-        result = await self.conn.execute(text(sql), {"user_id": user_id})
+    async def get_by_id(self, user_id: int, columns: Optional[Sequence[str]] = None) -> Optional[dict]:
+        """通过 ID 获取用户，columns 指定时只查询这些列"""
+        stmt = _select(tuple(columns or USER_COLUMNS), _BY_ID)
+        result = await self._execute(stmt, {"user_id": user_id})
         row = result.first()
         return dict(row._mapping) if row else None
     
+    async def get_many(self, user_ids: Sequence[int],
+                       columns: Optional[Sequence[str]] = None) -> dict[int, dict]:
+        """
+        按 ID 批量获取用户，按 IN_CHUNK_SIZE 分块执行 WHERE id IN (...)
+        
+        Returns:
+            {id: 用户} 字典，不存在的 ID 不包含在结果中；columns 未包含 id 时仍会查询 id 用作键
+        """
+        columns = tuple(columns or USER_COLUMNS)
+        if "id" not in columns:
+            columns = ("id",) + columns
+        stmt = _select_in(columns)
+        
+        unique_ids = list(dict.fromkeys(user_ids))
+        found: dict[int, dict] = {}
+        for start in range(0, len(unique_ids), IN_CHUNK_SIZE):
+            chunk = unique_ids[start:start + IN_CHUNK_SIZE]
+            result = await self._execute(stmt, {"ids": chunk})
+            for row in result.fetchall():
+                data = dict(row._mapping)
+                found[data["id"]] = data
+        return found
+    
     async def get_by_email(self, email: str) -> Optional[dict]:
         """通过邮箱获取用户"""
         sql = """
@@ -30,7 +73,7 @@ class UserRepository:
             FROM users
             WHERE email = :email
         """
-        result = await self.conn.execute(text(sql), {"email": email})
+        result = await self._execute(text(sql), {"email": email})
         row = result.first()
         return dict(row._mapping) if row else None
     
@@ -41,19 +84,15 @@ class UserRepository:
             FROM users
             WHERE username = :username
         """
-        result = await self.conn.execute(text(sql), {"username": username})
+        result = await self._execute(text(sql), {"username": username})
         row = result.first()
         return dict(row._mapping) if row else None
     
-    async def get_all(self, skip: int = 0, limit: int = 100) -> list[dict]:
+    async def get_all(self, skip: int = 0, limit: int = 100,
+                      columns: Optional[Sequence[str]] = None) -> list[dict]:
         """获取所有用户（分页）"""
-        sql = """
-            SELECT id, email, username, hashed_password, is_active, role, created_at, updated_at
-            FROM users
-            ORDER BY created_at DESC
-            LIMIT :limit OFFSET :skip
-        """
-        result = await self.conn.execute(text(sql), {"skip": skip, "limit": limit})
+        stmt = _select(tuple(columns or USER_COLUMNS), _PAGE)
+        result = await self._execute(stmt, {"skip": skip, "limit": limit})
         rows = result.fetchall()
         return [dict(row._mapping) for row in rows]
     
@@ -65,7 +104,7 @@ class UserRepository:
             VALUES (:email, :username, :hashed_password, :role, 1)
             RETURNING id, email, username, hashed_password, is_active, role, created_at, updated_at
         """
-        result = await self.conn.execute(
+        result = await self._execute(
             text(sql),
             {
                 "email": email,
@@ -97,19 +136,19 @@ class UserRepository:
             WHERE id = :user_id
             RETURNING id, email, username, hashed_password, is_active, role, created_at, updated_at
         """
-        result = await self.conn.execute(text(sql), params)
+        result = await self._execute(text(sql), params)
         row = result.first()
         return dict(row._mapping) if row else None
     
     async def delete(self, user_id: int) -> bool:
         """删除用户"""
         sql = "DELETE FROM users WHERE id = :user_id"
-        result = await self.conn.execute(text(sql), {"user_id": user_id})
+        result = await self._execute(text(sql), {"user_id": user_id})
         return result.rowcount > 0
     
     async def count(self) -> int:
         """获取用户总数"""
         sql = "SELECT COUNT(*) as count FROM users"
-        result = await self.conn.execute(text(sql))
+        result = await self._execute(text(sql))
         row = result.first()
         return row.count if row else 0
\ No newline at end of file
@@ -27,3 +27,36 @@ CREATE TABLE IF NOT EXISTS items (
 
 CREATE INDEX IF NOT EXISTS idx_items_owner_id ON items(owner_id);
 CREATE INDEX IF NOT EXISTS idx_items_title ON items(title);
+CREATE INDEX IF NOT EXISTS idx_items_owner_created_at ON items(owner_id, created_at);
+
+-- 按所有者汇总的物品统计（由 ItemRepository 在写物品的事务中增量维护，可用 python -m app.db.item_stats 重建）
+CREATE TABLE IF NOT EXISTS owner_item_stats (
+    owner_id INTEGER PRIMARY KEY,
+    item_count INTEGER DEFAULT 0 NOT NULL,
+    priced_count INTEGER DEFAULT 0 NOT NULL,
+    total_price REAL DEFAULT 0 NOT NULL,
+    last_created_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    FOREIGN KEY (owner_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- 后台任务表（run_at / locked_until / finished_at 为 Unix 时间戳，lock_token 标识当前领取）
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    type VARCHAR(100) NOT NULL,
+    payload TEXT DEFAULT '{}' NOT NULL,
+    progress TEXT,
+    status VARCHAR(20) DEFAULT 'pending' NOT NULL,
+    attempts INTEGER DEFAULT 0 NOT NULL,
+    max_attempts INTEGER DEFAULT 5 NOT NULL,
+    run_at REAL NOT NULL,
+    locked_until REAL,
+    lock_token VARCHAR(32),
+    last_error TEXT,
+    finished_at REAL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_type_status_run_at ON jobs(type, status, run_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_finished_at ON jobs(status, finished_at);
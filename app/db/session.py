@@ -3,10 +3,15 @@
 支持原生 SQL 查询，不使用 ORM
 """
 import logging
+from time import perf_counter
 from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
-from sqlalchemy import MetaData, text
+from sqlalchemy import MetaData, event, text
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
+from app.db.interrupt import install_sqlite_interrupt
+from app.db.monitoring import install_query_instrumentation
+from app.utils.metrics import DB_POOL_CHECKOUT_WAIT
 from config import settings
 
 # 获取数据库URL
@@ -16,14 +21,44 @@ db_url = settings.DATABASE_URL
 if db_url.startswith("sqlite"):
     db_url = db_url.replace("sqlite", "sqlite+aiosqlite", 1)
 
+# 连接池配置：aiosqlite 文件数据库默认使用 NullPool（每次请求新建连接），这里改为队列连接池；
+# 内存数据库保持 SQLAlchemy 默认的单连接池
+pool_options = {}
+if ":memory:" not in db_url and "mode=memory" not in db_url:
+    pool_options = {
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+    }
+    if db_url.startswith("sqlite"):
+        pool_options["poolclass"] = AsyncAdaptedQueuePool
+
 # 创建异步引擎
 engine: AsyncEngine = create_async_engine(
     db_url,
     echo=settings.DATABASE_ECHO,
     future=True,
     pool_pre_ping=True,  # 连接池预检
+    **pool_options,
 )
 
+
+def _enable_foreign_keys(dbapi_connection, connection_record):
+    """SQLite 默认不检查外键，每个新连接上开启"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine.sync_engine, "connect", _enable_foreign_keys)
+
+# 注册查询耗时统计和慢查询日志
+install_query_instrumentation(engine)
+
+# 请求超过截止时间时在 SQLite 引擎内中断正在执行的语句
+install_sqlite_interrupt(engine)
+
 # 创建 MetaData 对象用于表定义
 metadata = MetaData()
 
@@ -33,7 +68,9 @@ async def get_db() -> AsyncGenerator[AsyncConnection, None]:
     获取数据库连接的依赖函数
     返回 AsyncConnection 而非 AsyncSession，用于执行原生 SQL
     """
+    start = perf_counter()
     async with engine.begin() as conn:
+        DB_POOL_CHECKOUT_WAIT.observe(perf_counter() - start)
         yield conn
 
 
@@ -0,0 +1,156 @@
+"""
+慢查询日志
+超过阈值的语句记录规范化 SQL、参数类型、耗时、调用的 Repository 方法以及执行计划，
+按语句限频后写入日志并保存在环形缓冲区中，供管理接口查看
+"""
+import os
+import sys
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from time import monotonic
+from types import FrameType
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from config import settings
+
+try:
+    import greenlet
+except ImportError:  # pragma: no cover - SQLAlchemy 异步模式必需
+    greenlet = None
+
+_REPOSITORY_DIR = f"{os.sep}repositories{os.sep}"
+
+# 可以获取执行计划的语句类型
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+# 语句在单独的任务中执行时（wait_for），任务内的调用栈不包含调用方，由 BaseRepository 记录调用 _execute 的栈帧
+statement_origin: ContextVar[Optional[FrameType]] = ContextVar("statement_origin", default=None)
+
+
+def parameter_shapes(parameters: Any, executemany: bool = False) -> str:
+    """描述绑定参数的类型结构（不包含参数值）"""
+    if executemany:
+        batch = list(parameters) if parameters else []
+        first = parameter_shapes(batch[0]) if batch else "()"
+        return f"{len(batch)} x {first}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+def _iter_frames():
+    """依次遍历当前调用栈、SQLAlchemy greenlet 之外的协程调用栈，最后是 statement_origin 记录的栈帧"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+    if greenlet is not None:
+        parent = greenlet.getcurrent().parent
+        frame = parent.gr_frame if parent is not None else None
+        while frame is not None:
+            yield frame
+            frame = frame.f_back
+    # 挂起的协程栈帧没有 f_back，只能取到这一层
+    origin = statement_origin.get()
+    if origin is not None:
+        yield origin
+
+
+def calling_repository_method() -> Optional[str]:
+    """查找发起查询的 Repository 方法，如 ItemRepository.get_all（跳过基类的 _execute）"""
+    for frame in _iter_frames():
+        if _REPOSITORY_DIR in frame.f_code.co_filename and frame.f_code.co_name != "_execute":
+            owner = frame.f_locals.get("self")
+            if owner is not None:
+                return f"{type(owner).__name__}.{frame.f_code.co_name}"
+            return frame.f_code.co_name
+    return None
+
+
+def explain(conn, statement: str, parameters: Any) -> List[str]:
+    """在当前连接上获取语句的执行计划（不会真正执行语句）"""
+    if not statement.lstrip().upper().startswith(_EXPLAINABLE):
+        return []
+
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    if conn.dialect.name == "sqlite":
+        # (id, parent, notused, detail)
+        return [str(row[-1]) for row in rows]
+    return [" | ".join(str(value) for value in row) for row in rows]
+
+
+class SlowQueryLog:
+    """
+    慢查询记录器
+
+    Args:
+        threshold_ms: 慢查询阈值（毫秒），小于等于 0 时关闭
+        interval_seconds: 同一规范化语句两次记录之间的最小间隔
+        buffer_size: 环形缓冲区大小
+        capture_plan: 是否获取执行计划
+    """
+
+    def __init__(self, threshold_ms: float, interval_seconds: float, buffer_size: int, capture_plan: bool):
+        self.threshold = threshold_ms / 1000 if threshold_ms > 0 else float("inf")
+        self.interval = interval_seconds
+        self.capture_plan = capture_plan
+        self.events: deque = deque(maxlen=buffer_size)
+        self._last_logged: Dict[str, float] = {}
+        self._suppressed: Dict[str, int] = {}
+
+    def record(self, conn, statement: str, normalized: str, parameters: Any,
+               executemany: bool, duration: float) -> None:
+        """记录一次慢查询，同一语句在间隔内只记录一次，其余计入 suppressed"""
+        now = monotonic()
+        last = self._last_logged.get(normalized)
+        if last is not None and now - last < self.interval:
+            self._suppressed[normalized] = self._suppressed.get(normalized, 0) + 1
+            return
+        self._last_logged[normalized] = now
+
+        plan: List[str] = []
+        if self.capture_plan and not executemany:
+            try:
+                plan = explain(conn, statement, parameters)
+            except Exception as e:
+                plan = [f"执行计划获取失败: {e}"]
+
+        event = {
+            "timestamp": datetime.now(timezone.utc),
+            "statement": normalized,
+            "parameters": parameter_shapes(parameters, executemany),
+            "duration_ms": round(duration * 1000, 3),
+            "caller": calling_repository_method(),
+            "plan": plan,
+            "suppressed": self._suppressed.pop(normalized, 0),
+        }
+        self.events.append(event)
+        logger.warning(
+            "Slow query {duration_ms}ms in {caller}: {statement} params={parameters} plan={plan}",
+            **event,
+        )
+
+    def clear(self) -> None:
+        self.events.clear()
+        self._last_logged.clear()
+        self._suppressed.clear()
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    interval_seconds=settings.SLOW_QUERY_LOG_INTERVAL_SECONDS,
+    buffer_size=settings.SLOW_QUERY_BUFFER_SIZE,
+    capture_plan=settings.SLOW_QUERY_EXPLAIN,
+)
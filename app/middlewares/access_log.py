@@ -0,0 +1,87 @@
+"""
+访问日志与请求 ID 中间件（纯 ASGI 实现）
+为每个请求分配或沿用请求 ID 并绑定到 loguru 上下文，响应结束时输出一条访问日志
+"""
+import random
+import uuid
+from time import perf_counter
+
+from loguru import logger
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.middlewares.routing import route_template
+
+# 客户端传入的请求 ID 最大长度，超出或包含非法字符时重新生成
+_MAX_REQUEST_ID_LENGTH = 128
+
+
+def _valid_request_id(value: bytes) -> bool:
+    return 0 < len(value) <= _MAX_REQUEST_ID_LENGTH and all(0x21 <= byte <= 0x7E for byte in value)
+
+
+class AccessLogMiddleware:
+    """
+    访问日志中间件
+
+    Args:
+        header: 请求 ID 请求/响应头
+        sample_rate: 成功请求的采样比例，错误（状态码 >= 400）和慢请求始终记录
+        slow_ms: 慢请求阈值（毫秒）
+    """
+
+    def __init__(self, app: ASGIApp, header: str = "X-Request-ID", sample_rate: float = 1.0,
+                 slow_ms: float = 1000):
+        self.app = app
+        self.header = header.lower().encode("latin-1")
+        self.sample_rate = sample_rate
+        self.slow = slow_ms / 1000
+
+    def _request_id(self, scope: Scope) -> str:
+        for name, value in scope["headers"]:
+            if name == self.header:
+                if _valid_request_id(value):
+                    return value.decode("latin-1")
+                break
+        return uuid.uuid4().hex
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = self._request_id(scope)
+        scope.setdefault("state", {})["request_id"] = request_id
+        status_code = 500
+        sent_bytes = 0
+        header = (self.header, request_id.encode("latin-1"))
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, sent_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", ()), header]
+            elif message["type"] == "http.response.body":
+                sent_bytes += len(message.get("body", b""))
+            await send(message)
+
+        start = perf_counter()
+        with logger.contextualize(request_id=request_id):
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                duration = perf_counter() - start
+                self._log(scope, status_code, sent_bytes, duration)
+
+    def _log(self, scope: Scope, status_code: int, sent_bytes: int, duration: float) -> None:
+        slow = duration >= self.slow
+        if status_code < 400 and not slow and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+
+        method = scope["method"]
+        route = route_template(scope)
+        duration_ms = round(duration * 1000, 2)
+        level = "WARNING" if slow or status_code >= 500 else "INFO"
+        logger.bind(
+            access=True, method=method, route=route, path=scope["path"],
+            status=status_code, bytes=sent_bytes, duration_ms=duration_ms,
+        ).log(level, f"{method} {route} {status_code} {sent_bytes}B {duration_ms}ms")
@@ -0,0 +1,234 @@
+"""
+准入控制中间件（纯 ASGI 实现）
+按路由分组限制并发数，超出的请求在有界队列中短暂等待，队列已满或等待超时时立即返回 503 + Retry-After，
+避免请求在连接池、bcrypt 线程池前无限排队拖慢所有请求。健康检查和指标端点不受限制，登录使用独立的并发额度
+"""
+import asyncio
+import json
+from collections import deque
+from time import monotonic
+from typing import Deque, Dict, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.schemas.response import error_response
+from app.utils.metrics import REGISTRY, CallbackGauge, Counter
+
+# 分组顺序即优先判断顺序
+GROUPS = ("login", "admin", "write", "read")
+
+# 不经过准入控制的路径（探针、健康检查、指标）
+_EXEMPT_PATHS = frozenset(("/", "/livez", "/readyz", "/api/health", "/metrics"))
+_READ_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+ADMISSION_REJECTED = REGISTRY.register(Counter(
+    "admission_rejected_total", "被准入控制拒绝的请求数", ("group", "reason")))
+
+
+def parse_limits(spec: str) -> Dict[str, int]:
+    """
+    解析分组并发上限，如 "read=64,write=16,login=8,admin=4"
+
+    Returns:
+        {分组名: 并发上限}，未配置的分组不限制
+    """
+    limits: Dict[str, int] = {}
+    for part in spec.split(","):
+        name, _, limit = part.strip().partition("=")
+        name = name.strip()
+        if name and limit:
+            if name not in GROUPS:
+                raise ValueError(f"未知的准入分组: {name}")
+            limits[name] = max(int(limit), 1)
+    return limits
+
+
+def request_group(scope: Scope) -> Optional[str]:
+    """请求所属分组，None 表示不受限制"""
+    path = scope["path"]
+    if path in _EXEMPT_PATHS:
+        return None
+    if path.startswith("/api/auth/"):
+        return "login"
+    if path.startswith("/api/admin"):
+        return "admin"
+    if scope["method"] not in _READ_METHODS:
+        return "write"
+    return "read"
+
+
+class ConcurrencyLimiter:
+    """
+    带有界等待队列的并发限制器
+
+    启用 adaptive 时按 AIMD 调整并发上限：请求耗时低于 target_latency 时上限每轮增加约 1，
+    耗时超出或返回 5xx 时乘以 0.9（每个 target_latency 窗口最多下调一次），上限保持在 [min_limit, max_limit]
+
+    Args:
+        max_limit: 并发上限（自适应时为上限的上界）
+        max_queue: 最多等待的请求数
+        queue_timeout: 最长等待时间（秒）
+    """
+
+    def __init__(self, max_limit: int, max_queue: int, queue_timeout: float, adaptive: bool = False,
+                 target_latency: float = 0.2, min_limit: int = 1):
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.limit = float(max_limit)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.adaptive = adaptive
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> Optional[str]:
+        """
+        获取并发额度
+
+        Returns:
+            None 表示获取成功，否则为拒绝原因（queue_full / timeout）
+        """
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return None
+        if len(self._waiters) >= self.max_queue:
+            return "queue_full"
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+            return None
+        except asyncio.TimeoutError:
+            # 超时与被唤醒同时发生时额度已经转交给本请求
+            if future.done() and not future.cancelled():
+                return None
+            return "timeout"
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+        finally:
+            if not future.done() or future.cancelled():
+                try:
+                    self._waiters.remove(future)
+                except ValueError:
+                    pass
+
+    def release(self, latency: float, failed: bool) -> None:
+        """归还额度，并按本次请求的耗时和结果调整上限"""
+        if self.adaptive:
+            if failed or latency > self.target_latency:
+                now = monotonic()
+                if now - self._last_decrease >= self.target_latency:
+                    self._last_decrease = now
+                    self.limit = max(self.limit * 0.9, float(self.min_limit))
+            else:
+                self.limit = min(self.limit + 1 / max(self.limit, 1.0), float(self.max_limit))
+        self._release()
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        # 额度直接转交给排队的请求，避免被新到达的请求插队
+        while self._waiters and self.in_flight < int(self.limit):
+            future = self._waiters.popleft()
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+
+class AdmissionControlMiddleware:
+    """
+    准入控制中间件
+
+    Args:
+        limits: {分组名: 并发上限}，未配置的分组不限制
+        max_queue: 每个分组最多等待的请求数
+        queue_timeout_ms: 最长等待时间（毫秒）
+        retry_after: 拒绝时 Retry-After 响应头的秒数
+        adaptive: 按请求耗时自动调整并发上限（AIMD）
+        target_latency_ms: 自适应调整的目标耗时（毫秒）
+        min_limit: 自适应调整时的最小并发上限
+    """
+
+    def __init__(self, app: ASGIApp, limits: Dict[str, int], max_queue: int = 64,
+                 queue_timeout_ms: float = 500, retry_after: int = 1, adaptive: bool = False,
+                 target_latency_ms: float = 200, min_limit: int = 2):
+        self.app = app
+        self.limiters = {
+            group: ConcurrencyLimiter(
+                limit, max_queue, queue_timeout_ms / 1000, adaptive=adaptive,
+                target_latency=target_latency_ms / 1000, min_limit=min_limit,
+            )
+            for group, limit in limits.items()
+        }
+        self.retry_after = str(retry_after).encode("latin-1")
+        self._rejection = json.dumps(
+            error_response(message="服务繁忙，请稍后重试", code=503), ensure_ascii=False,
+        ).encode("utf-8")
+        _limiters.update(self.limiters)
+
+    async def _reject(self, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(self._rejection)).encode("latin-1")),
+                (b"retry-after", self.retry_after),
+            ],
+        })
+        await send({"type": "http.response.body", "body": self._rejection})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        group = request_group(scope)
+        limiter = self.limiters.get(group) if group else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        reason = await limiter.acquire()
+        if reason is not None:
+            ADMISSION_REJECTED.inc((group, reason))
+            await self._reject(send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = monotonic()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            limiter.release(monotonic() - start, status_code >= 500)
+
+
+# 当前生效的限制器，供指标读取
+_limiters: Dict[str, ConcurrencyLimiter] = {}
+
+
+def _limiter_values(attribute: str) -> Dict[Tuple[str, ...], float]:
+    return {(group,): getattr(limiter, attribute) for group, limiter in _limiters.items()}
+
+
+REGISTRY.register(CallbackGauge(
+    "admission_limit", "各分组当前并发上限", lambda: _limiter_values("limit"), ("group",)))
+REGISTRY.register(CallbackGauge(
+    "admission_in_flight", "各分组正在处理的请求数", lambda: _limiter_values("in_flight"), ("group",)))
+REGISTRY.register(CallbackGauge(
+    "admission_queued", "各分组排队等待的请求数", lambda: _limiter_values("queued"), ("group",)))
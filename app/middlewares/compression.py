@@ -0,0 +1,360 @@
+"""
+响应压缩中间件
+根据 Accept-Encoding 协商 zstd / br / gzip（按已安装的编码器），纯 ASGI 实现以支持流式响应
+"""
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import REGISTRY, CallbackGauge
+from config import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - 可选依赖
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - 可选依赖
+    zstandard = None
+
+
+# 可压缩的响应类型
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+class GzipCodec:
+    """gzip 编码器（标准库，始终可用）"""
+
+    name = "gzip"
+
+    def __init__(self, level: int):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+
+    def stream(self) -> "_ZlibStream":
+        return _ZlibStream(zlib.compressobj(self.level, zlib.DEFLATED, 31))
+
+
+class _ZlibStream:
+    def __init__(self, compressor):
+        self._compressor = compressor
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliCodec:
+    """brotli 编码器（需要安装 brotli）"""
+
+    name = "br"
+
+    def __init__(self, quality: int):
+        self.quality = quality
+
+    def compress(self, data: bytes) -> bytes:
+        return brotli.compress(data, quality=self.quality)
+
+    def stream(self) -> "_BrotliStream":
+        return _BrotliStream(brotli.Compressor(quality=self.quality))
+
+
+class _BrotliStream:
+    def __init__(self, compressor):
+        self._compressor = compressor
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.process(chunk) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdCodec:
+    """zstd 编码器（需要安装 zstandard）"""
+
+    name = "zstd"
+
+    def __init__(self, level: int):
+        self.level = level
+
+    # ZstdCompressor 不能被多个线程或多个流同时使用，每次压缩新建一个（创建开销远小于压缩本身）
+    def compress(self, data: bytes) -> bytes:
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def stream(self) -> "_ZstdStream":
+        return _ZstdStream(zstandard.ZstdCompressor(level=self.level).compressobj())
+
+
+class _ZstdStream:
+    def __init__(self, compressor):
+        self._compressor = compressor
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.compress(chunk) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def available_codecs() -> Dict[str, object]:
+    """按服务端偏好顺序返回当前环境可用的编码器"""
+    codecs: Dict[str, object] = {}
+    if zstandard is not None:
+        codecs["zstd"] = ZstdCodec(settings.COMPRESSION_ZSTD_LEVEL)
+    if brotli is not None:
+        codecs["br"] = BrotliCodec(settings.COMPRESSION_BROTLI_QUALITY)
+    codecs["gzip"] = GzipCodec(settings.COMPRESSION_GZIP_LEVEL)
+    return codecs
+
+
+@lru_cache(maxsize=256)
+def select_encoding(accept_encoding: str, supported: Tuple[str, ...]) -> Optional[str]:
+    """
+    解析 Accept-Encoding 并选出编码
+
+    Args:
+        accept_encoding: 请求头原始值
+        supported: 服务端支持的编码（按偏好排序）
+
+    Returns:
+        选中的编码名称，无可用编码时返回 None
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip()] = q
+
+    wildcard = weights.get("*")
+    best, best_q = None, 0.0
+    for coding in supported:
+        q = weights.get(coding, wildcard if wildcard is not None else 0.0)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressionCache:
+    """
+    压缩结果缓存（LRU，按总字节数限制）
+    以编码 + 响应的强 ETag 为键，不对响应体做摘要；
+    同一响应体重复输出时（如来自缓存）直接复用压缩后的字节
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+
+    def get(self, key: Tuple[str, str]) -> Optional[bytes]:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Tuple[str, str], value: bytes) -> None:
+        if self.max_bytes <= 0 or len(value) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self._entries[key] = value
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+
+# 进程内共享的压缩缓存
+compression_cache = CompressionCache(settings.COMPRESSION_CACHE_MAX_BYTES)
+
+REGISTRY.register(CallbackGauge(
+    "compression_cache_requests_total", "压缩缓存查询次数",
+    lambda: {("hit",): compression_cache.hits, ("miss",): compression_cache.misses},
+    ("result",), metric_type="counter"))
+REGISTRY.register(CallbackGauge(
+    "compression_cache_bytes", "压缩缓存占用字节数", lambda: {(): compression_cache.size}))
+
+
+def _cache_key(scope: Scope, headers: Headers) -> Optional[str]:
+    """
+    响应的压缩缓存键：强 ETag 加上请求路径（避免不同资源的 ETag 相同）
+    弱 ETag 只表示语义等价，不保证字节相同，不参与缓存
+    """
+    etag = headers.get("etag")
+    if etag is None or etag.startswith("W/"):
+        return None
+    query = scope.get("query_string", b"").decode("latin-1")
+    return f"{scope['path']}?{query}:{etag}"
+
+
+def _weaken_etag(headers: MutableHeaders) -> None:
+    """
+    压缩后的字节与原响应不同，强 ETag 改为弱 ETag（与 nginx 相同）；
+    If-None-Match 按弱比较，客户端带回的 W/"..." 仍能与原 ETag 匹配
+    """
+    etag = headers.get("etag")
+    if etag is not None and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+
+def _is_compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "")
+    return content_type.startswith(COMPRESSIBLE_TYPES) or "+json" in content_type
+
+
+class CompressionMiddleware:
+    """
+    响应压缩中间件
+
+    - 小于 minimum_size 的完整响应体不压缩
+    - 流式响应（more_body=True）逐块增量压缩
+    - 大于 threadpool_min_size 的响应体在线程池中压缩，避免阻塞事件循环
+    - 带强 ETag 的完整响应体复用缓存中的压缩结果
+    - 可压缩类型的响应即使未压缩也带 Vary: Accept-Encoding，避免共享缓存返回错误的编码
+    - 压缩后的响应强 ETag 改为弱 ETag
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        threadpool_min_size: int = 64 * 1024,
+        cache: Optional[CompressionCache] = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.threadpool_min_size = threadpool_min_size
+        self.cache = cache if cache is not None else compression_cache
+        self.codecs = available_codecs()
+        self.supported = tuple(self.codecs)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("accept-encoding")
+        encoding = select_encoding(accept_encoding, self.supported) if accept_encoding else None
+        codec = self.codecs[encoding] if encoding is not None else None
+        responder = _CompressionResponder(self, codec, scope, send)
+        await self.app(scope, receive, responder.send)
+
+    async def compress(self, codec, body: bytes, cache_key: Optional[str] = None) -> bytes:
+        """整体压缩响应体，有缓存键时优先命中缓存"""
+        if cache_key is not None:
+            compressed = self.cache.get((codec.name, cache_key))
+            if compressed is not None:
+                return compressed
+        if len(body) >= self.threadpool_min_size:
+            compressed = await run_in_threadpool(codec.compress, body)
+        else:
+            compressed = codec.compress(body)
+        if cache_key is not None:
+            self.cache.put((codec.name, cache_key), compressed)
+        return compressed
+
+
+class _CompressionResponder:
+    """单个请求的响应改写器"""
+
+    def __init__(self, middleware: CompressionMiddleware, codec, scope: Scope, send: Send):
+        self.middleware = middleware
+        self.codec = codec
+        self.scope = scope
+        self._send = send
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+        self.stream = None
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.start_message = message
+            return
+        if message_type != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.stream is not None:
+            await self._send_stream_chunk(body, more_body)
+            return
+
+        start = self.start_message
+        mutable = MutableHeaders(raw=start["headers"])
+        if start["status"] in (204, 304) or not _is_compressible(mutable):
+            await self._passthrough(message)
+            return
+
+        mutable.add_vary_header("Accept-Encoding")
+        if self.codec is None or (not more_body and len(body) < self.middleware.minimum_size):
+            await self._passthrough(message)
+            return
+
+        if not more_body:
+            cache_key = _cache_key(self.scope, mutable) if start["status"] == 200 else None
+            compressed = await self.middleware.compress(self.codec, body, cache_key)
+            mutable["Content-Encoding"] = self.codec.name
+            mutable["Content-Length"] = str(len(compressed))
+            _weaken_etag(mutable)
+            await self._send(start)
+            await self._send({"type": "http.response.body", "body": compressed})
+            return
+
+        # 流式响应：去掉 Content-Length，逐块压缩输出
+        mutable["Content-Encoding"] = self.codec.name
+        del mutable["Content-Length"]
+        _weaken_etag(mutable)
+        await self._send(start)
+        self.stream = self.codec.stream()
+        await self._send_stream_chunk(body, more_body)
+
+    async def _passthrough(self, message: Message) -> None:
+        self.passthrough = True
+        await self._send(self.start_message)
+        await self._send(message)
+
+    async def _send_stream_chunk(self, body: bytes, more_body: bool) -> None:
+        if len(body) >= self.middleware.threadpool_min_size:
+            chunk = await run_in_threadpool(self.stream.compress, body)
+        else:
+            chunk = self.stream.compress(body) if body else b""
+        if not more_body:
+            chunk += self.stream.finish()
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
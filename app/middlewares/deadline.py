@@ -0,0 +1,68 @@
+"""
+请求截止时间中间件（纯 ASGI 实现）
+按路由设置截止时间并写入 contextvar，之后的数据库语句以剩余时间为超时
+"""
+from time import monotonic
+from typing import Dict, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.middlewares.routing import route_template
+from app.utils.deadline import request_deadline
+
+
+def parse_deadlines(spec: str) -> Dict[Tuple[str, str], float]:
+    """
+    解析按路由的截止时间，如 "GET /api/items=2000,/api/admin/slow-queries=10000"
+
+    Returns:
+        {(方法, 路由模板): 毫秒}，方法省略时为 *
+    """
+    deadlines: Dict[Tuple[str, str], float] = {}
+    for part in spec.split(","):
+        target, _, milliseconds = part.strip().partition("=")
+        if not target or not milliseconds:
+            continue
+        method, _, route = target.strip().rpartition(" ")
+        deadlines[((method.strip() or "*").upper(), route.strip())] = float(milliseconds)
+    return deadlines
+
+
+class DeadlineMiddleware:
+    """
+    请求截止时间中间件
+
+    Args:
+        default_ms: 默认截止时间（毫秒），0 表示不设置
+        routes: 按路由覆盖的截止时间，0 表示该路由不设置
+    """
+
+    def __init__(self, app: ASGIApp, default_ms: float = 0, routes: Dict[Tuple[str, str], float] = None):
+        self.app = app
+        self.default = default_ms / 1000
+        self.routes = {key: value / 1000 for key, value in (routes or {}).items()}
+
+    def _timeout(self, scope: Scope) -> float:
+        if not self.routes:
+            return self.default
+        route = route_template(scope)
+        timeout = self.routes.get((scope["method"], route))
+        if timeout is None:
+            timeout = self.routes.get(("*", route), self.default)
+        return timeout
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timeout = self._timeout(scope)
+        if timeout <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        token = request_deadline.set(monotonic() + timeout)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_deadline.reset(token)
@@ -0,0 +1,86 @@
+"""
+ETag 与条件请求中间件（纯 ASGI 实现）
+为指定路由的 GET 响应按响应体摘要生成强 ETag，请求带匹配的 If-None-Match 时返回 304；
+位于压缩中间件之内，压缩中间件以该 ETag 为键复用压缩结果
+"""
+from hashlib import blake2b
+from typing import Iterable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.middlewares.routing import route_template
+
+
+def parse_routes(spec: str) -> frozenset:
+    """解析逗号分隔的路由模板，如 "/api/items,/api/items/{item_id}" """
+    return frozenset(route.strip() for route in spec.split(",") if route.strip())
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match 使用弱比较：忽略 W/ 前缀，* 匹配任意 ETag"""
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ETagMiddleware:
+    """
+    ETag 中间件
+
+    - 只处理指定路由的 GET 请求、状态码 200 且一次性发送的响应体，流式响应原样透传
+    - 路由已设置 ETag 时不覆盖
+    """
+
+    def __init__(self, app: ASGIApp, routes: Iterable[str]):
+        self.app = app
+        self.routes = frozenset(routes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET" or route_template(scope) not in self.routes:
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                if message["status"] == 200:
+                    start_message = message
+                else:
+                    passthrough = True
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            passthrough = True
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            if message.get("more_body", False) or "etag" in headers:
+                await send(start_message)
+                await send(message)
+                return
+
+            etag = headers["ETag"] = f'"{blake2b(body, digest_size=16).hexdigest()}"'
+            if if_none_match is not None and etag_matches(if_none_match, etag):
+                del headers["Content-Length"]
+                del headers["Content-Type"]
+                await send({**start_message, "status": 304})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send(start_message)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
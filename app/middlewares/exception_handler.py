@@ -4,6 +4,8 @@ from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError
 from loguru import logger
 
+from app.utils.deadline import DeadlineExceeded
+
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """处理请求验证异常"""
@@ -29,6 +31,18 @@ async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError):
     )
 
 
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    """处理请求超时异常，此时数据库语句已被取消、连接随事务回滚归还连接池"""
+    logger.warning(f"Deadline exceeded: {request.method} {request.url.path}: {exc}")
+    return JSONResponse(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        content={
+            "message": "Request deadline exceeded",
+            "detail": str(exc),
+        },
+    )
+
+
 async def value_error_handler(request: Request, exc: ValueError):
     """处理值错误异常"""
     logger.error(f"Value error: {exc}")
@@ -56,5 +70,6 @@ def add_exception_handlers(app: FastAPI) -> None:
     """添加异常处理器到应用"""
     app.add_exception_handler(RequestValidationError, validation_exception_handler)
     app.add_exception_handler(SQLAlchemyError, sqlalchemy_exception_handler)
+    app.add_exception_handler(DeadlineExceeded, deadline_exceeded_handler)
     app.add_exception_handler(ValueError, value_error_handler)
     app.add_exception_handler(Exception, generic_exception_handler) 
\ No newline at end of file
@@ -0,0 +1,38 @@
+"""
+事件循环阻塞预算中间件（纯 ASGI 实现，仅用于开发和测试环境）
+请求处理期间事件循环被同一任务阻塞超过预算时抛出 LoopBlockedError，测试中的请求随之失败
+"""
+import asyncio
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.utils import loop_monitor
+
+
+class LoopBlockedError(RuntimeError):
+    """请求阻塞事件循环超过预算"""
+
+
+class LoopBudgetMiddleware:
+    """事件循环阻塞预算中间件，预算由 LoopMonitor.budget 配置"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        monitor = loop_monitor.loop_monitor
+        if scope["type"] != "http" or monitor is None or not monitor.running:
+            await self.app(scope, receive, send)
+            return
+
+        task = asyncio.current_task()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            blocked = monitor.pop_blocked(task)
+        if blocked is not None:
+            duration, stack = blocked
+            raise LoopBlockedError(
+                f"{scope['method']} {scope['path']} 阻塞事件循环至少 {duration * 1000:.0f}ms，"
+                f"超过预算 {monitor.budget * 1000:.0f}ms，阻塞时的调用栈:\n{stack}"
+            )
@@ -0,0 +1,28 @@
+"""
+按路由内存采样中间件（纯 ASGI 实现）
+tracemalloc 启动且开启按路由采样后，按比例记录请求处理期间的峰值分配；未开启时直接透传
+"""
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.middlewares.routing import route_template
+from app.utils.memory import MemoryProfiler, memory_profiler
+
+
+class MemoryProfilingMiddleware:
+    """按路由内存采样中间件"""
+
+    def __init__(self, app: ASGIApp, profiler: MemoryProfiler = memory_profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        profiler = self.profiler
+        if not profiler.route_sample_rate or scope["type"] != "http" or not profiler.should_sample():
+            await self.app(scope, receive, send)
+            return
+
+        baseline = profiler.begin_sample()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.end_sample(scope["method"], route_template(scope), baseline)
@@ -0,0 +1,40 @@
+"""
+请求指标中间件（纯 ASGI 实现）
+按路由模板记录请求数、耗时分布和正在处理的请求数
+"""
+from time import perf_counter
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.middlewares.routing import route_template
+from app.utils.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS, HTTP_REQUESTS_IN_PROGRESS
+
+
+class MetricsMiddleware:
+    """请求指标中间件"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        labels = (scope["method"], route_template(scope))
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc(labels)
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_DURATION.observe(perf_counter() - start, labels)
+            HTTP_REQUESTS_IN_PROGRESS.dec(labels)
+            HTTP_REQUESTS.inc(labels + (str(status_code),))
@@ -0,0 +1,43 @@
+"""
+按需采样中间件（纯 ASGI 实现）
+仅在管理员布防后对匹配路由的请求进行采样，未布防时直接透传
+"""
+from time import perf_counter
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.middlewares.routing import route_template
+from app.utils.profiler import RequestProfiler, request_profiler
+
+
+class ProfilingMiddleware:
+    """请求采样中间件"""
+
+    def __init__(self, app: ASGIApp, profiler: RequestProfiler = request_profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        profiler = self.profiler
+        if not profiler.remaining or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope)
+        if not profiler.matches(method, route):
+            await self.app(scope, receive, send)
+            return
+
+        started = perf_counter()
+        profile, sampler = profiler.start(method, scope["path"], route)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.finish(profile, sampler, started)
@@ -0,0 +1,160 @@
+"""
+限流中间件（纯 ASGI 实现）
+按 (规则, 身份) 计数，身份为令牌中的用户 ID，没有有效令牌时为客户端 IP；
+在路由、依赖注入之前完成判定，被拒绝的请求不会占用数据库连接或触发 bcrypt 计算
+"""
+import inspect
+import json
+import math
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+
+from jose import JWTError, jwt
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.middlewares.routing import route_template
+from app.schemas.response import error_response
+from app.utils.metrics import REGISTRY, CallbackGauge, Counter
+from app.utils.rate_limit import MemoryRateLimiter, RateLimitResult, RateLimitRule, RedisRateLimiter
+from config import settings
+
+RATE_LIMIT_REJECTED = REGISTRY.register(Counter(
+    "rate_limit_rejected_total", "被限流拒绝的请求数", ("method", "route")))
+
+# 令牌到用户 ID 的缓存，避免同一令牌重复验签
+_TOKEN_CACHE_SIZE = 4096
+
+
+class RateLimitMiddleware:
+    """
+    限流中间件
+
+    Args:
+        rules: 限流规则，路由为 * 的规则作为默认规则
+        backend: 限流状态存储
+        trust_forwarded: 使用 X-Forwarded-For 的第一个地址作为客户端 IP（仅在可信代理之后开启）
+    """
+
+    def __init__(self, app: ASGIApp, rules: List[RateLimitRule],
+                 backend: Union[MemoryRateLimiter, RedisRateLimiter], trust_forwarded: bool = False):
+        self.app = app
+        self.backend = backend
+        self.trust_forwarded = trust_forwarded
+        self.rules: Dict[Tuple[str, str], Tuple[int, RateLimitRule]] = {}
+        self.defaults: Dict[str, Tuple[int, RateLimitRule]] = {}
+        for index, rule in enumerate(rules):
+            if rule.route == "*":
+                self.defaults[rule.method] = (index, rule)
+            else:
+                self.rules[(rule.method, rule.route)] = (index, rule)
+        self._tokens: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        _backends.append(backend)
+
+    def _match(self, method: str, route: str) -> Optional[Tuple[int, RateLimitRule]]:
+        return (self.rules.get((method, route)) or self.rules.get(("*", route))
+                or self.defaults.get(method) or self.defaults.get("*"))
+
+    def _user_id(self, token: str) -> Optional[str]:
+        if token in self._tokens:
+            self._tokens.move_to_end(token)
+            return self._tokens[token]
+        try:
+            # 只用于区分身份，不检查过期时间
+            claims = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM],
+                                options={"verify_exp": False})
+            user_id = str(claims["sub"]) if claims.get("sub") is not None else None
+        except (JWTError, KeyError):
+            user_id = None
+        self._tokens[token] = user_id
+        if len(self._tokens) > _TOKEN_CACHE_SIZE:
+            self._tokens.popitem(last=False)
+        return user_id
+
+    def _identity(self, scope: Scope) -> str:
+        forwarded = None
+        for name, value in scope["headers"]:
+            if name == b"authorization" and value[:7].lower() == b"bearer ":
+                user_id = self._user_id(value[7:].decode("latin-1").strip())
+                if user_id is not None:
+                    return f"user:{user_id}"
+            elif name == b"x-forwarded-for" and self.trust_forwarded:
+                forwarded = value.decode("latin-1").split(",")[0].strip()
+        if forwarded:
+            return f"ip:{forwarded}"
+        client = scope.get("client")
+        return f"ip:{client[0]}" if client else "ip:-"
+
+    @staticmethod
+    def _headers(rule: RateLimitRule, result: RateLimitResult) -> List[Tuple[bytes, bytes]]:
+        headers = [
+            (b"ratelimit-limit", str(rule.limit).encode("latin-1")),
+            (b"ratelimit-remaining", str(result.remaining).encode("latin-1")),
+            (b"ratelimit-reset", str(math.ceil(result.reset_after)).encode("latin-1")),
+        ]
+        if not result.allowed:
+            headers.append((b"retry-after", str(max(math.ceil(result.retry_after), 1)).encode("latin-1")))
+        return headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope)
+        matched = self._match(method, route)
+        if matched is None:
+            await self.app(scope, receive, send)
+            return
+
+        index, rule = matched
+        result = self.backend.hit((index, route, self._identity(scope)), rule)
+        if inspect.isawaitable(result):
+            result = await result
+        headers = self._headers(rule, result)
+
+        if not result.allowed:
+            RATE_LIMIT_REJECTED.inc((method, route))
+            body = json.dumps(
+                error_response(message="请求过于频繁，请稍后重试", code=429), ensure_ascii=False,
+            ).encode("utf-8")
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                    *headers,
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *headers]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+# 已创建的限流状态，供指标读取
+_backends: List[Union[MemoryRateLimiter, RedisRateLimiter]] = []
+
+
+def create_rate_limit_backend() -> Union[MemoryRateLimiter, RedisRateLimiter]:
+    """按配置创建限流状态存储：配置了 RATE_LIMIT_REDIS_URL 时使用 Redis，否则使用进程内存储"""
+    if settings.RATE_LIMIT_REDIS_URL:
+        return RedisRateLimiter(settings.RATE_LIMIT_REDIS_URL)
+    return MemoryRateLimiter(sweep_interval=settings.RATE_LIMIT_SWEEP_INTERVAL_SECONDS)
+
+
+async def close_rate_limit_backends() -> None:
+    for backend in _backends:
+        if isinstance(backend, RedisRateLimiter):
+            await backend.close()
+
+
+REGISTRY.register(CallbackGauge(
+    "rate_limit_keys", "进程内限流状态中的键数",
+    lambda: {(): sum(len(backend) for backend in _backends if isinstance(backend, MemoryRateLimiter))}))
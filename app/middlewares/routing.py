@@ -0,0 +1,49 @@
+"""
+路由模板解析
+中间件在路由匹配之前执行，需要自行把请求路径映射为路由模板（如 /api/items/{item_id}），
+用作指标、限流等的标签，避免按原始路径产生无限多的标签值
+"""
+from collections import OrderedDict
+from typing import Tuple
+
+from starlette.routing import Match
+from starlette.types import Scope
+
+# 未匹配任何路由的请求统一归入该标签
+UNMATCHED_ROUTE = "<unmatched>"
+
+_CACHE_SIZE = 4096
+_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+
+
+def route_template(scope: Scope) -> str:
+    """
+    获取请求对应的路由模板
+
+    路由匹配完成后直接读取 scope["route"]，否则按 (method, path) 查缓存，未命中时遍历路由表匹配
+    """
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path", UNMATCHED_ROUTE)
+
+    key = (scope.get("method", ""), scope["path"])
+    template = _cache.get(key)
+    if template is not None:
+        _cache.move_to_end(key)
+        return template
+
+    template = UNMATCHED_ROUTE
+    app = scope.get("app")
+    router = getattr(app, "router", None)
+    for candidate in getattr(router, "routes", ()):
+        match, _ = candidate.matches(scope)
+        if match == Match.FULL:
+            template = getattr(candidate, "path", UNMATCHED_ROUTE)
+            break
+        if match == Match.PARTIAL and template == UNMATCHED_ROUTE:
+            template = getattr(candidate, "path", UNMATCHED_ROUTE)
+
+    _cache[key] = template
+    if len(_cache) > _CACHE_SIZE:
+        _cache.popitem(last=False)
+    return template
@@ -0,0 +1,96 @@
+"""
+Server-Timing 与请求查询预算中间件（纯 ASGI 实现）
+在响应头中输出 db / auth / svc / ser / total 各阶段耗时，并检查单个请求的 SQL 语句数
+"""
+import functools
+import inspect
+from time import perf_counter
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from loguru import logger
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.middlewares.routing import route_template
+from app.utils.timing import RequestTimings, request_timings
+
+
+def _format(timings: RequestTimings, end: float) -> str:
+    total = end - timings.start
+    metrics = [f'db;dur={timings.db_time * 1000:.2f};desc="{timings.db_count} queries"']
+    for name, duration in timings.spans.items():
+        metrics.append(f"{name};dur={duration * 1000:.2f}")
+    if timings.endpoint_end is not None:
+        metrics.append(f"ser;dur={(end - timings.endpoint_end) * 1000:.2f}")
+    metrics.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(metrics)
+
+
+def _timed_endpoint(call):
+    @functools.wraps(call)
+    async def wrapper(*args, **kwargs):
+        timings = request_timings.get()
+        if timings is None:
+            return await call(*args, **kwargs)
+        start = perf_counter()
+        try:
+            return await call(*args, **kwargs)
+        finally:
+            timings.endpoint_end = perf_counter()
+            timings.add("svc", timings.endpoint_end - start)
+
+    wrapper.__timed__ = True
+    return wrapper
+
+
+def instrument_endpoints(app: FastAPI) -> None:
+    """包装所有异步端点函数，记录端点执行耗时（svc）及结束时间（用于计算序列化耗时 ser）"""
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        call = route.dependant.call
+        if inspect.iscoroutinefunction(call) and not getattr(call, "__timed__", False):
+            route.dependant.call = _timed_endpoint(call)
+
+
+class ServerTimingMiddleware:
+    """
+    Server-Timing 中间件
+
+    Args:
+        emit_header: 是否输出 Server-Timing 响应头
+        query_budget: 单个请求允许的 SQL 语句数，0 表示不检查
+        raise_on_budget: 超出预算时抛出异常（否则仅记录警告）
+    """
+
+    def __init__(self, app: ASGIApp, emit_header: bool = True, query_budget: int = 0,
+                 raise_on_budget: bool = False):
+        self.app = app
+        self.emit_header = emit_header
+        self.query_budget = query_budget
+        self.raise_on_budget = raise_on_budget
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings(self.query_budget, self.raise_on_budget)
+        token = request_timings.set(timings)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and self.emit_header:
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", _format(timings, perf_counter()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_timings.reset(token)
+            if 0 < self.query_budget < timings.db_count:
+                logger.warning(
+                    f"{scope['method']} {route_template(scope)} 执行了 {timings.db_count} 条 SQL，"
+                    f"超过预算 {self.query_budget}，可能存在 N+1 查询"
+                )
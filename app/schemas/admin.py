@@ -0,0 +1,137 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class SlowQueryEvent(BaseModel):
+    """慢查询记录"""
+    
+    timestamp: datetime = Field(..., description="记录时间（UTC）")
+    statement: str = Field(..., description="规范化后的 SQL")
+    parameters: str = Field(..., description="绑定参数的类型结构（不含参数值）")
+    duration_ms: float = Field(..., description="耗时（毫秒）")
+    caller: Optional[str] = Field(None, description="发起查询的 Repository 方法")
+    plan: List[str] = Field(default_factory=list, description="执行计划")
+    suppressed: int = Field(0, description="距上次记录期间因限频被忽略的次数")
+
+
+class ProfileArmRequest(BaseModel):
+    """采样布防请求"""
+    
+    route: str = Field(..., description="路由模板，如 /api/items/{item_id}")
+    method: Optional[str] = Field(None, description="HTTP 方法，不传表示任意方法")
+    count: int = Field(1, ge=1, le=100, description="采样的请求数")
+    interval_ms: Optional[float] = Field(None, gt=0, le=100, description="采样间隔（毫秒）")
+
+
+class ProfilerStatus(BaseModel):
+    """采样器布防状态"""
+    
+    route: Optional[str] = None
+    method: Optional[str] = None
+    remaining: int = Field(..., description="剩余待采样的请求数")
+    interval_ms: float
+
+
+class ProfileSummary(BaseModel):
+    """采样结果摘要"""
+    
+    id: str
+    method: str
+    path: str
+    route: str
+    started_at: datetime
+    duration_ms: float
+    status: Optional[int] = Field(None, description="响应状态码")
+    samples: int = Field(..., description="采样次数")
+    interval_ms: float
+
+
+class MemoryTraceStartRequest(BaseModel):
+    """启动 tracemalloc 请求"""
+    
+    frames: int = Field(1, ge=1, le=64, description="每次分配记录的调用栈深度，越深开销越大")
+    route_sample_rate: float = Field(0.0, ge=0, le=1, description="按路由记录峰值分配的请求采样比例，0 表示不记录")
+
+
+class MemoryStatus(BaseModel):
+    """tracemalloc 状态"""
+    
+    tracing: bool
+    traceback_limit: int
+    traced_current: int = Field(..., description="当前跟踪到的内存（字节）")
+    traced_peak: int = Field(..., description="跟踪期间的峰值（字节）")
+    tracemalloc_overhead: int = Field(..., description="tracemalloc 自身占用的内存（字节）")
+    route_sample_rate: float
+    snapshots: int = Field(..., description="保留的快照数")
+
+
+class MemorySnapshotSummary(BaseModel):
+    """内存快照摘要"""
+    
+    id: str
+    taken_at: datetime
+    size: int = Field(..., description="快照中的内存（字节）")
+    blocks: int = Field(..., description="内存块数")
+    traceback_limit: int
+
+
+class MemoryStat(BaseModel):
+    """按位置汇总的分配"""
+    
+    location: str = Field(..., description="文件、文件:行号，或调用栈（group_by=traceback）")
+    size: int = Field(..., description="字节数")
+    count: int = Field(..., description="内存块数")
+    size_diff: Optional[int] = Field(None, description="相对基准快照的字节数变化")
+    count_diff: Optional[int] = Field(None, description="相对基准快照的内存块数变化")
+
+
+class RouteMemoryStats(BaseModel):
+    """按路由的采样请求峰值分配"""
+    
+    method: str
+    route: str
+    samples: int
+    avg_peak: int = Field(..., description="平均峰值分配（字节）")
+    max_peak: int = Field(..., description="最大峰值分配（字节）")
+    last_peak: int = Field(..., description="最近一次峰值分配（字节）")
+
+
+class JobInfo(BaseModel):
+    """后台任务"""
+    
+    id: int
+    type: str
+    payload: dict
+    progress: dict = Field(default_factory=dict, description="处理函数保存的进度")
+    status: str = Field(..., description="pending / running / succeeded / failed / cancelled")
+    attempts: int = Field(..., description="已执行次数")
+    max_attempts: int
+    run_at: datetime = Field(..., description="计划（或下次重试）执行时间")
+    last_error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+
+class JobTypeStats(BaseModel):
+    """单个任务类型的队列状态"""
+    
+    type: str
+    pending: int = Field(..., description="等待执行的任务数（含未到重试时间的）")
+    due: int = Field(..., description="已到执行时间、等待领取的任务数")
+    running: int = Field(..., description="执行中的任务数（所有进程）")
+    failed: int = Field(..., description="已放弃重试的任务数")
+    oldest_due_age: float = Field(..., description="最早一个待领取任务已等待的秒数")
+    succeeded_recent: int = Field(..., description="统计窗口内成功的任务数")
+    failed_recent: int = Field(..., description="统计窗口内放弃重试的任务数")
+    throughput_per_minute: float = Field(..., description="统计窗口内平均每分钟完成的任务数")
+    in_flight: int = Field(0, description="本进程执行中的任务数")
+    concurrency: int = Field(0, description="本进程的并发上限")
+
+
+class JobQueueStats(BaseModel):
+    """后台任务队列状态"""
+    
+    window_seconds: int
+    runner_enabled: bool = Field(..., description="本进程是否在执行后台任务")
+    types: List[JobTypeStats]
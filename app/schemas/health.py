@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import List, Optional
+
 from pydantic import BaseModel, Field
 
 
@@ -6,4 +9,17 @@ class HealthResponse(BaseModel):
     
     status: str = Field(..., description="API状态")
     database: str = Field(..., description="数据库连接状态")
-    api_version: str = Field(..., description="API版本") 
\ No newline at end of file
+    api_version: str = Field(..., description="API版本")
+    database_latency_ms: Optional[float] = Field(None, description="最近一次数据库检查耗时（毫秒）")
+    checked_at: Optional[datetime] = Field(None, description="最近一次数据库检查时间")
+    pool_checked_out: Optional[int] = Field(None, description="已借出的连接数")
+    pool_capacity: Optional[int] = Field(None, description="连接池容量，不限容量时为空")
+    bcrypt_pending: Optional[int] = Field(None, description="等待中的 bcrypt 任务数")
+    event_loop_lag_ms: Optional[float] = Field(None, description="事件循环延迟（毫秒）")
+
+
+class ProbeResponse(BaseModel):
+    """存活 / 就绪探针响应模型"""
+    
+    status: str = Field(..., description="探针状态")
+    reasons: List[str] = Field(default_factory=list, description="检查失败原因")
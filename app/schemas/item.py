@@ -1,7 +1,9 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
+from app.schemas.user import UserPublic
+
 
 class ItemBase(BaseModel):
     """物品基础模型"""
@@ -48,7 +50,31 @@ class ItemResponse(BaseModel):
     owner_id: int = Field(..., description="物品所有者ID")
     created_at: datetime = Field(..., description="创建时间")
     updated_at: datetime = Field(..., description="更新时间")
+    owner: Optional[UserPublic] = Field(None, description="物品所有者（?expand=owner 时返回）")
     
     class Config:
         """配置"""
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class ItemLookupRequest(BaseModel):
+    """按 ID 批量获取物品的请求模型"""
+    
+    ids: List[int] = Field(..., description="物品ID列表")
+
+
+class ItemLookupResponse(BaseModel):
+    """按 ID 批量获取物品的响应模型"""
+    
+    items: List[Optional[ItemResponse]] = Field(..., description="按请求顺序排列的物品，不存在的位置为 null")
+    missing: List[int] = Field(..., description="不存在的物品ID")
+
+
+class OwnerItemStats(BaseModel):
+    """按所有者汇总的物品统计"""
+    
+    owner_id: int = Field(..., description="所有者ID")
+    item_count: int = Field(0, description="物品数")
+    total_price: float = Field(0, description="价格总和（不含未定价物品）")
+    avg_price: Optional[float] = Field(None, description="平均价格（不含未定价物品），没有定价物品时为 null")
+    last_created_at: Optional[datetime] = Field(None, description="最近创建物品的时间")
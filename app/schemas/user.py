@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, EmailStr, Field, field_validator
 
@@ -77,4 +77,24 @@ class UserResponse(BaseModel):
 
     class Config:
         """配置"""
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class UserPublic(BaseModel):
+    """用户公开信息（嵌入其他资源时使用）"""
+
+    id: int = Field(..., description="用户ID")
+    username: str = Field(..., description="用户名")
+
+
+class UserLookupRequest(BaseModel):
+    """按 ID 批量获取用户的请求模型"""
+
+    ids: List[int] = Field(..., description="用户ID列表")
+
+
+class UserLookupResponse(BaseModel):
+    """按 ID 批量获取用户的响应模型"""
+
+    items: List[Optional[UserResponse]] = Field(..., description="按请求顺序排列的用户，不存在的位置为 null")
+    missing: List[int] = Field(..., description="不存在的用户ID")
@@ -1,11 +1,11 @@
 """
 物品服务层 - 业务逻辑处理
 """
-from typing import Optional
+from typing import Optional, Sequence, Union
 from sqlalchemy.ext.asyncio import AsyncConnection
 
 from app.db.repositories.item_repository import ItemRepository
-from app.schemas.item import ItemCreate, ItemUpdate, Item
+from app.schemas.item import ItemCreate, ItemUpdate, Item, OwnerItemStats
 
 
 class ItemService:
@@ -25,24 +25,48 @@ class ItemService:
         
         return Item(**item_data)
     
-    async def get_items(self, skip: int = 0, limit: int = 100) -> list[Item]:
-        """获取物品列表"""
-        items_data = await self.repository.get_all(skip=skip, limit=limit)
+    async def get_items(self, skip: int = 0, limit: int = 100,
+                        fields: Optional[Sequence[str]] = None) -> list[Union[Item, dict]]:
+        """获取物品列表，指定 fields 时返回仅包含这些字段的字典"""
+        items_data = await self.repository.get_all(skip=skip, limit=limit, columns=fields)
+        if fields:
+            return items_data
         return [Item(**item_data) for item_data in items_data]
     
-    async def get_items_by_owner(self, owner_id: int, skip: int = 0, limit: int = 100) -> list[Item]:
+    async def get_items_by_owner(self, owner_id: int, skip: int = 0, limit: int = 100,
+                                 fields: Optional[Sequence[str]] = None) -> list[Union[Item, dict]]:
         """获取指定用户的所有物品"""
-        items_data = await self.repository.get_items_by_owner(owner_id, skip=skip, limit=limit)
+        items_data = await self.repository.get_items_by_owner(owner_id, skip=skip, limit=limit, columns=fields)
+        if fields:
+            return items_data
         return [Item(**item_data) for item_data in items_data]
     
-    async def get_item(self, item_id: int) -> Optional[Item]:
-        """通过ID获取物品"""
-        item_data = await self.repository.get_by_id(item_id)
+    async def get_item(self, item_id: int, fields: Optional[Sequence[str]] = None) -> Optional[Union[Item, dict]]:
+        """通过ID获取物品，指定 fields 时返回仅包含这些字段的字典"""
+        item_data = await self.repository.get_by_id(item_id, columns=fields)
         if item_data is None:
             return None
+        if fields:
+            return item_data
         
         return Item(**item_data)
     
+    async def get_items_by_ids(self, item_ids: Sequence[int], fields: Optional[Sequence[str]] = None
+                               ) -> tuple[list[Optional[Union[Item, dict]]], list[int]]:
+        """
+        按 ID 批量获取物品（单次分块 IN 查询）
+        
+        Returns:
+            (按请求顺序排列的物品列表（不存在的位置为 None）, 不存在的 ID 列表)
+        """
+        found = await self.repository.get_many(item_ids, columns=fields)
+        items: dict[int, Union[Item, dict]] = {}
+        for item_id, item_data in found.items():
+            items[item_id] = {key: item_data[key] for key in fields} if fields else Item(**item_data)
+        
+        missing = [item_id for item_id in dict.fromkeys(item_ids) if item_id not in items]
+        return [items.get(item_id) for item_id in item_ids], missing
+    
     async def update_item(self, item_id: int, item_in: ItemUpdate) -> Optional[Item]:
         """更新物品信息"""
         item_data = await self.repository.get_by_id(item_id)
@@ -64,4 +88,13 @@ class ItemService:
     
     async def count_items_by_owner(self, owner_id: int) -> int:
         """获取指定用户的物品总数"""
-        return await self.repository.count_by_owner(owner_id)
\ No newline at end of file
+        return await self.repository.count_by_owner(owner_id)
+    
+    async def get_owner_stats(self, owner_id: int) -> OwnerItemStats:
+        """获取指定用户的物品统计（读取汇总表，与物品数量无关）"""
+        stats = await self.repository.get_owner_stats(owner_id)
+        if stats is None:
+            return OwnerItemStats(owner_id=owner_id)
+        priced_count = stats.pop("priced_count")
+        avg_price = stats["total_price"] / priced_count if priced_count else None
+        return OwnerItemStats(**stats, avg_price=avg_price)
\ No newline at end of file
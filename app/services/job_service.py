@@ -0,0 +1,52 @@
+"""
+后台任务服务层 - 队列状态查询
+"""
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core import jobs
+from app.db.repositories.job_repository import JobRepository
+from app.schemas.admin import JobInfo, JobQueueStats, JobTypeStats
+
+
+class JobService:
+    """后台任务服务类"""
+    
+    def __init__(self, conn: AsyncConnection):
+        self.repository = JobRepository(conn)
+    
+    async def get_jobs(self, status: Optional[str] = None, job_type: Optional[str] = None,
+                       limit: int = 100) -> list[JobInfo]:
+        """按 ID 倒序列出任务"""
+        jobs_data = await self.repository.get_all(status=status, job_type=job_type, limit=limit)
+        return [JobInfo(**job_data) for job_data in jobs_data]
+    
+    async def get_job(self, job_id: int) -> Optional[JobInfo]:
+        """通过 ID 获取任务"""
+        job_data = await self.repository.get_by_id(job_id)
+        return JobInfo(**job_data) if job_data else None
+    
+    async def get_stats(self, window: int) -> JobQueueStats:
+        """各任务类型的队列深度、最近 window 秒的吞吐，以及本进程的执行情况"""
+        runner = jobs.job_runner
+        local = runner.status() if runner is not None else {}
+        types = {}
+        for row in await self.repository.stats(window):
+            row = {key: value or 0 for key, value in row.items()}
+            done = row["succeeded_recent"] + row["failed_recent"]
+            types[row["type"]] = JobTypeStats(
+                **row, throughput_per_minute=round(done * 60 / window, 3), **local.get(row["type"], {}),
+            )
+        # 已注册但还没有任务记录的类型
+        for job_type, status in local.items():
+            if job_type not in types:
+                types[job_type] = JobTypeStats(
+                    type=job_type, pending=0, due=0, running=0, failed=0, oldest_due_age=0,
+                    succeeded_recent=0, failed_recent=0, throughput_per_minute=0, **status,
+                )
+        return JobQueueStats(
+            window_seconds=window,
+            runner_enabled=runner is not None,
+            types=sorted(types.values(), key=lambda stats: stats.type),
+        )
@@ -0,0 +1,16 @@
+"""
+请求级数据加载器依赖
+FastAPI 在单个请求内缓存依赖结果，因此每个请求拥有独立的加载器实例
+"""
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db.session import get_db
+from app.schemas.user import UserPublic
+from app.services.user_service import UserService
+from app.utils.dataloader import DataLoader
+
+
+def get_owner_loader(conn: AsyncConnection = Depends(get_db)) -> DataLoader[int, UserPublic]:
+    """获取物品所有者的批量加载器（一次查询获取一页物品的全部所有者）"""
+    return DataLoader(UserService(conn).get_public_users)
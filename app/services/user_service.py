@@ -1,12 +1,17 @@
 """
 用户服务层 - 业务逻辑处理
 """
-from typing import Optional
+import asyncio
+from typing import Optional, Sequence, Union
 from sqlalchemy.ext.asyncio import AsyncConnection
 
+from app.core.jobs import Job, enqueue_job, job_handler
+from app.db.repositories.item_repository import ItemRepository
+from app.db.repositories.job_repository import JobRepository
 from app.db.repositories.user_repository import UserRepository
-from app.schemas.user import UserCreate, UserUpdate, User
-from app.utils.security import get_password_hash, verify_password
+from app.schemas.user import UserCreate, UserUpdate, User, UserPublic
+from app.utils.security import get_password_hash_async, verify_password_async
+from config import settings
 
 
 class UserService:
@@ -28,7 +33,7 @@ class UserService:
             raise ValueError("用户名已被使用")
         
         # 创建用户
-        hashed_password = get_password_hash(user_in.password)
+        hashed_password = await get_password_hash_async(user_in.password)
         user_data = await self.repository.create(
             email=user_in.email,
             username=user_in.username,
@@ -45,24 +50,50 @@ class UserService:
             return None
         if not user_data.get("is_active", True):
             return None
-        if not verify_password(password, user_data["hashed_password"]):
+        if not await verify_password_async(password, user_data["hashed_password"]):
             return None
         
         return User(**user_data)
     
-    async def get_users(self, skip: int = 0, limit: int = 100) -> list[User]:
-        """获取用户列表"""
-        users_data = await self.repository.get_all(skip=skip, limit=limit)
+    async def get_users(self, skip: int = 0, limit: int = 100,
+                        fields: Optional[Sequence[str]] = None) -> list[Union[User, dict]]:
+        """获取用户列表，指定 fields 时返回仅包含这些字段的字典"""
+        users_data = await self.repository.get_all(skip=skip, limit=limit, columns=fields)
+        if fields:
+            return users_data
         return [User(**user_data) for user_data in users_data]
     
-    async def get_user(self, user_id: int) -> Optional[User]:
-        """通过ID获取用户"""
-        user_data = await self.repository.get_by_id(user_id)
+    async def get_user(self, user_id: int, fields: Optional[Sequence[str]] = None) -> Optional[Union[User, dict]]:
+        """通过ID获取用户，指定 fields 时返回仅包含这些字段的字典"""
+        user_data = await self.repository.get_by_id(user_id, columns=fields)
         if user_data is None:
             return None
+        if fields:
+            return user_data
         
         return User(**user_data)
     
+    async def get_users_by_ids(self, user_ids: Sequence[int], fields: Optional[Sequence[str]] = None
+                               ) -> tuple[list[Optional[Union[User, dict]]], list[int]]:
+        """
+        按 ID 批量获取用户（单次分块 IN 查询）
+        
+        Returns:
+            (按请求顺序排列的用户列表（不存在的位置为 None）, 不存在的 ID 列表)
+        """
+        found = await self.repository.get_many(user_ids, columns=fields)
+        users: dict[int, Union[User, dict]] = {}
+        for user_id, user_data in found.items():
+            users[user_id] = {key: user_data[key] for key in fields} if fields else User(**user_data)
+        
+        missing = [user_id for user_id in dict.fromkeys(user_ids) if user_id not in users]
+        return [users.get(user_id) for user_id in user_ids], missing
+    
+    async def get_public_users(self, user_ids: Sequence[int]) -> dict[int, UserPublic]:
+        """按 ID 批量获取用户公开信息，返回 {id: UserPublic}"""
+        found = await self.repository.get_many(user_ids, columns=("id", "username"))
+        return {user_id: UserPublic(**user_data) for user_id, user_data in found.items()}
+    
     async def update_user(self, user_id: int, user_in: UserUpdate) -> Optional[User]:
         """更新用户信息"""
         user_data = await self.repository.get_by_id(user_id)
@@ -73,20 +104,71 @@ class UserService:
         
         # 如果更新密码，则需要哈希
         if "password" in update_data:
-            update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+            update_data["hashed_password"] = await get_password_hash_async(update_data.pop("password"))
         
         # 如果更新角色，转换为字符串
         if "role" in update_data:
             update_data["role"] = update_data["role"].value
         
+        # 重新启用时取消尚未完成的删除任务，避免继续删除该用户的数据
+        if update_data.get("is_active"):
+            await self.cancel_purge(user_id)
+        
         updated_user_data = await self.repository.update(user_id, **update_data)
         
         return User(**updated_user_data) if updated_user_data else None
     
-    async def delete_user(self, user_id: int) -> bool:
-        """删除用户"""
-        return await self.repository.delete(user_id)
+    async def delete_user(self, user_id: int) -> Optional[int]:
+        """
+        删除用户：立即停用，物品和用户记录由后台任务分块删除
+        
+        Returns:
+            删除任务 ID（重复删除时返回进行中的任务），用户不存在时返回 None
+        """
+        user_data = await self.repository.update(user_id, is_active=False)
+        if user_data is None:
+            return None
+        
+        job_id = await JobRepository(self.repository.conn).find_active("purge_user", "user_id", user_id)
+        if job_id is None:
+            job_id = await enqueue_job(self.repository.conn, "purge_user", {"user_id": user_id})
+        return job_id
+    
+    async def cancel_purge(self, user_id: int) -> bool:
+        """取消用户尚未完成的删除任务，返回是否取消了任务"""
+        jobs = JobRepository(self.repository.conn)
+        job_id = await jobs.find_active("purge_user", "user_id", user_id)
+        return job_id is not None and await jobs.cancel(job_id)
     
     async def count_users(self) -> int:
         """获取用户总数"""
-        return await self.repository.count()
\ No newline at end of file
+        return await self.repository.count()
+
+
+@job_handler("purge_user")
+async def purge_user(job: Job) -> None:
+    """
+    删除用户的物品和用户记录
+    
+    每次在一个短事务中删除 USER_PURGE_CHUNK_SIZE 个物品并保存进度，块之间让出写锁，
+    不会像 ON DELETE CASCADE 那样在一个事务中长时间持有写锁；任务中断后从剩余的物品继续
+    """
+    user_id = job.payload["user_id"]
+    progress = job.progress
+    if "items_total" not in progress:
+        async with job.engine.connect() as conn:
+            progress.update(items_total=await ItemRepository(conn).count_by_owner(user_id), items_deleted=0)
+    
+    chunk_size = settings.USER_PURGE_CHUNK_SIZE
+    while True:
+        async with job.engine.begin() as conn:
+            deleted = await ItemRepository(conn).delete_by_owner(user_id, chunk_size)
+            progress["items_deleted"] += deleted
+            await job.save_progress(conn)
+        if deleted < chunk_size:
+            break
+        await asyncio.sleep(settings.USER_PURGE_PAUSE_MS / 1000)
+    
+    async with job.engine.begin() as conn:
+        progress["user_deleted"] = await UserRepository(conn).delete(user_id)
+        await job.save_progress(conn)
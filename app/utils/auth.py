@@ -7,9 +7,11 @@ from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncConnection
 
 from app.db.session import get_db
+from app.schemas.role import Role
 from app.schemas.token import TokenPayload
 from app.schemas.user import UserResponse
 from app.services.user_service import UserService
+from app.utils.timing import timed
 from config import settings
 
 # OAuth2密码承载令牌
@@ -75,7 +77,8 @@ async def get_current_user(
     Raises:
         HTTPException: 身份验证失败
     """
-    return await _get_user_from_token(token, conn)
+    with timed("auth"):
+        return await _get_user_from_token(token, conn)
 
 
 async def get_current_user_optional(
@@ -86,4 +89,17 @@ async def get_current_user_optional(
     if token is None:
         return None
 
-    return await _get_user_from_token(token, conn)
+    with timed("auth"):
+        return await _get_user_from_token(token, conn)
+
+
+async def get_current_admin(
+    current_user: UserResponse = Depends(get_current_user)
+) -> UserResponse:
+    """获取当前管理员用户，非管理员时抛出 403"""
+    if current_user.role != Role.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="仅管理员可执行该操作",
+        )
+    return current_user
@@ -0,0 +1,78 @@
+"""
+批量数据加载器
+将同一事件循环轮次内的多次 load() 合并为一次批量查询，用于消除 N+1 查询
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class DataLoader(Generic[K, V]):
+    """
+    请求级批量加载器
+
+    实例应只在单个请求内使用：结果按 key 缓存，生命周期与请求一致
+
+    Args:
+        batch_load_fn: 批量加载函数，接收去重后的 key 列表，返回 {key: value}，缺失的 key 视为 None
+    """
+
+    def __init__(self, batch_load_fn: Callable[[List[K]], Awaitable[Dict[K, V]]]):
+        self._batch_load_fn = batch_load_fn
+        self._cache: Dict[K, asyncio.Future] = {}
+        self._queue: List[K] = []
+
+    def load(self, key: K) -> "asyncio.Future[Optional[V]]":
+        """加载单个 key，同一轮次内的调用会合并为一次批量加载"""
+        future = self._cache.get(key)
+        if future is not None and not future.cancelled():
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._cache[key] = future
+        self._queue.append(key)
+        if len(self._queue) == 1:
+            loop.call_soon(self._dispatch)
+        return future
+
+    async def load_many(self, keys: Iterable[K]) -> List[Optional[V]]:
+        """批量加载多个 key，按传入顺序返回结果"""
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _dispatch(self) -> None:
+        keys, self._queue = self._queue, []
+        asyncio.ensure_future(self._run(keys))
+
+    def _pending(self, keys: List[K]) -> Iterator[Tuple[K, asyncio.Future]]:
+        """
+        仍在等待结果的 (key, future)
+
+        等待方被取消（客户端断开、请求超时）时 future 已结束，跳过并移出缓存，之后的 load() 重新加载
+        """
+        for key in keys:
+            future = self._cache.get(key)
+            if future is None or future.done():
+                if future is not None and future.cancelled():
+                    del self._cache[key]
+                continue
+            yield key, future
+
+    async def _run(self, keys: List[K]) -> None:
+        try:
+            values = await self._batch_load_fn(keys)
+        except asyncio.CancelledError:
+            for key, future in list(self._pending(keys)):
+                del self._cache[key]
+                future.cancel()
+            raise
+        except Exception as exc:
+            for key, future in list(self._pending(keys)):
+                del self._cache[key]
+                future.set_exception(exc)
+            return
+
+        for key, future in list(self._pending(keys)):
+            future.set_result(values.get(key))
@@ -0,0 +1,34 @@
+"""
+请求截止时间
+中间件按路由把截止时间（time.monotonic() 时刻）写入 contextvar，Repository 执行语句前检查剩余时间，
+并以剩余时间作为超时；SQLite 连接的进度回调读取同一截止时间，在引擎内部中断语句
+"""
+from contextvars import ContextVar
+from time import monotonic
+from typing import Optional
+
+
+class DeadlineExceeded(Exception):
+    """请求已超过截止时间"""
+
+
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+def remaining_time() -> Optional[float]:
+    """
+    当前请求的剩余时间（秒）
+
+    Returns:
+        未设置截止时间时为 None
+
+    Raises:
+        DeadlineExceeded: 已超过截止时间
+    """
+    deadline = request_deadline.get()
+    if deadline is None:
+        return None
+    remaining = deadline - monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded("请求处理超时")
+    return remaining
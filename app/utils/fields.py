@@ -0,0 +1,97 @@
+"""
+稀疏字段集（?fields=）工具
+校验请求字段并生成只包含这些字段的响应
+"""
+from functools import lru_cache
+from typing import Any, Optional, Sequence, Tuple, Type
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, create_model
+
+from app.schemas.response import success_response
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> Optional[Tuple[str, ...]]:
+    """
+    解析逗号分隔的字段参数
+
+    Args:
+        fields: 原始参数，如 "id,title,price"
+        allowed: 允许的字段（按响应模型顺序）
+
+    Returns:
+        按 allowed 顺序排列的字段元组，未传参时返回 None
+
+    Raises:
+        HTTPException: 字段为空或不在允许范围内
+    """
+    if fields is None:
+        return None
+
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(allowed)
+    if not requested or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"无效的字段: {', '.join(sorted(unknown)) or fields}，可选字段: {', '.join(allowed)}",
+        )
+
+    # 统一为模型字段顺序，相同字段集合复用同一条缓存语句
+    return tuple(name for name in allowed if name in requested)
+
+
+def parse_expand(expand: Optional[str], allowed: Sequence[str]) -> Tuple[str, ...]:
+    """
+    解析逗号分隔的 ?expand= 参数
+
+    Raises:
+        HTTPException: 包含不支持展开的关联
+    """
+    if expand is None:
+        return ()
+
+    requested = {name.strip() for name in expand.split(",") if name.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"无效的展开项: {', '.join(sorted(unknown))}，可选: {', '.join(allowed)}",
+        )
+    return tuple(name for name in allowed if name in requested)
+
+
+@lru_cache(maxsize=256)
+def partial_model(model: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """基于响应模型创建只包含指定字段的模型（按字段集合缓存）"""
+    definitions = {
+        name: (model.model_fields[name].annotation, model.model_fields[name])
+        for name in fields
+    }
+    return create_model(f"{model.__name__}Partial", **definitions)
+
+
+def sparse_dump(data: Any, model: Type[BaseModel], fields: Tuple[str, ...]) -> Any:
+    """
+    将记录序列化为只包含指定字段的 JSON 兼容数据
+
+    Args:
+        data: 单条记录、记录列表（字典）或 None，列表中可包含 None
+        model: 完整响应模型，用于字段校验和序列化
+        fields: 需要输出的字段
+    """
+    partial = partial_model(model, fields)
+    if isinstance(data, list):
+        return [
+            partial.model_validate(row).model_dump(mode="json") if row is not None else None
+            for row in data
+        ]
+    if data is None:
+        return None
+    return partial.model_validate(data).model_dump(mode="json")
+
+
+def sparse_response(data: Any, model: Type[BaseModel], fields: Tuple[str, ...],
+                    message: str = "操作成功") -> JSONResponse:
+    """生成稀疏字段响应，省略未请求的字段"""
+    return JSONResponse(content=success_response(data=sparse_dump(data, model, fields), message=message))
@@ -1,80 +1,215 @@
 import sys
+import json
+import random
 import logging
+import threading
+import traceback
+from collections import Counter
 from pathlib import Path
+from time import monotonic
+from typing import Dict, Optional, Tuple
+
 from loguru import logger
 
+from app.utils.metrics import REGISTRY, CallbackGauge
 from config import settings
 
 # 日志格式
 LOG_FORMAT = (
     "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | "
     "<level>{level: <8}</level> | "
+    "{extra[request_id]} | "
     "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
     "<level>{message}</level>"
 )
 
+# 采样与限流只作用于低于该级别的日志，WARNING 及以上始终输出
+_UNSAMPLED_LEVEL = logging.WARNING
+
+
+def parse_sampling(spec: str) -> Dict[str, float]:
+    """
+    解析采样配置，如 "uvicorn.access=0.1,app.db=0.5"
+
+    Returns:
+        {logger 名前缀: 保留比例}
+    """
+    rates: Dict[str, float] = {}
+    for part in spec.split(","):
+        name, _, rate = part.strip().partition("=")
+        if name and rate:
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+class LogFilter:
+    """
+    按 logger 采样和限流
+
+    - 采样：按名称前缀配置保留比例
+    - 限流：每个 logger 每秒最多输出 rate_limit 条，0 表示不限
+    同一条记录在多个 sink 之间只判定一次，被丢弃的条数计入 dropped
+    """
+
+    def __init__(self, sampling: Dict[str, float], rate_limit: int):
+        self.sampling = sampling
+        self.rate_limit = rate_limit
+        self.dropped: Counter = Counter()
+        self._rates: Dict[str, float] = {}
+        self._windows: Dict[str, Tuple[int, int]] = {}
+
+    def _sample_rate(self, name: str) -> float:
+        rate = self._rates.get(name)
+        if rate is None:
+            rate, matched = 1.0, -1
+            for prefix, value in self.sampling.items():
+                if (name == prefix or name.startswith(prefix + ".")) and len(prefix) > matched:
+                    rate, matched = value, len(prefix)
+            self._rates[name] = rate
+        return rate
+
+    def _keep(self, record) -> bool:
+        if record["level"].no >= _UNSAMPLED_LEVEL:
+            return True
+        name = record["name"] or ""
+        rate = self._sample_rate(name)
+        if rate < 1.0 and random.random() >= rate:
+            self.dropped[(name, "sampled")] += 1
+            return False
+        if self.rate_limit > 0:
+            second = int(monotonic())
+            window, count = self._windows.get(name, (second, 0))
+            if window != second:
+                window, count = second, 0
+            if count >= self.rate_limit:
+                self.dropped[(name, "rate_limited")] += 1
+                return False
+            self._windows[name] = (window, count + 1)
+        return True
+
+    def __call__(self, record) -> bool:
+        extra = record["extra"]
+        keep = extra.get("_keep")
+        if keep is None:
+            keep = extra["_keep"] = self._keep(record)
+        return keep
+
+
+def _json_format(record) -> str:
+    """单行 JSON 格式"""
+    payload = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+    }
+    extra = {key: value for key, value in record["extra"].items() if not key.startswith("_")}
+    if extra:
+        payload["extra"] = extra
+    if record["exception"] is not None:
+        payload["exception"] = "".join(traceback.format_exception(*record["exception"]))
+    record["extra"]["_json"] = json.dumps(payload, ensure_ascii=False, default=str)
+    return "{extra[_json]}\n"
+
+
+# 标准库日志记录在 emit 中暂存，由 patcher 写回调用位置，避免逐帧查找调用者
+_intercepted = threading.local()
+
+
+def _patch_from_stdlib(record) -> None:
+    std_record: Optional[logging.LogRecord] = getattr(_intercepted, "record", None)
+    if std_record is not None:
+        record["name"] = std_record.name
+        record["function"] = std_record.funcName
+        record["line"] = std_record.lineno
+
+
+_stdlib_logger = logger.patch(_patch_from_stdlib)
+_level_names: Dict[int, str] = {}
+
 
 class InterceptHandler(logging.Handler):
     """
     拦截标准库logging并重定向到loguru
+    调用位置直接取自 LogRecord，不再逐帧回溯
     """
-    
+
     def emit(self, record: logging.LogRecord) -> None:
-        # 获取对应的loguru级别
+        # 获取对应的loguru级别（按数值缓存）
+        level = _level_names.get(record.levelno)
+        if level is None:
+            try:
+                level = logger.level(record.levelname).name
+            except ValueError:
+                level = record.levelno
+            _level_names[record.levelno] = level
+
+        _intercepted.record = record
         try:
-            level = logger.level(record.levelname).name
-        except ValueError:
-            level = record.levelno
-        
-        # 查找调用者
-        frame, depth = logging.currentframe(), 2
-        while frame.f_code.co_filename == logging.__file__:
-            frame = frame.f_back
-            depth += 1
-        
-        # 使用loguru输出日志
-        logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
+            target = _stdlib_logger.opt(exception=record.exc_info) if record.exc_info else _stdlib_logger
+            target.log(level, record.getMessage())
+        finally:
+            _intercepted.record = None
+
+
+log_filter = LogFilter(parse_sampling(settings.LOG_SAMPLING), settings.LOG_RATE_LIMIT_PER_SECOND)
+
+REGISTRY.register(CallbackGauge(
+    "log_records_dropped_total", "因采样或限流丢弃的日志条数",
+    lambda: dict(log_filter.dropped), ("logger", "reason"), metric_type="counter"))
 
 
 def setup_logging() -> None:
     """
     设置日志系统
+
+    sink 使用 enqueue 模式，格式化后的日志由后台线程写入控制台和文件，请求路径上不做 I/O
     """
-    # 移除所有处理器
+    # 移除所有处理器；请求之外的日志 request_id 显示为 "-"
     logger.remove()
-    
+    logger.configure(extra={"request_id": "-"})
+
     # 获取日志级别
     log_level = settings.LOG_LEVEL
-    
-    # 确保日志目录存在
-    logs_dir = Path("logs")
-    logs_dir.mkdir(exist_ok=True)
-    
+    log_format = _json_format if settings.LOG_JSON else LOG_FORMAT
+
     # 添加控制台处理器
     logger.add(
         sys.stdout,
-        format=LOG_FORMAT,
+        format=log_format,
         level=log_level,
-        colorize=True,
+        colorize=not settings.LOG_JSON,
+        filter=log_filter,
+        enqueue=settings.LOG_ENQUEUE,
     )
-    
+
     # 添加文件处理器
-    logger.add(
-        logs_dir / "app.log",
-        format=LOG_FORMAT,
-        level=log_level,
-        rotation="10 MB",
-        compression="zip",
-        retention="1 month",
-    )
-    
-    # 拦截标准库logging
-    logging.basicConfig(handlers=[InterceptHandler()], level=0)
-    
+    if settings.LOG_FILE_ENABLED:
+        # 确保日志目录存在
+        logs_dir = Path("logs")
+        logs_dir.mkdir(exist_ok=True)
+
+        logger.add(
+            logs_dir / "app.log",
+            format=log_format,
+            level=log_level,
+            rotation="10 MB",
+            compression="zip",
+            retention="1 month",
+            filter=log_filter,
+            enqueue=settings.LOG_ENQUEUE,
+        )
+
+    # 拦截标准库logging；根 logger 设为同一级别，低于该级别的记录在标准库内即被丢弃
+    logging.basicConfig(handlers=[InterceptHandler()], level=logger.level(log_level).no, force=True)
+
     # 设置其他库的日志级别
-    for logger_name in ("uvicorn", "uvicorn.error", "fastapi"):
+    for logger_name in ("uvicorn", "uvicorn.error", "uvicorn.access", "fastapi"):
         logging_logger = logging.getLogger(logger_name)
         logging_logger.handlers = [InterceptHandler()]
-    
+        logging_logger.propagate = False
+
     # 记录启动信息
-    logger.info(f"Logging initialized with level: {log_level}") 
\ No newline at end of file
+    logger.info(f"Logging initialized with level: {log_level}")
@@ -0,0 +1,43 @@
+"""
+批量查询（按 ID 列表）参数工具
+"""
+from typing import List
+
+from fastapi import HTTPException, status
+
+from config import settings
+
+
+def parse_ids(ids: str) -> List[int]:
+    """
+    解析逗号分隔的 ID 列表，并校验数量上限
+
+    Args:
+        ids: 原始参数，如 "1,2,3"
+
+    Raises:
+        HTTPException: 格式错误、为空或超过 BATCH_LOOKUP_MAX_IDS
+    """
+    try:
+        parsed = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ID 列表格式错误，应为逗号分隔的整数",
+        )
+    return check_ids(parsed)
+
+
+def check_ids(ids: List[int]) -> List[int]:
+    """校验 ID 列表非空且不超过 BATCH_LOOKUP_MAX_IDS"""
+    if not ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ID 列表不能为空",
+        )
+    if len(ids) > settings.BATCH_LOOKUP_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"单次最多查询 {settings.BATCH_LOOKUP_MAX_IDS} 个 ID",
+        )
+    return ids
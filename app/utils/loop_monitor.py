@@ -0,0 +1,131 @@
+"""
+事件循环阻塞监控
+- 循环内任务每 interval 秒休眠一次，用实际醒来时间与预期的差值作为调度延迟，记录到直方图
+- 看门狗线程检查该任务的心跳，循环被阻塞超过阈值时读取事件循环线程的调用栈并记录日志，
+  此时栈上正是阻塞循环的代码
+- 记录阻塞时正在执行的任务，开发模式下由中间件让对应请求失败
+"""
+import asyncio
+import sys
+import threading
+import traceback
+import weakref
+from time import monotonic
+from typing import Optional, Tuple
+
+from loguru import logger
+
+from app.utils.metrics import REGISTRY, Histogram
+
+EVENT_LOOP_LAG = REGISTRY.register(Histogram(
+    "event_loop_lag_seconds", "事件循环调度延迟（秒）",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)))
+
+
+class LoopMonitor:
+    """
+    事件循环阻塞监控
+
+    Args:
+        interval: 采样间隔（秒）
+        threshold: 阻塞超过该时间时记录调用栈（秒），0 表示不记录
+        budget: 单个任务允许阻塞的时间（秒），超出的任务记入 blocked，0 表示不检查
+    """
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.2, budget: float = 0.0):
+        self.interval = interval
+        self.threshold = threshold
+        self.budget = budget
+        self.lag = 0.0
+        self.heartbeat = monotonic()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        # 阻塞超出预算的任务 -> (阻塞时长, 调用栈)
+        self._blocked: "weakref.WeakKeyDictionary[asyncio.Task, Tuple[float, str]]" = weakref.WeakKeyDictionary()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self.heartbeat = monotonic()
+        self._task = self._loop.create_task(self._run(), name="loop-monitor")
+        watch = [value for value in (self.threshold, self.budget) if value > 0]
+        if watch:
+            self._stop.clear()
+            self._watchdog = threading.Thread(
+                target=self._watch, args=(min(watch),), name="loop-watchdog", daemon=True,
+            )
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            self.heartbeat = monotonic()
+            await asyncio.sleep(self.interval)
+            self.lag = max(loop.time() - start - self.interval, 0.0)
+            self.heartbeat = monotonic()
+            EVENT_LOOP_LAG.observe(self.lag)
+
+    def _loop_stack(self) -> str:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        return "".join(traceback.format_stack(frame)) if frame is not None else "<无法获取调用栈>"
+
+    def _watch(self, threshold: float) -> None:
+        # 每次阻塞（以心跳区分）只记录一次日志、只登记一次任务
+        logged = recorded = None
+        while not self._stop.wait(min(threshold / 4, 0.05)):
+            heartbeat = self.heartbeat
+            stalled = monotonic() - heartbeat - self.interval
+            if stalled < threshold:
+                continue
+            if self.threshold > 0 and stalled >= self.threshold and heartbeat != logged:
+                logged = heartbeat
+                logger.warning(f"事件循环已阻塞 {stalled * 1000:.0f}ms，事件循环线程调用栈:\n{self._loop_stack()}")
+            if self.budget > 0 and stalled >= self.budget and heartbeat != recorded:
+                recorded = heartbeat
+                task = asyncio.current_task(self._loop)
+                if task is not None:
+                    with self._lock:
+                        self._blocked[task] = (stalled, self._loop_stack())
+
+    def pop_blocked(self, task: asyncio.Task) -> Optional[Tuple[float, str]]:
+        """取出任务阻塞超出预算的记录"""
+        with self._lock:
+            return self._blocked.pop(task, None)
+
+
+# 由应用生命周期启动和停止
+loop_monitor: Optional[LoopMonitor] = None
+
+
+async def start_loop_monitor(interval: float, threshold: float, budget: float) -> LoopMonitor:
+    global loop_monitor
+    loop_monitor = LoopMonitor(interval, threshold, budget)
+    loop_monitor.start()
+    return loop_monitor
+
+
+async def stop_loop_monitor() -> None:
+    if loop_monitor is not None:
+        await loop_monitor.stop()
@@ -0,0 +1,194 @@
+"""
+内存分析
+由管理员按需启停 tracemalloc，拍摄快照并按文件 / 行号 / 调用栈汇总分配，或对比两个快照找出增长来源；
+开启按路由采样后，按比例抽取请求记录其处理期间的峰值分配。
+tracemalloc 未启动时中间件只做一次属性判断，没有额外开销
+"""
+import random
+import threading
+import tracemalloc
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.utils.paths import project_relative
+from config import settings
+
+# 快照中忽略的分配来源
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def _location(trace: tracemalloc.Traceback, group_by: str) -> str:
+    frames = []
+    for frame in trace if group_by == "traceback" else trace[:1]:
+        filename = project_relative(frame.filename)
+        frames.append(filename if group_by == "filename" else f"{filename}:{frame.lineno}")
+    return " -> ".join(frames)
+
+
+class Snapshot:
+    """一次 tracemalloc 快照"""
+
+    def __init__(self, snapshot: tracemalloc.Snapshot):
+        self.id = uuid.uuid4().hex[:12]
+        self.taken_at = datetime.now(timezone.utc)
+        self.snapshot = snapshot.filter_traces(_SNAPSHOT_FILTERS)
+        self.size = sum(stat.size for stat in self.snapshot.statistics("filename"))
+        self.blocks = len(self.snapshot.traces)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "taken_at": self.taken_at,
+            "size": self.size,
+            "blocks": self.blocks,
+            "traceback_limit": self.snapshot.traceback_limit,
+        }
+
+    def top(self, group_by: str, limit: int) -> List[Dict[str, Any]]:
+        """分配最多的位置"""
+        return [
+            {"location": _location(stat.traceback, group_by), "size": stat.size, "count": stat.count}
+            for stat in self.snapshot.statistics(group_by)[:limit]
+        ]
+
+    def diff(self, base: "Snapshot", group_by: str, limit: int) -> List[Dict[str, Any]]:
+        """相对 base 快照增长最多的位置（按增长量绝对值排序）"""
+        return [
+            {
+                "location": _location(stat.traceback, group_by),
+                "size": stat.size, "size_diff": stat.size_diff,
+                "count": stat.count, "count_diff": stat.count_diff,
+            }
+            for stat in self.snapshot.compare_to(base.snapshot, group_by)[:limit]
+        ]
+
+
+class RouteAllocationStats:
+    """单个路由的采样请求峰值分配"""
+
+    __slots__ = ("samples", "total_peak", "max_peak", "last_peak")
+
+    def __init__(self):
+        self.samples = 0
+        self.total_peak = 0
+        self.max_peak = 0
+        self.last_peak = 0
+
+    def record(self, peak: int) -> None:
+        self.samples += 1
+        self.total_peak += peak
+        self.max_peak = max(self.max_peak, peak)
+        self.last_peak = peak
+
+
+class MemoryProfiler:
+    """
+    内存分析器
+
+    按路由采样时同一时刻只记录一个请求（tracemalloc 的峰值是全局的）；
+    并发请求的分配同样会计入该请求的峰值，采样次数足够多时各路由的相对大小仍然可信
+    """
+
+    def __init__(self, max_snapshots: int):
+        self.max_snapshots = max_snapshots
+        self.snapshots: "OrderedDict[str, Snapshot]" = OrderedDict()
+        # take_snapshot 在线程池中写入，列表接口在事件循环中读取
+        self._lock = threading.Lock()
+        self.routes: Dict[Tuple[str, str], RouteAllocationStats] = {}
+        # tracemalloc 未启动或未开启按路由采样时为 0，中间件只检查该值
+        self.route_sample_rate = 0.0
+        self._sampling = False
+
+    def start(self, frames: int, route_sample_rate: float = 0.0) -> None:
+        if tracemalloc.is_tracing() and tracemalloc.get_traceback_limit() != frames:
+            tracemalloc.stop()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self.route_sample_rate = route_sample_rate
+        logger.info(f"tracemalloc started: {frames} frames, route sample rate {route_sample_rate}")
+
+    def stop(self) -> None:
+        """停止跟踪，已拍摄的快照保留"""
+        self.route_sample_rate = 0.0
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            logger.info("tracemalloc stopped")
+
+    def status(self) -> Dict[str, Any]:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            "tracing": tracing,
+            "traceback_limit": tracemalloc.get_traceback_limit() if tracing else 0,
+            "traced_current": current,
+            "traced_peak": peak,
+            "tracemalloc_overhead": tracemalloc.get_tracemalloc_memory() if tracing else 0,
+            "route_sample_rate": self.route_sample_rate,
+            "snapshots": len(self.snapshots),
+        }
+
+    def take_snapshot(self) -> Snapshot:
+        """拍摄快照（CPU 开销较大，应在线程池中调用）"""
+        snapshot = Snapshot(tracemalloc.take_snapshot())
+        with self._lock:
+            self.snapshots[snapshot.id] = snapshot
+            while len(self.snapshots) > self.max_snapshots:
+                self.snapshots.popitem(last=False)
+        return snapshot
+
+    def get(self, snapshot_id: str) -> Optional[Snapshot]:
+        with self._lock:
+            return self.snapshots.get(snapshot_id)
+
+    def list_snapshots(self) -> List[Snapshot]:
+        """已保存的快照（按时间倒序）"""
+        with self._lock:
+            return list(reversed(self.snapshots.values()))
+
+    def clear(self) -> None:
+        with self._lock:
+            self.snapshots.clear()
+        self.routes.clear()
+
+    def should_sample(self) -> bool:
+        return not self._sampling and random.random() < self.route_sample_rate and tracemalloc.is_tracing()
+
+    def begin_sample(self) -> int:
+        """开始记录一个请求，返回当前已跟踪的内存"""
+        self._sampling = True
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+    def end_sample(self, method: str, route: str, baseline: int) -> None:
+        self._sampling = False
+        if not tracemalloc.is_tracing():
+            return
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        stats = self.routes.get((method, route))
+        if stats is None:
+            stats = self.routes[(method, route)] = RouteAllocationStats()
+        stats.record(max(peak, 0))
+
+    def route_stats(self) -> List[Dict[str, Any]]:
+        """按平均峰值分配倒序"""
+        rows = [
+            {
+                "method": method, "route": route, "samples": stats.samples,
+                "avg_peak": stats.total_peak // stats.samples, "max_peak": stats.max_peak,
+                "last_peak": stats.last_peak,
+            }
+            for (method, route), stats in self.routes.items()
+        ]
+        return sorted(rows, key=lambda row: -row["avg_peak"])
+
+
+memory_profiler = MemoryProfiler(settings.MEMORY_PROFILING_MAX_SNAPSHOTS)
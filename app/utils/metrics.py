@@ -0,0 +1,283 @@
+"""
+指标采集（Prometheus 文本格式）
+所有观测都在事件循环线程内完成，不使用锁；单进程时数值保存在列表中，
+生产模式多个工作进程时保存在共享内存的本进程槽位中，任一进程都能输出汇总结果（见 shared_metrics）
+"""
+import asyncio
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.utils.shared_metrics import (
+    KIND_CALLBACK, KIND_COUNTER, KIND_GAUGE, KIND_HISTOGRAM, LocalStore,
+)
+
+Labels = Tuple[str, ...]
+
+# 默认延迟分桶（秒）
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_local_store = LocalStore()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    """指标基类，数值保存在注册表的存储中，按标签缓存序列偏移"""
+
+    type = "untyped"
+    kind = KIND_COUNTER
+    width = 1
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.bind(_local_store)
+
+    def bind(self, store) -> None:
+        """切换存储，已有序列在新存储中重新登记"""
+        self._store = store
+        self._cells = store.cells
+        self._offsets: Dict[Labels, int] = {}
+
+    def _offset(self, labels: Labels) -> int:
+        offset = self._offsets.get(labels)
+        if offset is None:
+            offset = self._offsets[labels] = self._store.allocate(self.name, labels, self.width, self.kind)
+        return offset
+
+    def _collect(self) -> Dict[Labels, List[float]]:
+        """各进程的数值按单元求和"""
+        return {
+            labels: [sum(column) for column in zip(*vectors)]
+            for labels, vectors in self._store.collect(self.name, (self.kind,)).items()
+        }
+
+    def samples(self) -> Iterable[Tuple[str, Labels, Sequence[str], float]]:
+        """返回 (指标名后缀, 标签名, 标签值, 数值)"""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for suffix, names, values, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """单调递增计数器"""
+
+    type = "counter"
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        offset = self._offsets.get(labels)
+        if offset is None:
+            offset = self._offset(labels)
+        self._cells[offset] += amount
+
+    def value(self, labels: Labels = ()) -> float:
+        """本进程的计数"""
+        offset = self._offsets.get(labels)
+        return 0 if offset is None else self._cells[offset]
+
+    def samples(self):
+        for labels, (value,) in self._collect().items():
+            yield "", self.labelnames, labels, value
+
+
+class Gauge(Metric):
+    """可增减的瞬时值，多个工作进程时为各进程之和"""
+
+    type = "gauge"
+    kind = KIND_GAUGE
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        self._cells[self._offset(labels)] = value
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        offset = self._offsets.get(labels)
+        if offset is None:
+            offset = self._offset(labels)
+        self._cells[offset] += amount
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+    def value(self, labels: Labels = ()) -> float:
+        """本进程的数值"""
+        offset = self._offsets.get(labels)
+        return 0 if offset is None else self._cells[offset]
+
+    def samples(self):
+        for labels, (value,) in self._collect().items():
+            yield "", self.labelnames, labels, value
+
+
+class CallbackGauge(Metric):
+    """
+    抓取时通过回调计算的指标，回调返回 {标签值: 数值}
+
+    多个工作进程时各进程定期（及自身响应抓取时）把回调结果发布到共享存储，
+    按 aggregate（sum / min / max）汇总存活进程的值
+    """
+
+    kind = KIND_CALLBACK
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], Dict[Labels, float]],
+                 labelnames: Sequence[str] = (), metric_type: str = "gauge", aggregate: str = "sum"):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self.type = metric_type
+        self.aggregate = {"sum": sum, "min": min, "max": max}[aggregate]
+
+    def publish(self) -> None:
+        for labels, value in self.callback().items():
+            self._cells[self._offset(labels)] = value
+
+    def samples(self):
+        if not self._store.shared:
+            for labels, value in self.callback().items():
+                yield "", self.labelnames, labels, value
+            return
+        self.publish()
+        for labels, vectors in self._store.collect(self.name, (self.kind,)).items():
+            yield "", self.labelnames, labels, self.aggregate(vector[0] for vector in vectors)
+
+
+class Histogram(Metric):
+    """分桶直方图，每组标签占 [各桶计数..., +Inf 计数, 总和] 连续的单元"""
+
+    type = "histogram"
+    kind = KIND_HISTOGRAM
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.width = len(self.buckets) + 2
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        offset = self._offsets.get(labels)
+        if offset is None:
+            offset = self._offset(labels)
+        cells = self._cells
+        cells[offset + bisect_left(self.buckets, value)] += 1
+        cells[offset + self.width - 1] += value
+
+    def count(self, labels: Labels = ()) -> int:
+        """本进程的观测次数"""
+        offset = self._offsets.get(labels)
+        return 0 if offset is None else int(sum(self._cells[offset:offset + self.width - 1]))
+
+    def samples(self):
+        bucket_names = self.labelnames + ("le",)
+        for labels, series in self._collect().items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                yield "_bucket", bucket_names, labels + (_format_value(bound),), cumulative
+            yield "_sum", self.labelnames, labels, series[-1]
+            yield "_count", self.labelnames, labels, cumulative
+
+
+class Registry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self.store = _local_store
+
+    @property
+    def shared(self) -> bool:
+        return self.store.shared
+
+    def register(self, metric: Metric) -> Metric:
+        metric.bind(self.store)
+        self._metrics[metric.name] = metric
+        return metric
+
+    def use_store(self, store) -> None:
+        """切换所有指标的存储（工作进程 fork 后接管共享内存槽位时调用）"""
+        self.store = store
+        for metric in self._metrics.values():
+            metric.bind(store)
+
+    def publish(self) -> None:
+        """把回调指标的当前值写入共享存储"""
+        for metric in list(self._metrics.values()):
+            if isinstance(metric, CallbackGauge):
+                metric.publish()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+_publisher: Optional[asyncio.Task] = None
+
+
+async def _publish_loop(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        REGISTRY.publish()
+
+
+def start_metrics_publisher(interval: float) -> None:
+    """使用共享存储时定期发布回调指标，其他工作进程响应抓取时读取"""
+    global _publisher
+    REGISTRY.publish()
+    _publisher = asyncio.get_running_loop().create_task(_publish_loop(interval), name="metrics-publisher")
+
+
+async def stop_metrics_publisher() -> None:
+    global _publisher
+    if _publisher is not None:
+        _publisher.cancel()
+        try:
+            await _publisher
+        except asyncio.CancelledError:
+            pass
+        _publisher = None
+
+# HTTP 请求指标
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP 请求总数", ("method", "route", "status")))
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP 请求处理耗时（秒）", ("method", "route")))
+HTTP_REQUESTS_IN_PROGRESS = REGISTRY.register(Gauge(
+    "http_requests_in_progress", "正在处理的 HTTP 请求数", ("method", "route")))
+
+# 数据库指标
+DB_STATEMENT_DURATION = REGISTRY.register(Histogram(
+    "db_statement_duration_seconds", "SQL 语句执行耗时（秒），按规范化语句分组", ("statement",)))
+DB_STATEMENT_ERRORS = REGISTRY.register(Counter(
+    "db_statement_errors_total", "SQL 语句执行失败次数", ("statement",)))
+DB_POOL_CHECKOUT_WAIT = REGISTRY.register(Histogram(
+    "db_pool_checkout_wait_seconds", "获取连接池连接的等待时间（秒）"))
+
+# 密码哈希线程池指标
+BCRYPT_WAIT = REGISTRY.register(Histogram(
+    "bcrypt_pool_wait_seconds", "bcrypt 任务在线程池中排队等待的时间（秒）", ("operation",)))
+BCRYPT_DURATION = REGISTRY.register(Histogram(
+    "bcrypt_duration_seconds", "bcrypt 计算耗时（秒）", ("operation",)))
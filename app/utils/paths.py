@@ -0,0 +1,14 @@
+"""项目路径"""
+import os
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+_PREFIX = str(PROJECT_ROOT) + os.sep
+
+
+def project_relative(filename: str) -> str:
+    """项目内的文件返回相对项目根目录的路径，其他文件原样返回"""
+    if filename.startswith(_PREFIX):
+        return filename[len(_PREFIX):]
+    return filename
@@ -0,0 +1,210 @@
+"""
+按需采样分析器
+管理员为指定路由“布防”后，接下来 N 个匹配的请求会被采样：后台线程按固定间隔读取
+事件循环线程的调用栈，结果保存为折叠栈（collapsed stacks），可导出为 speedscope JSON。
+未布防时中间件只做一次属性判断，没有额外开销。
+"""
+import sys
+import threading
+import uuid
+from collections import Counter, deque
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.utils.paths import project_relative
+from config import settings
+
+# (函数名, 文件, 行号)
+Frame = Tuple[str, str, int]
+
+
+def _frame_key(frame) -> Frame:
+    code = frame.f_code
+    return code.co_name, project_relative(code.co_filename), code.co_firstlineno
+
+
+class StackSampler:
+    """在后台线程中对目标线程按固定间隔采样调用栈"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        """
+        停止采样并返回结果
+
+        在事件循环线程中调用，不等待采样线程退出（守护线程，最多一个采样间隔后自行结束）；
+        加锁保证返回之后不会再有样本写入
+        """
+        with self._lock:
+            self._stop.set()
+        return self.stacks
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_key(frame))
+                frame = frame.f_back
+            with self._lock:
+                if stack and not self._stop.is_set():
+                    # 根帧在前
+                    self.stacks[tuple(reversed(stack))] += 1
+
+
+class Profile:
+    """一次请求的采样结果"""
+
+    def __init__(self, method: str, path: str, route: str, interval: float):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.route = route
+        self.interval = interval
+        self.started_at = datetime.now(timezone.utc)
+        self.duration = 0.0
+        self.status: Optional[int] = None
+        self.stacks: Counter = Counter()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "status": self.status,
+            "samples": sum(self.stacks.values()),
+            "interval_ms": self.interval * 1000,
+        }
+
+    def collapsed(self) -> str:
+        """折叠栈格式（flamegraph.pl / speedscope / py-spy 通用）"""
+        lines = [
+            ";".join(f"{name} ({filename}:{line})" for name, filename, line in stack) + f" {count}"
+            for stack, count in self.stacks.most_common()
+        ]
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self) -> Dict[str, Any]:
+        """speedscope 文件格式（sampled profile）"""
+        index: Dict[Frame, int] = {}
+        frames: List[Dict[str, Any]] = []
+        samples: List[List[int]] = []
+        weights: List[float] = []
+        interval_ms = self.interval * 1000
+        for stack, count in self.stacks.most_common():
+            sample = []
+            for frame in stack:
+                position = index.get(frame)
+                if position is None:
+                    position = index[frame] = len(frames)
+                    name, filename, line = frame
+                    frames.append({"name": name, "file": filename, "line": line})
+                sample.append(position)
+            samples.append(sample)
+            weights.append(count * interval_ms)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"{self.method} {self.path}",
+            "exporter": settings.APP_NAME,
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": f"{self.method} {self.route}",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+
+class RequestProfiler:
+    """
+    请求采样分析器
+
+    同一时刻只采样一个请求；由于所有请求共享事件循环线程，并发请求的代码也可能出现在采样结果中
+    """
+
+    def __init__(self, max_results: int, default_interval_ms: float):
+        self.default_interval = default_interval_ms / 1000
+        self.results: deque = deque(maxlen=max_results)
+        # 未布防时为 0，中间件只检查该值
+        self.remaining = 0
+        self.route: Optional[str] = None
+        self.method: Optional[str] = None
+        self.interval = self.default_interval
+        self._active = False
+
+    def arm(self, route: str, count: int, method: Optional[str] = None,
+            interval_ms: Optional[float] = None) -> None:
+        self.route = route
+        self.method = method.upper() if method else None
+        self.interval = interval_ms / 1000 if interval_ms else self.default_interval
+        self.remaining = count
+        logger.info(f"Profiler armed: {self.method or '*'} {route} x{count}")
+
+    def disarm(self) -> None:
+        self.remaining = 0
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "route": self.route if self.remaining else None,
+            "method": self.method if self.remaining else None,
+            "remaining": self.remaining,
+            "interval_ms": self.interval * 1000,
+        }
+
+    def matches(self, method: str, route: str) -> bool:
+        if self._active or route != self.route:
+            return False
+        return self.method is None or self.method == method
+
+    def start(self, method: str, path: str, route: str) -> Tuple[Profile, StackSampler]:
+        """开始采样当前线程（事件循环线程），并消耗一次布防次数"""
+        self.remaining -= 1
+        self._active = True
+        profile = Profile(method, path, route, self.interval)
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        sampler.start()
+        return profile, sampler
+
+    def finish(self, profile: Profile, sampler: StackSampler, started: float) -> None:
+        profile.stacks = sampler.stop()
+        self._active = False
+        profile.duration = perf_counter() - started
+        self.results.append(profile)
+        logger.info(
+            f"Profiled {profile.method} {profile.path}: {profile.duration * 1000:.1f}ms, "
+            f"{sum(profile.stacks.values())} samples, id={profile.id}"
+        )
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        for profile in self.results:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+    def clear(self) -> None:
+        self.results.clear()
+
+
+request_profiler = RequestProfiler(
+    max_results=settings.PROFILING_MAX_RESULTS,
+    default_interval_ms=settings.PROFILING_SAMPLE_INTERVAL_MS,
+)
@@ -0,0 +1,166 @@
+"""
+GCRA 限流
+每个键只保存一个浮点数（理论到达时间 TAT），period 内最多 limit 次，允许一次性突发 limit 次；
+内存后端按间隔清理已回到满额的键，Redis 后端（需安装 redis）供多 worker 共享状态
+"""
+import math
+from dataclasses import dataclass
+from time import monotonic
+from typing import Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+from loguru import logger
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - 可选依赖
+    aioredis = None
+
+
+class RateLimitResult(NamedTuple):
+    """
+    限流判定结果
+
+    Attributes:
+        allowed: 是否放行
+        remaining: 当前还可立即发出的请求数
+        reset_after: 额度完全恢复的秒数
+        retry_after: 被拒绝时需等待的秒数
+    """
+    allowed: bool
+    remaining: int
+    reset_after: float
+    retry_after: float
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """限流规则：period 秒内最多 limit 次"""
+    method: str
+    route: str
+    limit: int
+    period: float
+
+    @property
+    def interval(self) -> float:
+        return self.period / self.limit
+
+
+def parse_rules(spec: str) -> List[RateLimitRule]:
+    """
+    解析限流规则，如 "POST /api/auth/login=10/60,GET /api/items=120/60,*=600/60"
+
+    方法省略或为 * 时匹配所有方法，路由为 * 时作为未单独配置路由的默认规则
+    """
+    rules = []
+    for part in spec.split(","):
+        target, _, rate = part.strip().partition("=")
+        if not target or not rate:
+            continue
+        method, _, route = target.strip().rpartition(" ")
+        count, _, period = rate.partition("/")
+        limit, seconds = int(count), float(period or 1)
+        if limit <= 0 or seconds <= 0:
+            raise ValueError(f"无效的限流规则: {part.strip()}")
+        rules.append(RateLimitRule((method.strip() or "*").upper(), route.strip(), limit, seconds))
+    return rules
+
+
+def _result(now: float, tat: float, rule: RateLimitRule) -> Tuple[RateLimitResult, Optional[float]]:
+    """按 GCRA 判定，返回结果和新的 TAT（拒绝时为 None）"""
+    interval = rule.interval
+    tat = max(tat, now)
+    new_tat = tat + interval
+    allow_at = new_tat - rule.period
+    if now < allow_at:
+        return RateLimitResult(False, 0, tat - now, allow_at - now), None
+    remaining = int((now - allow_at) / interval + 1e-9)
+    return RateLimitResult(True, remaining, new_tat - now, 0.0), new_tat
+
+
+class MemoryRateLimiter:
+    """
+    进程内限流状态
+
+    Args:
+        sweep_interval: 清理空闲键的间隔（秒）
+    """
+
+    def __init__(self, sweep_interval: float = 60):
+        self.sweep_interval = sweep_interval
+        self._tat: Dict[Hashable, float] = {}
+        self._next_sweep = monotonic() + sweep_interval
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+    def hit(self, key: Hashable, rule: RateLimitRule) -> RateLimitResult:
+        now = monotonic()
+        if now >= self._next_sweep:
+            self.sweep(now)
+        result, new_tat = _result(now, self._tat.get(key, now), rule)
+        if new_tat is not None:
+            self._tat[key] = new_tat
+        return result
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """删除 TAT 已过去（额度已完全恢复）的键，返回删除数"""
+        now = monotonic() if now is None else now
+        idle = [key for key, tat in self._tat.items() if tat <= now]
+        for key in idle:
+            del self._tat[key]
+        self._next_sweep = now + self.sweep_interval
+        return len(idle)
+
+
+# 使用 Redis 服务器时间，多个 worker 的时钟差异不影响判定；数值以字符串返回避免被截断为整数
+_GCRA_SCRIPT = """
+local period = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval
+local allow_at = new_tat - period
+if now < allow_at then
+  return {0, tostring(tat - now), tostring(allow_at - now)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, tostring(now - allow_at), tostring(new_tat - now)}
+"""
+
+
+class RedisRateLimiter:
+    """
+    Redis 共享限流状态，键随额度恢复自动过期；Redis 不可用时放行请求
+
+    Args:
+        url: Redis 连接 URL
+        prefix: 键前缀
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        if aioredis is None:
+            raise RuntimeError("使用 Redis 限流后端需要安装 redis: pip install redis")
+        self.prefix = prefix
+        self._client = aioredis.from_url(url)
+        self._script = self._client.register_script(_GCRA_SCRIPT)
+        self._last_error = 0.0
+
+    async def hit(self, key: Hashable, rule: RateLimitRule) -> RateLimitResult:
+        redis_key = self.prefix + ":".join(str(part) for part in key)
+        try:
+            allowed, first, second = await self._script(keys=[redis_key], args=[rule.period, rule.interval])
+        except Exception as e:
+            now = monotonic()
+            if now - self._last_error >= 60:
+                self._last_error = now
+                logger.warning(f"Redis 限流不可用，暂时放行请求: {e!r}")
+            return RateLimitResult(True, rule.limit, 0.0, 0.0)
+        if int(allowed):
+            slack, reset_after = float(first), float(second)
+            return RateLimitResult(True, int(slack / rule.interval + 1e-9), reset_after, 0.0)
+        return RateLimitResult(False, 0, float(first), math.ceil(float(second) * 1000) / 1000)
+
+    async def close(self) -> None:
+        await self._client.aclose()
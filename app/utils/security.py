@@ -1,10 +1,21 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional, Union, Dict
+from time import perf_counter
+from typing import Any, Callable, Optional, Union, Dict
 from jose import jwt
 import bcrypt
 
+from app.utils.metrics import BCRYPT_DURATION, BCRYPT_WAIT
 from config import settings
 
+# bcrypt 专用线程池，避免哈希计算阻塞事件循环
+_bcrypt_executor = ThreadPoolExecutor(
+    max_workers=settings.BCRYPT_MAX_WORKERS, thread_name_prefix="bcrypt"
+)
+# 已提交但尚未完成的 bcrypt 任务数（仅在事件循环线程中修改）
+_bcrypt_pending = 0
+
 
 def create_access_token(expires_delta: Optional[timedelta] = None,
                         user_info: Optional[Dict[str, Any]] = None) -> str:
@@ -73,3 +84,38 @@ def get_password_hash(password: str) -> str:
     salt = bcrypt.gensalt()
     hashed_password = bcrypt.hashpw(pwd_bytes, salt)
     return hashed_password.decode('utf-8')
+
+
+def bcrypt_pending() -> int:
+    """获取 bcrypt 线程池中排队及执行中的任务数"""
+    return _bcrypt_pending
+
+
+async def _run_bcrypt(operation: str, func: Callable, *args) -> Any:
+    """在 bcrypt 线程池中执行，并记录排队等待时间和计算耗时"""
+    global _bcrypt_pending
+    submitted = perf_counter()
+
+    def run():
+        started = perf_counter()
+        result = func(*args)
+        return started - submitted, perf_counter() - started, result
+
+    _bcrypt_pending += 1
+    try:
+        wait, duration, result = await asyncio.get_running_loop().run_in_executor(_bcrypt_executor, run)
+    finally:
+        _bcrypt_pending -= 1
+    BCRYPT_WAIT.observe(wait, (operation,))
+    BCRYPT_DURATION.observe(duration, (operation,))
+    return result
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """在线程池中验证密码"""
+    return await _run_bcrypt("verify", verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """在线程池中计算密码哈希"""
+    return await _run_bcrypt("hash", get_password_hash, password)
@@ -0,0 +1,185 @@
+"""
+指标存储
+- LocalStore：单进程模式，数值保存在 Python 列表中
+- SharedMetricsRegion：生产模式下主进程在 fork 前创建的匿名共享内存（mmap），每个工作进程一个固定大小的槽位。
+  工作进程只写自己的槽位（单写者，不加锁），任一工作进程都能读取全部槽位汇总后输出 /metrics
+
+槽位布局：
+- 头部：已发布的记录数、键区已用字节、数值区已用单元数、工作进程 pid（0 表示槽位当前无进程）
+- 键区：追加写入的序列记录（数值偏移、宽度、类型、JSON 编码的指标名和标签）
+- 数值区：float64 数组，计数器和直方图各桶直接在其上累加
+新序列先写记录再更新头部的记录数，读者只解析已发布的记录。
+工作进程重启后沿用槽位中已有的序列继续累加，计数器不会因回收工作进程而归零
+"""
+import json
+import mmap
+import struct
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+# 序列类型
+KIND_COUNTER = 0
+KIND_GAUGE = 1
+KIND_HISTOGRAM = 2
+KIND_CALLBACK = 3
+# 只反映存活进程当前状态的类型，进程退出后不再计入汇总，重启时清零
+_LIVE_KINDS = (KIND_GAUGE, KIND_CALLBACK)
+
+_HEADER_SIZE = 64
+_RECORDS, _KEY_BYTES, _CELLS, _PID = range(4)
+_RECORD = struct.Struct("<IIBH")
+# 槽位写满后新序列写入的暂存区，不会出现在汇总结果中
+_SCRATCH_CELLS = 64
+
+Key = Tuple[str, Tuple]
+# 指标名 -> 标签 -> 各进程的数值向量
+Collected = Dict[Tuple, List[Sequence[float]]]
+
+
+class LocalStore:
+    """单进程指标存储"""
+
+    shared = False
+
+    def __init__(self):
+        self.cells: List[float] = []
+        self._series: Dict[str, Dict[Tuple, Tuple[int, int]]] = {}
+
+    def allocate(self, name: str, labels: Tuple, width: int, kind: int) -> int:
+        offset = len(self.cells)
+        self.cells.extend([0] * width)
+        self._series.setdefault(name, {})[labels] = (offset, width)
+        return offset
+
+    def collect(self, name: str, kinds: Iterable[int] = ()) -> Collected:
+        cells = self.cells
+        return {
+            labels: [cells[offset:offset + width]]
+            for labels, (offset, width) in list(self._series.get(name, {}).items())
+        }
+
+
+class SharedMetricsRegion:
+    """
+    跨工作进程共享的指标内存
+
+    Args:
+        slots: 槽位数（工作进程数）
+        slot_size: 每个槽位的字节数，四分之一用于键区，其余为数值区
+    """
+
+    def __init__(self, slots: int, slot_size: int):
+        self.slots = slots
+        self.slot_size = slot_size // 8 * 8
+        self.key_bytes = self.slot_size // 4 // 8 * 8
+        self.cell_count = (self.slot_size - _HEADER_SIZE - self.key_bytes) // 8 - _SCRATCH_CELLS
+        if self.cell_count <= 0:
+            raise ValueError(f"指标槽位过小: {slot_size} 字节")
+        # 匿名映射默认为 MAP_SHARED，fork 后父子进程看到同一块内存
+        self._mmap = mmap.mmap(-1, slots * self.slot_size)
+        view = memoryview(self._mmap)
+        self._headers = []
+        self._keys = []
+        self._cells = []
+        for index in range(slots):
+            base = index * self.slot_size
+            self._headers.append(view[base:base + 32].cast("q"))
+            self._keys.append(view[base + _HEADER_SIZE:base + _HEADER_SIZE + self.key_bytes])
+            self._cells.append(view[base + _HEADER_SIZE + self.key_bytes:base + self.slot_size].cast("d"))
+        # 本进程已解析的记录：槽位 -> (已解析记录数, 键区位置, 指标名 -> [(标签, 偏移, 宽度, 类型)])
+        self._parsed = [(0, 0, {}) for _ in range(slots)]
+
+    def cells(self, index: int) -> memoryview:
+        return self._cells[index]
+
+    def records(self, index: int) -> Dict[str, List[Tuple[Tuple, int, int, int]]]:
+        """槽位中已发布的序列（记录只追加，增量解析）"""
+        parsed, position, series = self._parsed[index]
+        published = self._headers[index][_RECORDS]
+        if parsed < published:
+            keys = self._keys[index]
+            for _ in range(published - parsed):
+                offset, width, kind, length = _RECORD.unpack_from(keys, position)
+                position += _RECORD.size
+                name, labels = json.loads(bytes(keys[position:position + length]))
+                position += length
+                series.setdefault(name, []).append((tuple(labels), offset, width, kind))
+            self._parsed[index] = (published, position, series)
+        return series
+
+    def append(self, index: int, name: str, labels: Tuple, width: int, kind: int) -> Optional[int]:
+        """在槽位中登记新序列，返回数值偏移，槽位已满时返回 None（仅由槽位所属进程调用）"""
+        header = self._headers[index]
+        key = json.dumps([name, labels], ensure_ascii=False, separators=(",", ":")).encode()
+        position, offset = header[_KEY_BYTES], header[_CELLS]
+        if (position + _RECORD.size + len(key) > self.key_bytes or offset + width > self.cell_count
+                or len(key) > 0xFFFF):
+            return None
+        keys = self._keys[index]
+        _RECORD.pack_into(keys, position, offset, width, kind, len(key))
+        keys[position + _RECORD.size:position + _RECORD.size + len(key)] = key
+        header[_KEY_BYTES] = position + _RECORD.size + len(key)
+        header[_CELLS] = offset + width
+        # 最后更新记录数，读者看到计数时记录已完整写入
+        header[_RECORDS] += 1
+        return offset
+
+    def activate(self, index: int, pid: int) -> None:
+        """工作进程接管槽位：清零上一个进程留下的瞬时值"""
+        cells = self._cells[index]
+        for entries in self.records(index).values():
+            for _, offset, width, kind in entries:
+                if kind in _LIVE_KINDS:
+                    for cell in range(offset, offset + width):
+                        cells[cell] = 0.0
+        self._headers[index][_PID] = pid
+
+    def deactivate(self, index: int) -> None:
+        """工作进程退出后由主进程调用，其瞬时值不再计入汇总"""
+        self._headers[index][_PID] = 0
+
+    def collect(self, name: str, kinds: Iterable[int] = ()) -> Collected:
+        live_only = any(kind in _LIVE_KINDS for kind in kinds)
+        result: Collected = {}
+        for index in range(self.slots):
+            if live_only and not self._headers[index][_PID]:
+                continue
+            cells = self._cells[index]
+            for labels, offset, width, _ in self.records(index).get(name, ()):
+                result.setdefault(labels, []).append(cells[offset:offset + width].tolist())
+        return result
+
+
+class SlotStore:
+    """工作进程对自己槽位的读写视图"""
+
+    shared = True
+
+    def __init__(self, region: SharedMetricsRegion, index: int):
+        self.region = region
+        self.index = index
+        self.cells = region.cells(index)
+        # 沿用槽位中已有的序列（同一槽位上此前的工作进程登记的）
+        self._offsets: Dict[Key, int] = {
+            (name, labels): offset
+            for name, entries in region.records(index).items()
+            for labels, offset, _, _ in entries
+        }
+        self._full = False
+
+    def allocate(self, name: str, labels: Tuple, width: int, kind: int) -> int:
+        offset = self._offsets.get((name, labels))
+        if offset is not None:
+            return offset
+        offset = self.region.append(self.index, name, list(labels), width, kind)
+        if offset is None:
+            if not self._full:
+                self._full = True
+                logger.warning(f"共享指标槽位已满，新序列不再计入汇总（首个: {name}{labels}），请调大 METRICS_SHARED_SLOT_KB")
+            return self.region.cell_count
+        self._offsets[(name, labels)] = offset
+        return offset
+
+    def collect(self, name: str, kinds: Iterable[int] = ()) -> Collected:
+        return self.region.collect(name, kinds)
@@ -0,0 +1,55 @@
+"""
+请求级耗时统计
+通过 contextvar 在一次请求内累计数据库语句数量/耗时以及各阶段耗时，用于 Server-Timing 和查询预算
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Dict, Iterator, Optional
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """单个请求执行的 SQL 语句数超过预算"""
+
+
+class RequestTimings:
+    """单个请求的耗时统计"""
+
+    __slots__ = ("start", "db_count", "db_time", "spans", "endpoint_end", "query_budget", "raise_on_budget")
+
+    def __init__(self, query_budget: int = 0, raise_on_budget: bool = False):
+        self.start = perf_counter()
+        self.db_count = 0
+        self.db_time = 0.0
+        self.spans: Dict[str, float] = {}
+        self.endpoint_end: Optional[float] = None
+        self.query_budget = query_budget
+        self.raise_on_budget = raise_on_budget
+
+    def add(self, name: str, duration: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + duration
+
+    def count_query(self) -> None:
+        """记录一条语句，在 raise 模式下超过预算时抛出异常"""
+        self.db_count += 1
+        if self.raise_on_budget and 0 < self.query_budget < self.db_count:
+            raise QueryBudgetExceeded(
+                f"请求执行的 SQL 语句数超过预算 {self.query_budget}，可能存在 N+1 查询"
+            )
+
+
+request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """统计代码块耗时并计入当前请求，未启用时不做任何事"""
+    timings = request_timings.get()
+    if timings is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, perf_counter() - start)
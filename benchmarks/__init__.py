@@ -0,0 +1,5 @@
+"""
+性能基准测试
+- load: 针对进程内 ASGI 应用（或本机 uvicorn）的压测，运行方式: python -m benchmarks.load
+- micro: 各层（Row 转换、模型构造、响应序列化、JWT、Repository）的微基准，运行方式: python -m benchmarks.micro
+"""
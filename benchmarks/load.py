@@ -0,0 +1,185 @@
+"""
+HTTP 压测
+
+默认在进程内通过 httpx.ASGITransport 驱动应用（不经过网络栈），也可以 --uvicorn 启动本机 uvicorn 进程。
+结果以 JSON 输出，并可与基线比较，吞吐量下降或 p99 上升超过阈值时以非零状态码退出。
+
+    python -m benchmarks.load --users 1000 --items 100000 --duration 10 --output result.json
+    python -m benchmarks.load --baseline result.json --threshold 0.1
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.loadgen import ScenarioResult, run_load
+from benchmarks.seed import seed_database
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="HTTP 压测")
+    parser.add_argument("--users", type=int, default=1000, help="用户数")
+    parser.add_argument("--items", type=int, default=10000, help="物品数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--database", type=str, default=None, help="SQLite 文件路径（默认临时目录）")
+    parser.add_argument("--reuse-database", action="store_true", help="数据库已存在时直接使用，不重新生成")
+    parser.add_argument("--scenarios", type=str, default=None, help="逗号分隔的场景名，默认全部")
+    parser.add_argument("--duration", type=float, default=10, help="每个场景的统计时长（秒）")
+    parser.add_argument("--warmup", type=float, default=1, help="每个场景的预热时长（秒）")
+    parser.add_argument("--concurrency", type=int, default=32, help="并发数")
+    parser.add_argument("--uvicorn", action="store_true", help="启动本机 uvicorn 进程而非进程内调用")
+    parser.add_argument("--port", type=int, default=8765, help="uvicorn 端口")
+    parser.add_argument("--output", type=str, default=None, help="结果 JSON 输出路径")
+    parser.add_argument("--baseline", type=str, default=None, help="基线结果 JSON 路径")
+    parser.add_argument("--threshold", type=float, default=0.10, help="回归阈值（比例）")
+    return parser.parse_args(argv)
+
+
+def _benchmark_env(database: str) -> Dict[str, str]:
+    """压测时的应用配置：关闭逐请求日志和调试输出"""
+    return {
+        "DATABASE_URL": f"sqlite:///{database}",
+        "DATABASE_ECHO": "false",
+        "APP_DEBUG": "false",
+        "LOG_LEVEL": "ERROR",
+        "LOG_FILE_ENABLED": "false",
+        "ACCESS_LOG_SAMPLE_RATE": "0",
+        "SERVER_TIMING_ENABLED": "false",
+        "QUERY_BUDGET": "0",
+    }
+
+
+async def _run_scenarios(client: httpx.AsyncClient, args: argparse.Namespace) -> List[ScenarioResult]:
+    from benchmarks.scenarios import build_scenarios, login
+
+    headers = await login(client)
+    scenarios = build_scenarios(args.users, args.items, headers, seed=args.seed)
+    selected = args.scenarios.split(",") if args.scenarios else list(scenarios)
+    unknown = set(selected) - set(scenarios)
+    if unknown:
+        raise SystemExit(f"未知场景: {', '.join(sorted(unknown))}，可选: {', '.join(scenarios)}")
+
+    results = []
+    for name in selected:
+        result = await run_load(name, client, scenarios[name], args.duration, args.concurrency, args.warmup)
+        print(
+            f"{name:<16} {result.rps:>9.1f} req/s  p50 {result.p50:>8.2f}ms  "
+            f"p95 {result.p95:>8.2f}ms  p99 {result.p99:>8.2f}ms  errors {result.errors}",
+            file=sys.stderr,
+        )
+        results.append(result)
+    return results
+
+
+async def _run_in_process(args: argparse.Namespace) -> List[ScenarioResult]:
+    # 配置在导入时读取，必须先设置环境变量再导入应用
+    from app.core.application import create_app
+
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            return await _run_scenarios(client, args)
+
+
+def _wait_for_port(port: int, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.1)
+    raise SystemExit(f"uvicorn 未能在 {timeout} 秒内启动")
+
+
+async def _run_uvicorn(args: argparse.Namespace, env: Dict[str, str]) -> List[ScenarioResult]:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--no-access-log"],
+        cwd=PROJECT_ROOT,
+        env={**os.environ, **env},
+    )
+    try:
+        _wait_for_port(args.port)
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits) as client:
+            return await _run_scenarios(client, args)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], threshold: float) -> List[str]:
+    """
+    与基线比较
+
+    Returns:
+        回归描述列表，为空表示没有回归
+    """
+    previous = {entry["name"]: entry for entry in baseline}
+    regressions = []
+    for current in results:
+        base = previous.get(current["name"])
+        if base is None:
+            continue
+        if base["rps"] and current["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{current['name']}: 吞吐量 {base['rps']} -> {current['rps']} req/s")
+        if base["p99"] and current["p99"] > base["p99"] * (1 + threshold):
+            regressions.append(f"{current['name']}: p99 {base['p99']} -> {current['p99']} ms")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    database = os.path.abspath(args.database or os.path.join(tempfile.gettempdir(), "fastapi-benchmark.db"))
+    env = _benchmark_env(database)
+    # 生成数据时就会读取配置（app.db.datagen 导入 config），必须先设置环境变量
+    os.environ.update(env)
+    if not (args.reuse_database and os.path.exists(database)):
+        started = time.perf_counter()
+        seed_database(database, args.users, args.items, seed=args.seed)
+        print(f"生成数据库 {database}: {args.users} 用户, {args.items} 物品, "
+              f"{time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    if args.uvicorn:
+        results = asyncio.run(_run_uvicorn(args, env))
+    else:
+        results = asyncio.run(_run_in_process(args))
+
+    report = {
+        "target": "uvicorn" if args.uvicorn else "asgi",
+        "users": args.users,
+        "items": args.items,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "python": sys.version.split()[0],
+        "results": [result.to_dict() for result in results],
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(report["results"], baseline["results"], args.threshold)
+        for line in regressions:
+            print(f"回归: {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+asyncio 负载生成器
+固定并发的 worker 在给定时长内循环发送请求，统计吞吐量和延迟分位数
+"""
+import asyncio
+from dataclasses import asdict, dataclass
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+
+RequestFn = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+@dataclass
+class ScenarioResult:
+    """单个场景的统计结果（延迟单位为毫秒）"""
+
+    name: str
+    requests: int
+    errors: int
+    duration: float
+    rps: float
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """最近秩法分位数，sorted_values 需已排序"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+async def run_load(
+    name: str,
+    client: httpx.AsyncClient,
+    request: RequestFn,
+    duration: float,
+    concurrency: int,
+    warmup: float = 1.0,
+) -> ScenarioResult:
+    """
+    运行一个场景
+
+    Args:
+        name: 场景名称
+        client: HTTP 客户端（进程内 ASGITransport 或真实服务）
+        request: 发送一次请求的协程函数，参数为 (client, 序号)
+        duration: 统计时长（秒）
+        concurrency: 并发 worker 数
+        warmup: 预热时长（秒），期间的请求不计入统计
+    """
+    latencies: List[float] = []
+    errors = 0
+    counter = 0
+    recording = False
+
+    async def worker(deadline: float) -> None:
+        nonlocal errors, counter
+        while perf_counter() < deadline:
+            counter += 1
+            sequence = counter
+            start = perf_counter()
+            try:
+                response = await request(client, sequence)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            elapsed = perf_counter() - start
+            if recording:
+                latencies.append(elapsed)
+                errors += failed
+
+    if warmup > 0:
+        await asyncio.gather(*(worker(perf_counter() + warmup) for _ in range(concurrency)))
+
+    recording = True
+    started = perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(worker(deadline) for _ in range(concurrency)))
+    elapsed = perf_counter() - started
+
+    latencies.sort()
+    to_ms = 1000
+    return ScenarioResult(
+        name=name,
+        requests=len(latencies),
+        errors=errors,
+        duration=round(elapsed, 3),
+        rps=round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        mean=round(sum(latencies) / len(latencies) * to_ms, 3) if latencies else 0.0,
+        p50=round(percentile(latencies, 0.50) * to_ms, 3),
+        p95=round(percentile(latencies, 0.95) * to_ms, 3),
+        p99=round(percentile(latencies, 0.99) * to_ms, 3),
+        max=round(latencies[-1] * to_ms, 3) if latencies else 0.0,
+    )
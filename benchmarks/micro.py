@@ -0,0 +1,256 @@
+"""
+分层微基准测试
+
+分别测量各层在不同行数下的开销：Row -> dict 转换、Pydantic 模型构造、响应序列化、
+JWT 解码以及 ItemRepository 单条语句耗时。每个用例自动确定循环次数并重复多次，
+取最小值和中位数，结果以 JSON 输出，可与上一次结果（--baseline）对比。
+
+    python -m benchmarks.micro --rows 100,1000 --output micro.json
+    python -m benchmarks.micro --baseline micro.json
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import timeit
+from dataclasses import dataclass
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.seed import seed_database
+
+
+@dataclass
+class Case:
+    """一个测量用例，func 为无参函数或协程函数，rows 为每次调用处理的行数"""
+
+    group: str
+    name: str
+    rows: int
+    func: Callable[[], Any]
+    is_async: bool = False
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="分层微基准测试")
+    parser.add_argument("--rows", type=str, default="1,100,1000", help="逗号分隔的行数")
+    parser.add_argument("--groups", type=str, default=None, help="逗号分隔的分组，默认全部")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数")
+    parser.add_argument("--min-time", type=float, default=0.2, help="单次重复的最短时长（秒）")
+    parser.add_argument("--database", type=str, default=None, help="SQLite 文件路径（默认临时目录）")
+    parser.add_argument("--output", type=str, default=None, help="结果 JSON 输出路径")
+    parser.add_argument("--baseline", type=str, default=None, help="上一次结果 JSON 路径")
+    return parser.parse_args(argv)
+
+
+def _time_sync(func: Callable[[], Any], repeat: int, min_time: float) -> List[float]:
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        if timer.timeit(number) >= min_time / 5:
+            break
+        number *= 2
+    return [elapsed / number for elapsed in timer.repeat(repeat, number)]
+
+
+async def _time_async(func: Callable[[], Any], repeat: int, min_time: float) -> List[float]:
+    async def run(number: int) -> float:
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            start = perf_counter()
+            for _ in range(number):
+                await func()
+            return perf_counter() - start
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    number = 1
+    while await run(number) < min_time / 5:
+        number *= 2
+    return [await run(number) / number for _ in range(repeat)]
+
+
+# 语句用例共用的数据库连接
+_shared: Dict[str, Any] = {}
+
+
+def build_cases(rows_list: List[int], database: str) -> List[Case]:
+    """构造所有用例（应用模块在此处导入，保证数据库配置已生效）"""
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_model_field
+    from jose import jwt
+    from sqlalchemy import create_engine, text
+
+    from app.db.repositories.item_repository import ItemRepository
+    from app.db.session import engine
+    from app.schemas.item import Item, ItemResponse
+    from app.schemas.response import ApiResponse, success_response
+    from app.schemas.token import TokenPayload
+    from app.schemas.user import UserPublic, UserResponse
+    from app.utils.security import create_access_token
+    from config import settings
+
+    max_rows = max(rows_list)
+    sync_engine = create_engine(f"sqlite:///{database}")
+    with sync_engine.connect() as conn:
+        item_rows = conn.execute(text("SELECT * FROM items ORDER BY id LIMIT :n"), {"n": max_rows}).fetchall()
+        user_rows = conn.execute(text("SELECT * FROM users ORDER BY id LIMIT :n"), {"n": max_rows}).fetchall()
+    sync_engine.dispose()
+
+    item_dicts = [dict(row._mapping) for row in item_rows]
+    user_dicts = [dict(row._mapping) for row in user_rows]
+    response_field = create_model_field("Response", ApiResponse[List[ItemResponse]], mode="serialization")
+    token = create_access_token(user_info={"id": 1, "username": "bench_admin", "email": "bench_admin@example.com"})
+
+    async def serialize(items: list) -> bytes:
+        # 与 FastAPI 端点返回 success_response 后的处理一致：按 response_model 校验、序列化并渲染 JSON
+        content = await serialize_response(field=response_field, response_content=success_response(data=items))
+        return JSONResponse(content).body
+
+    async def connection():
+        # 语句用例共用一个连接，只测量语句本身（连接获取单独测量）
+        if "conn" not in _shared:
+            _shared["conn"] = await engine.connect()
+        return _shared["conn"]
+
+    def decode_token() -> TokenPayload:
+        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        return TokenPayload(**payload)
+
+    cases: List[Case] = [Case("jwt", "jwt.decode + TokenPayload", 1, decode_token)]
+
+    for rows in rows_list:
+        items, users = item_rows[:rows], user_rows[:rows]
+        dicts, udicts = item_dicts[:rows], user_dicts[:rows]
+        models = [Item(**data) for data in dicts]
+        ids = [data["id"] for data in dicts]
+
+        cases += [
+            Case("row", "dict(row._mapping)", rows, lambda items=items: [dict(row._mapping) for row in items]),
+            Case("row", "row._asdict()", rows, lambda items=items: [row._asdict() for row in items]),
+            Case("model", "Item(**data)", rows, lambda dicts=dicts: [Item(**data) for data in dicts]),
+            Case("model", "ItemResponse.model_validate", rows,
+                 lambda dicts=dicts: [ItemResponse.model_validate(data) for data in dicts]),
+            Case("model", "UserResponse(**data) [EmailStr]", len(udicts),
+                 lambda udicts=udicts: [UserResponse(**data) for data in udicts]),
+            Case("model", "UserPublic(**data)", len(udicts),
+                 lambda udicts=udicts: [UserPublic(**data) for data in udicts]),
+            Case("response", "success_response + ApiResponse[List[ItemResponse]]", rows,
+                 lambda models=models: serialize(models), is_async=True),
+        ]
+
+        async def get_all(rows=rows):
+            return await ItemRepository(await connection()).get_all(limit=rows)
+
+        async def get_many(ids=ids):
+            return await ItemRepository(await connection()).get_many(ids)
+
+        cases += [
+            Case("repository", "ItemRepository.get_all", rows, get_all, is_async=True),
+            Case("repository", "ItemRepository.get_many", rows, get_many, is_async=True),
+        ]
+
+    async def get_by_id():
+        return await ItemRepository(await connection()).get_by_id(1)
+
+    async def connect():
+        async with engine.connect() as conn:
+            return conn
+
+    cases += [
+        Case("repository", "ItemRepository.get_by_id", 1, get_by_id, is_async=True),
+        Case("repository", "engine.connect()", 1, connect, is_async=True),
+    ]
+    return cases
+
+
+async def _close_shared() -> None:
+    conn = _shared.pop("conn", None)
+    if conn is not None:
+        await conn.close()
+
+
+def run_cases(cases: List[Case], repeat: int, min_time: float) -> List[Dict[str, Any]]:
+    results = []
+    loop = asyncio.new_event_loop()
+    try:
+        for case in cases:
+            if case.is_async:
+                timings = loop.run_until_complete(_time_async(case.func, repeat, min_time))
+            else:
+                timings = _time_sync(case.func, repeat, min_time)
+            best, median = min(timings), statistics.median(timings)
+            result = {
+                "group": case.group,
+                "name": case.name,
+                "rows": case.rows,
+                "best_us": round(best * 1e6, 3),
+                "median_us": round(median * 1e6, 3),
+                "per_row_ns": round(best / max(case.rows, 1) * 1e9, 1),
+            }
+            print(
+                f"{case.group:<11} {case.name:<52} rows={case.rows:<6} "
+                f"best {result['best_us']:>12.2f}us  per row {result['per_row_ns']:>10.1f}ns",
+                file=sys.stderr,
+            )
+            results.append(result)
+    finally:
+        loop.run_until_complete(_close_shared())
+        loop.close()
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]]) -> None:
+    """打印与上一次结果相比的变化（按 best 计算）"""
+    previous = {(entry["name"], entry["rows"]): entry for entry in baseline}
+    for current in results:
+        base = previous.get((current["name"], current["rows"]))
+        if base is None or not base["best_us"]:
+            continue
+        change = (current["best_us"] - base["best_us"]) / base["best_us"] * 100
+        print(f"{current['name']:<52} rows={current['rows']:<6} {change:+7.1f}%", file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    rows_list = sorted({int(value) for value in args.rows.split(",")})
+
+    database = os.path.abspath(args.database or os.path.join(tempfile.gettempdir(), "fastapi-micro.db"))
+
+    # 配置在首次导入 config 时读取（生成数据时就会导入），必须先设置环境变量
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{database}",
+        "DATABASE_ECHO": "false",
+        "LOG_LEVEL": "ERROR",
+        "LOG_FILE_ENABLED": "false",
+        "SLOW_QUERY_THRESHOLD_MS": "0",
+    })
+    seed_database(database, users=max(rows_list), items=max(rows_list))
+    cases = build_cases(rows_list, database)
+    if args.groups:
+        groups = set(args.groups.split(","))
+        cases = [case for case in cases if case.group in groups]
+
+    results = run_cases(cases, args.repeat, args.min_time)
+    report = {"python": sys.version.split()[0], "results": results}
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+    if args.baseline:
+        compare(results, json.loads(Path(args.baseline).read_text(encoding="utf-8"))["results"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
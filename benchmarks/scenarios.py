@@ -0,0 +1,70 @@
+"""
+压测场景
+每个场景是一个 (client, 序号) -> Response 的协程函数，由 build_scenarios 根据数据规模生成
+"""
+import random
+from typing import Dict
+
+import httpx
+
+from benchmarks.loadgen import RequestFn
+from benchmarks.seed import ADMIN_USERNAME, PASSWORD
+
+PAGE_SIZE = 20
+
+
+async def login(client: httpx.AsyncClient, username: str = ADMIN_USERNAME) -> Dict[str, str]:
+    """登录并返回认证头"""
+    response = await client.post("/api/auth/login", data={"username": username, "password": PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
+
+
+def build_scenarios(users: int, items: int, headers: Dict[str, str], seed: int = 42) -> Dict[str, RequestFn]:
+    """
+    生成场景
+
+    Args:
+        users: 数据库中的用户数
+        items: 数据库中的物品数（压测开始时）
+        headers: 管理员认证头
+        seed: 随机种子
+    """
+    rng = random.Random(seed)
+    items = max(items, 1)
+    # 深分页从后半段开始
+    deep_start = max(items // 2, 0)
+
+    async def item_read(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        return await client.get(f"/api/items/{rng.randint(1, items)}")
+
+    async def item_list(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        return await client.get("/api/items", params={"limit": PAGE_SIZE})
+
+    async def auth_user_read(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        return await client.get(f"/api/users/{rng.randint(1, users)}", headers=headers)
+
+    async def auth_item_list(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        return await client.get("/api/items", params={"limit": PAGE_SIZE, "expand": "owner"}, headers=headers)
+
+    async def login_request(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        username = ADMIN_USERNAME if users == 1 else f"user{rng.randint(1, users - 1)}"
+        return await client.post("/api/auth/login", data={"username": username, "password": PASSWORD})
+
+    async def item_create(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        payload = {"title": f"Bench {i}", "description": "created by benchmark", "price": 9.99}
+        return await client.post("/api/items", json=payload, headers=headers)
+
+    async def deep_pagination(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        skip = rng.randint(deep_start, max(items - PAGE_SIZE, deep_start))
+        return await client.get("/api/items", params={"skip": skip, "limit": PAGE_SIZE})
+
+    return {
+        "item_read": item_read,
+        "item_list": item_list,
+        "auth_user_read": auth_user_read,
+        "auth_item_list": auth_item_list,
+        "login": login_request,
+        "item_create": item_create,
+        "deep_pagination": deep_pagination,
+    }
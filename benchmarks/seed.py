@@ -0,0 +1,50 @@
+"""
+基准测试数据库准备
+使用 app.db.datagen 批量写入用户和物品并重建所有者统计，所有用户共用同一个预先计算的 bcrypt 哈希。
+导入 app.db.datagen 会读取配置，因此在 seed_database 内导入，调用方可以先设置环境变量
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+# 基准测试账号（第一个用户为管理员，其余为 user1、user2 ...），所有用户密码相同
+ADMIN_USERNAME = "bench_admin"
+PASSWORD = "benchmark123"
+
+_START = datetime(2024, 1, 1)
+_SPAN = timedelta(days=365)
+
+
+def _username(offset: int) -> str:
+    return ADMIN_USERNAME if offset == 0 else f"user{offset}"
+
+
+def seed_database(path: str, users: int, items: int, seed: int = 42) -> None:
+    """
+    重新创建 SQLite 数据库并写入数据
+
+    Args:
+        path: 数据库文件路径
+        users: 用户数（至少为 1，第一个用户为管理员）
+        items: 物品数，所有者在用户中均匀分布
+        seed: 随机种子，相同参数生成相同数据
+    """
+    from app.db.datagen import DataGenerator, hash_passwords
+
+    db_file = Path(path)
+    if db_file.exists():
+        db_file.unlink()
+
+    engine = create_engine(f"sqlite:///{db_file}")
+    generator = DataGenerator(engine, seed=seed)
+    try:
+        generator.ensure_schema()
+        # 登录场景需要所有账号可用，不生成停用用户
+        generator.generate_users(max(users, 1), hash_passwords(PASSWORD, 1, 1), _START, _SPAN,
+                                 usernames=_username, inactive_rate=0)
+        if items:
+            generator.generate_items(items, 0, _START, _SPAN)
+            generator.rebuild_owner_stats()
+    finally:
+        engine.dispose()
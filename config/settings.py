@@ -15,17 +15,132 @@ class Settings(BaseSettings):
     APP_HOST: str = "0.0.0.0"
     APP_PORT: int = 8000
 
+    # 生产模式进程管理配置（python run.py --prod）
+    SERVER_WORKERS: int = 0  # 工作进程数，0 表示按可用 CPU 数（考虑 cgroup 配额）
+    SERVER_MAX_REQUESTS: int = 0  # 工作进程处理多少个请求后重启，0 表示不限
+    SERVER_MAX_REQUESTS_JITTER: int = 0  # 重启请求数的随机增量上限，避免所有进程同时重启
+    SERVER_MAX_RSS_MB: int = 0  # 工作进程常驻内存上限（MB），超过后回收，0 表示不检查
+    SERVER_KEEPALIVE_SECONDS: int = 5  # HTTP keep-alive 空闲超时
+    SERVER_BACKLOG: int = 2048  # 监听队列长度
+    SERVER_LIMIT_CONCURRENCY: int = 0  # 每个工作进程的最大连接数，超出返回 503，0 表示不限
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: float = 30  # 优雅退出的最长等待时间
+
     # 数据库配置
     DATABASE_URL: str = "sqlite:///./app.db"
-    DATABASE_ECHO: bool = True
+    DATABASE_ECHO: bool = False
+    DATABASE_POOL_SIZE: int = 5  # 连接池常驻连接数，启动预热时全部打开
+    DATABASE_MAX_OVERFLOW: int = 10  # 超出常驻连接数后最多额外创建的连接数
+    DATABASE_POOL_TIMEOUT: float = 30  # 等待空闲连接的超时时间（秒）
+    WARMUP_ENABLED: bool = True  # 启动时预热连接池、语句和响应序列化
+
+    # 健康探测配置（/livez、/readyz、/api/health 读取后台探测的缓存结果）
+    HEALTH_CHECK_INTERVAL_SECONDS: float = 5  # 后台检查数据库的间隔
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 2  # 单次数据库检查超时
+    READINESS_MAX_POOL_USAGE: float = 1.0  # 已借出连接占连接池容量的比例达到该值时未就绪
+    READINESS_MAX_BCRYPT_PENDING: int = 32  # 等待中的 bcrypt 任务数达到该值时未就绪，0 表示不检查
+    READINESS_MAX_LOOP_LAG_MS: float = 0  # 事件循环延迟达到该值时未就绪，0 表示不检查
 
     # JWT配置
     JWT_SECRET_KEY: str = "your-secret-key-change-in-production"
     JWT_ALGORITHM: str = "HS256"
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24
 
+    # 准入控制配置（探针、健康检查和指标端点不受限制）
+    ADMISSION_ENABLED: bool = False
+    ADMISSION_LIMITS: str = "read=64,write=16,login=8,admin=4"  # 各分组并发上限，未列出的分组不限制
+    ADMISSION_MAX_QUEUE: int = 64  # 每个分组最多排队的请求数，超出直接返回 503
+    ADMISSION_QUEUE_TIMEOUT_MS: float = 500  # 排队最长等待时间（毫秒），超时返回 503
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1  # 503 响应的 Retry-After
+    ADMISSION_ADAPTIVE: bool = False  # 按请求耗时自动调整并发上限（AIMD），ADMISSION_LIMITS 作为上界
+    ADMISSION_TARGET_LATENCY_MS: float = 200  # 自适应调整的目标耗时（毫秒）
+    ADMISSION_MIN_LIMIT: int = 2  # 自适应调整时的最小并发上限
+
+    # 限流配置（GCRA，身份为令牌中的用户 ID，没有有效令牌时为客户端 IP）
+    RATE_LIMIT_ENABLED: bool = False
+    RATE_LIMITS: str = "POST /api/auth/login=10/60"  # "[方法] 路由模板=次数/秒数"，逗号分隔，路由为 * 时作为默认规则
+    RATE_LIMIT_REDIS_URL: str = ""  # 多 worker 共享限流状态（需安装 redis），为空时使用进程内存储
+    RATE_LIMIT_SWEEP_INTERVAL_SECONDS: float = 60  # 进程内存储清理空闲键的间隔
+    RATE_LIMIT_TRUST_FORWARDED: bool = False  # 使用 X-Forwarded-For 识别客户端 IP（仅在可信代理之后开启）
+
+    # 请求截止时间配置（超时后取消数据库语句并返回 504）
+    REQUEST_DEADLINE_MS: float = 0  # 默认截止时间（毫秒），0 表示不设置（按需开启，设置后每条语句多一个 Task）
+    REQUEST_DEADLINES: str = ""  # 按路由覆盖，"[方法] 路由模板=毫秒"，逗号分隔，如 "GET /api/items=2000"
+
+    # 事件循环阻塞监控配置
+    LOOP_MONITOR_ENABLED: bool = True  # 持续采样事件循环调度延迟（event_loop_lag_seconds 直方图）
+    LOOP_MONITOR_INTERVAL_MS: float = 100  # 采样间隔（毫秒）
+    LOOP_BLOCK_THRESHOLD_MS: float = 200  # 阻塞超过该时间时记录事件循环线程的调用栈，0 表示不记录
+    LOOP_BLOCK_BUDGET_MS: float = 0  # 开发模式：请求阻塞事件循环超过该时间时抛出异常（仅非生产环境），0 表示关闭
+
+    # 后台任务配置
+    JOBS_ENABLED: bool = True  # 在应用生命周期内领取并执行 jobs 表中的后台任务
+    JOB_CONCURRENCY: str = "*=2"  # 每种任务在每个进程内的并发数，如 "purge_user=1,*=2"
+    JOB_POLL_INTERVAL_SECONDS: float = 1  # 没有任务时的轮询间隔（本进程加入任务时立即唤醒）
+    JOB_LEASE_SECONDS: float = 300  # 任务租约，进程崩溃后超过该时间任务被重新领取
+    JOB_MAX_ATTEMPTS: int = 5  # 默认最多执行次数
+    JOB_RETRY_BACKOFF_SECONDS: float = 5  # 第一次重试的等待时间，之后每次翻倍
+    JOB_RETRY_BACKOFF_MAX_SECONDS: float = 600  # 重试等待时间上限
+    JOB_RETENTION_HOURS: float = 24  # 已成功任务的保留时间
+    USER_PURGE_CHUNK_SIZE: int = 1000  # 删除用户时每个事务删除的物品数
+    USER_PURGE_PAUSE_MS: float = 10  # 删除用户时每块之间让出写锁的时间（毫秒）
+
+    # 密码哈希配置
+    BCRYPT_MAX_WORKERS: int = 4  # bcrypt 专用线程池大小
+
+    # 指标配置
+    METRICS_ENABLED: bool = True  # 启用 /metrics 及请求、数据库指标采集
+    METRICS_SHARED_SLOT_KB: int = 1024  # 生产模式下每个工作进程的共享指标内存（KB），0 表示 /metrics 只输出所在进程的指标
+    METRICS_PUBLISH_INTERVAL_SECONDS: float = 5  # 共享指标时发布连接池、缓存等回调指标的间隔
+
+    # Server-Timing 与查询预算配置
+    SERVER_TIMING_ENABLED: bool = False  # 输出 Server-Timing 响应头
+    QUERY_BUDGET: int = 0  # 单个请求允许的 SQL 语句数，0 表示不检查（仅非生产环境生效）
+    QUERY_BUDGET_ACTION: str = "warn"  # 超出预算时的处理: warn / raise
+
+    # 按需采样配置
+    PROFILING_ENABLED: bool = True  # 允许管理员布防采样，未布防时无开销
+    PROFILING_SAMPLE_INTERVAL_MS: float = 1.0  # 默认采样间隔（毫秒）
+    PROFILING_MAX_RESULTS: int = 20  # 内存中保留的采样结果数
+
+    # 内存分析配置
+    MEMORY_PROFILING_ENABLED: bool = True  # 允许管理员启动 tracemalloc，未启动时无开销
+    MEMORY_PROFILING_MAX_SNAPSHOTS: int = 10  # 内存中保留的快照数
+
+    # 慢查询日志配置
+    SLOW_QUERY_THRESHOLD_MS: float = 200  # 慢查询阈值（毫秒），0 表示关闭
+    SLOW_QUERY_EXPLAIN: bool = True  # 记录慢查询时获取执行计划
+    SLOW_QUERY_LOG_INTERVAL_SECONDS: float = 60  # 同一语句两次记录的最小间隔
+    SLOW_QUERY_BUFFER_SIZE: int = 200  # 保留的慢查询记录数
+
+    # 批量查询配置
+    BATCH_LOOKUP_MAX_IDS: int = 100  # 单次按 ID 批量查询的最大数量
+
     # 日志配置
     LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = False  # 输出单行 JSON 格式
+    LOG_ENQUEUE: bool = True  # 由后台线程写日志，请求路径上不做 I/O
+    LOG_FILE_ENABLED: bool = True  # 同时写入 logs/app.log
+    LOG_SAMPLING: str = ""  # 按 logger 采样，如 "uvicorn.access=0.1,app.db=0.5"（仅作用于 WARNING 以下）
+    LOG_RATE_LIMIT_PER_SECOND: int = 0  # 每个 logger 每秒最多输出条数，0 表示不限
+
+    # 访问日志配置
+    ACCESS_LOG_ENABLED: bool = True  # 启用后关闭 uvicorn 自带的访问日志
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0  # 成功请求的采样比例，错误和慢请求始终记录
+    ACCESS_LOG_SLOW_MS: float = 1000  # 慢请求阈值（毫秒）
+    REQUEST_ID_HEADER: str = "X-Request-ID"
+
+    # 响应压缩配置（brotli / zstd 需要额外安装 brotli、zstandard）
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # 小于该字节数的响应不压缩
+    COMPRESSION_THREADPOOL_MIN_SIZE: int = 64 * 1024  # 大于该字节数的响应在线程池中压缩
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    COMPRESSION_CACHE_MAX_BYTES: int = 16 * 1024 * 1024  # 压缩结果缓存上限（按强 ETag 复用），0 表示关闭
+
+    # ETag 与条件请求配置（按响应体摘要生成强 ETag，压缩缓存以其为键）
+    ETAG_ENABLED: bool = True
+    ETAG_ROUTES: str = "/api/items,/api/items/{item_id}"  # 路由模板，逗号分隔
 
     # 验证环境
     @field_validator("APP_ENV")
@@ -34,6 +149,12 @@ class Settings(BaseSettings):
             raise ValueError(f"APP_ENV must be one of 'development', 'production', or 'testing', got '{v}'")
         return v
 
+    @field_validator("QUERY_BUDGET_ACTION")
+    def validate_query_budget_action(v: str) -> str:
+        if v not in ["warn", "raise"]:
+            raise ValueError(f"QUERY_BUDGET_ACTION must be one of 'warn' or 'raise', got '{v}'")
+        return v
+
     # 从.env文件读取配置
     model_config = SettingsConfigDict(
         env_file=".env",
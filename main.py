@@ -1,12 +1,16 @@
-import uvicorn
 from app.core.application import create_app
+from config import settings
 
 app = create_app()
 
 if __name__ == "__main__":
+    # 仅直接运行时需要，作为 ASGI 应用被导入时不加载
+    import uvicorn
+
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
         reload=True,
-    ) 
\ No newline at end of file
+        access_log=not settings.ACCESS_LOG_ENABLED,
+    )
@@ -1,23 +1,69 @@
 import os
 import argparse
+from typing import List, Optional
+
 import uvicorn
-from config import settings
 
-def main():
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     """
-    运行应用的入口点
+    解析命令行参数并设置 APP_ENV
+
+    配置在首次导入 config 时读取，因此这里不导入 config，默认值在导入之后再填充
     """
     parser = argparse.ArgumentParser(description="FastAPI应用运行脚本")
-    parser.add_argument("--host", type=str, default=settings.APP_HOST, help="主机地址")
-    parser.add_argument("--port", type=int, default=settings.APP_PORT, help="端口号")
+    parser.add_argument("--host", type=str, default=None, help="主机地址（默认 APP_HOST）")
+    parser.add_argument("--port", type=int, default=None, help="端口号（默认 APP_PORT）")
     parser.add_argument("--reload", action="store_true", help="是否热重载")
-    parser.add_argument("--workers", type=int, default=1, help="工作进程数")
-    parser.add_argument("--env", type=str, default=settings.APP_ENV, help="环境:development/production/testing")
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数（--prod 默认按可用 CPU 数）")
+    parser.add_argument("--prod", action="store_true", help="生产模式：预加载应用后 fork 工作进程并由主进程管理")
+    parser.add_argument("--env", type=str, default=None,
+                        help="环境:development/production/testing（--prod 默认 production）")
+    
+    args = parser.parse_args(argv)
+    
+    # 设置环境变量（未指定时沿用 APP_ENV 或 .env 中的配置）
+    if args.env is None and args.prod:
+        args.env = "production"
+    if args.env is not None:
+        os.environ["APP_ENV"] = args.env
+    return args
+
+
+def main():
+    """
+    运行应用的入口点
+    """
+    args = parse_args()
+    
+    from config import settings
     
-    args = parser.parse_args()
+    if args.host is None:
+        args.host = settings.APP_HOST
+    if args.port is None:
+        args.port = settings.APP_PORT
     
-    # 设置环境变量
-    os.environ["APP_ENV"] = args.env
+    if args.prod:
+        # 先在主进程中导入应用，工作进程 fork 后共享已加载的模块
+        from app.core.server import serve
+        from main import app
+        
+        serve(
+            app,
+            host=args.host,
+            port=args.port,
+            workers=args.workers if args.workers is not None else settings.SERVER_WORKERS,
+            max_requests=settings.SERVER_MAX_REQUESTS,
+            max_requests_jitter=settings.SERVER_MAX_REQUESTS_JITTER,
+            max_rss_mb=settings.SERVER_MAX_RSS_MB,
+            graceful_timeout=settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+            metrics_slot_kb=settings.METRICS_SHARED_SLOT_KB if settings.METRICS_ENABLED else 0,
+            timeout_keep_alive=settings.SERVER_KEEPALIVE_SECONDS,
+            backlog=settings.SERVER_BACKLOG,
+            limit_concurrency=settings.SERVER_LIMIT_CONCURRENCY or None,
+            access_log=not settings.ACCESS_LOG_ENABLED,
+        )
+        return
     
     # 运行应用
     uvicorn.run(
@@ -25,8 +71,9 @@ def main():
         host=args.host,
         port=args.port,
         reload=args.reload,
-        workers=args.workers if not args.reload else 1,
+        workers=(args.workers or 1) if not args.reload else 1,
+        access_log=not settings.ACCESS_LOG_ENABLED,
     )
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
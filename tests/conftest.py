@@ -1,85 +1,102 @@
 import asyncio
 import os
-from typing import AsyncGenerator, Generator
+import shutil
+import tempfile
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Generator
+
+# 应用在导入时根据配置创建数据库引擎，测试配置需在导入 app 之前设置
+TEST_DIR = Path(tempfile.mkdtemp(prefix="fastapi-template-tests-"))
+TEST_DB_PATH = TEST_DIR / "test.db"
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DB_PATH}"
+os.environ["APP_ENV"] = "testing"
+os.environ["LOG_FILE_ENABLED"] = "False"
+os.environ["LOG_ENQUEUE"] = "False"
+os.environ["LOG_LEVEL"] = "WARNING"
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
 from app.core.application import create_app
-from app.db.session import Base, get_db
+from app.db.init_db import init_database
 from config import settings
 
-# 测试数据库URL
-TEST_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
-
-# 设置测试数据库
-engine = create_async_engine(
-    TEST_DATABASE_URL,
-    echo=False,
-    future=True,
-)
-TestSessionLocal = sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-)
-
-
-@pytest.fixture(scope="session")
-def event_loop() -> Generator:
-    """创建事件循环"""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
-
-
-async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
-    """测试数据库会话"""
-    db = TestSessionLocal()
-    try:
-        yield db
-    finally:
-        await db.close()
-
-
-@pytest.fixture(scope="session")
-async def test_db() -> AsyncGenerator[AsyncSession, None]:
-    """创建测试数据库"""
-    # 创建数据库表
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
-        await conn.run_sync(Base.metadata.create_all)
-    
-    # 提供测试数据库会话
-    db = TestSessionLocal()
-    try:
-        yield db
-    finally:
-        await db.close()
-        
-    # 清理
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
-    
-    await engine.dispose()
-
-
-@pytest.fixture(scope="function")
-async def client(test_db: AsyncSession) -> Generator:
-    """创建测试客户端"""
-    # 设置测试环境
-    os.environ["TESTING"] = "True"
-    
-    # 创建应用
-    app = create_app()
-    
-    # 覆盖依赖
-    app.dependency_overrides[get_db] = override_get_db
-    
-    # 创建测试客户端
-    with TestClient(app) as test_client:
-        yield test_client 
\ No newline at end of file
+ClientFactory = Callable[..., TestClient]
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
+
+
+def _reset_database() -> None:
+    """删除测试数据库文件，应用启动时按 schema.sql 重建"""
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        path = Path(f"{TEST_DB_PATH}{suffix}")
+        if path.exists():
+            path.unlink()
+
+
+def run_with_engine(fn: Callable[[AsyncEngine], Awaitable[Any]]) -> Any:
+    """在新的事件循环中用按 schema.sql 初始化的空数据库运行 fn(engine)，用于不经过 HTTP 的测试"""
+    async def main():
+        _reset_database()
+        engine = create_async_engine(f"sqlite+aiosqlite:///{TEST_DB_PATH}")
+        try:
+            await init_database(engine)
+            return await fn(engine)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def make_client(monkeypatch) -> Generator[ClientFactory, None, None]:
+    """
+    按配置覆盖创建测试客户端，如 make_client(RATE_LIMIT_ENABLED=True)
+
+    每个测试使用空数据库，客户端在测试结束时关闭（触发应用关闭事件）
+    """
+    stack = ExitStack()
+
+    def factory(**overrides) -> TestClient:
+        for name, value in overrides.items():
+            monkeypatch.setattr(settings, name, value)
+        _reset_database()
+        return stack.enter_context(TestClient(create_app()))
+
+    with stack:
+        yield factory
+
+
+@pytest.fixture
+def client(make_client: ClientFactory) -> TestClient:
+    """默认配置的测试客户端"""
+    return make_client()
+
+
+def login(client: TestClient, username: str, password: str = "password123") -> Dict[str, str]:
+    """登录并返回认证请求头"""
+    response = client.post("/api/auth/login", data={"username": username, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
+
+
+def create_admin(client: TestClient, username: str = "admin") -> Dict[str, str]:
+    """创建首个用户（自动成为管理员）并返回其认证请求头"""
+    response = client.post("/api/users", json={
+        "email": f"{username}@example.com", "username": username, "password": "password123",
+    })
+    assert response.status_code == 201, response.text
+    return login(client, username)
+
+
+def create_user(client: TestClient, admin_headers: Dict[str, str], username: str) -> Dict[str, str]:
+    """由管理员创建普通用户并返回其认证请求头"""
+    response = client.post("/api/users", headers=admin_headers, json={
+        "email": f"{username}@example.com", "username": username, "password": "password123",
+    })
+    assert response.status_code == 201, response.text
+    return login(client, username)
@@ -0,0 +1,17 @@
+from app.middlewares.deadline import DeadlineMiddleware
+
+
+def test_deadline_exceeded_returns_504(make_client):
+    """超过路由截止时间的请求返回 504，其他路由不受影响"""
+    client = make_client(REQUEST_DEADLINES="GET /api/items=0.001")
+
+    response = client.get("/api/items")
+
+    assert response.status_code == 504
+    assert response.json()["message"] == "Request deadline exceeded"
+    assert client.get("/api/health").status_code == 200
+
+
+def test_deadline_disabled_by_default(client):
+    """默认不设置截止时间，语句直接执行而不经过 wait_for"""
+    assert DeadlineMiddleware not in [middleware.cls for middleware in client.app.user_middleware]
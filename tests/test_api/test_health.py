@@ -1,17 +1,124 @@
-import pytest
-from httpx import AsyncClient
+import asyncio
+from time import monotonic
 
-from tests.conftest import client
+from app.core import health
+from app.db.session import engine
+from config import settings
 
 
-@pytest.mark.asyncio
-async def test_health_check(client):
+def test_health_check(client):
     """测试健康检查端点"""
-    async with AsyncClient(app=client.app, base_url="http://test") as ac:
-        response = await ac.get("/api/health")
-    
+    response = client.get("/api/health")
+
     assert response.status_code == 200
-    data = response.json()
+    data = response.json()["data"]
     assert data["status"] == "ok"
     assert data["database"] == "connected"
-    assert data["api_version"] == "v1" 
\ No newline at end of file
+    assert data["api_version"] == "v1"
+
+
+def test_probes_ready(client):
+    for path, status in (("/livez", "alive"), ("/readyz", "ready")):
+        response = client.get(path)
+        assert response.status_code == 200
+        assert response.json()["data"] == {"status": status, "reasons": []}
+
+
+class _Running:
+    """代替后台探测任务，使探测器处于运行状态但不会在测试期间更新检查结果"""
+
+    def done(self) -> bool:
+        return False
+
+
+def idle_prober() -> health.HealthProber:
+    prober = health.HealthProber(engine, interval=5, timeout=1)
+    prober._task = _Running()
+    prober.db_ok = True
+    return prober
+
+
+def test_readiness_fails_when_database_down():
+    """数据库不可用时未就绪但仍存活"""
+    prober = idle_prober()
+    prober.db_ok, prober.db_error = False, "OperationalError()"
+
+    assert prober.liveness() == []
+    assert prober.readiness() == ["数据库不可用: OperationalError()"]
+    assert prober.snapshot()["database"] == "disconnected"
+
+    prober.db_ok = None
+    assert prober.readiness() == ["数据库尚未完成首次检查"]
+
+
+def test_readiness_reports_shutdown_and_loop_lag(monkeypatch):
+    prober = idle_prober()
+    monkeypatch.setattr(settings, "READINESS_MAX_LOOP_LAG_MS", 100)
+    # 未启用阻塞监控时使用探测器自己的延迟采样
+    monkeypatch.setattr(health.loop_monitor, "loop_monitor", None)
+    prober.loop_lag = 0.25
+    prober.shutting_down = True
+
+    assert prober.readiness() == ["应用正在关闭", "事件循环延迟过高: 250ms"]
+
+
+def test_liveness_fails_when_heartbeat_stale():
+    """后台探测长时间未更新心跳（事件循环被阻塞）时存活检查失败，同时未就绪"""
+    prober = idle_prober()
+    prober.heartbeat -= 3600
+
+    assert prober.liveness()[0].startswith("健康探测已")
+    assert prober.readiness() == prober.liveness()
+
+    prober._task = None
+    assert prober.liveness() == ["健康探测任务未运行"]
+
+
+class _HangingEngine:
+    """获取连接时一直等待，模拟连接池耗尽"""
+
+    def connect(self):
+        return self
+
+    async def __aenter__(self):
+        await asyncio.sleep(3600)
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+def test_database_check_times_out_on_checkout():
+    prober = health.HealthProber(_HangingEngine(), interval=5, timeout=0.05)
+
+    asyncio.run(prober.check_database())
+
+    assert prober.db_ok is False
+    assert "TimeoutError" in prober.db_error
+    assert prober.db_latency < 1
+
+
+def test_background_check_waits_for_first_interval(monkeypatch):
+    """start_health_prober 已在启动时检查一次，后台任务从下一个间隔开始，不会并发第二次检查"""
+    prober = health.HealthProber(engine, interval=5, timeout=1)
+    calls = []
+
+    async def check_database():
+        calls.append(monotonic())
+
+    monkeypatch.setattr(prober, "check_database", check_database)
+
+    async def scenario():
+        prober.start()
+        await asyncio.sleep(0.05)
+        await prober.stop()
+
+    asyncio.run(scenario())
+    assert calls == []
+
+
+def test_probes_fail_without_prober(client, monkeypatch):
+    monkeypatch.setattr(health, "health_prober", None)
+    for path in ("/livez", "/readyz"):
+        response = client.get(path)
+        assert response.status_code == 503
+        assert response.json()["data"]["reasons"] == ["健康探测未启动"]
@@ -0,0 +1,117 @@
+from sqlalchemy import event
+
+from app.db.session import engine
+from tests.conftest import create_admin, create_user
+
+
+def create_items(client, headers, count=3):
+    """创建 count 个物品，返回其 ID 列表"""
+    ids = []
+    for index in range(count):
+        response = client.post("/api/items", headers=headers, json={
+            "title": f"item-{index}", "description": "d" * 20, "price": index + 1,
+        })
+        assert response.status_code == 201, response.text
+        ids.append(response.json()["data"]["id"])
+    return ids
+
+
+def test_list_items_with_fields(client):
+    """?fields= 只返回指定字段，按模型字段顺序输出"""
+    create_items(client, create_admin(client))
+
+    response = client.get("/api/items?fields=title,id")
+
+    assert response.status_code == 200
+    items = response.json()["data"]
+    assert len(items) == 3
+    assert all(list(item) == ["id", "title"] for item in items)
+
+
+def test_get_item_with_fields(client):
+    item_id = create_items(client, create_admin(client), 1)[0]
+
+    response = client.get(f"/api/items/{item_id}?fields=price")
+
+    assert response.status_code == 200
+    assert response.json()["data"] == {"price": 1.0}
+
+
+def test_unknown_field_rejected(client):
+    response = client.get("/api/items?fields=id,secret")
+
+    assert response.status_code == 400
+    assert "secret" in response.json()["detail"]
+
+
+def test_user_fields(client):
+    headers = create_admin(client)
+
+    response = client.get("/api/users?fields=username", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["data"] == [{"username": "admin"}]
+
+
+def test_lookup_items_by_ids(client):
+    """?ids= 按请求顺序返回，不存在的位置为 null 并列入 missing"""
+    first, second, _ = create_items(client, create_admin(client))
+
+    response = client.get(f"/api/items?ids={second},999,{first}")
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert [item and item["id"] for item in data["items"]] == [second, None, first]
+    assert data["missing"] == [999]
+
+
+def test_lookup_items_post(client):
+    first, second, _ = create_items(client, create_admin(client))
+
+    response = client.post("/api/items/lookup?fields=id", json={"ids": [first, second]})
+
+    assert response.status_code == 200
+    assert response.json()["data"]["items"] == [{"id": first}, {"id": second}]
+
+
+def test_lookup_ids_limit(make_client):
+    client = make_client(BATCH_LOOKUP_MAX_IDS=2)
+
+    assert client.get("/api/items?ids=1,2,3").status_code == 400
+    assert client.get("/api/items?ids=1,x").status_code == 400
+
+
+def test_lookup_users_admin_only(client):
+    admin = create_admin(client)
+    user = create_user(client, admin, "bob")
+
+    response = client.get("/api/users?ids=2,1", headers=admin)
+
+    assert response.status_code == 200
+    assert [u["username"] for u in response.json()["data"]["items"]] == ["bob", "admin"]
+    assert client.get("/api/users?ids=1", headers=user).status_code == 403
+
+
+def test_expand_owner_single_query(client):
+    """一页物品的所有者通过一次批量查询加载"""
+    admin = create_admin(client)
+    users = [admin] + [create_user(client, admin, name) for name in ("bob", "carol")]
+    for headers in users:
+        create_items(client, headers, 2)
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        response = client.get("/api/items?expand=owner")
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    items = response.json()["data"]
+    assert len(items) == 6
+    assert {item["owner"]["username"] for item in items} == {"admin", "bob", "carol"}
+    assert len([sql for sql in statements if "FROM users" in sql]) == 1
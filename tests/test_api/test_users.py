@@ -0,0 +1,60 @@
+import time
+
+from tests.conftest import create_admin, create_user
+from tests.test_api.test_items import create_items
+
+
+def wait_for_job(client, headers, status_url, timeout=5.0):
+    """轮询任务直到结束"""
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(status_url, headers=headers).json()["data"]
+        if job["status"] not in ("pending", "running") or time.monotonic() > deadline:
+            return job
+        time.sleep(0.02)
+
+
+def test_delete_user_purges_items_in_chunks(make_client):
+    client = make_client(USER_PURGE_CHUNK_SIZE=2, USER_PURGE_PAUSE_MS=0)
+    admin = create_admin(client)
+    bob = create_user(client, admin, "bob")
+    create_items(client, bob, 5)
+
+    response = client.delete("/api/users/2", headers=admin)
+
+    assert response.status_code == 202
+    data = response.json()["data"]
+    assert data["status_url"] == f"/api/admin/jobs/{data['job_id']}"
+    job = wait_for_job(client, admin, data["status_url"])
+    assert job["status"] == "succeeded"
+    assert job["progress"] == {"items_total": 5, "items_deleted": 5, "user_deleted": True}
+    assert client.get("/api/users/2", headers=admin).status_code == 404
+    assert client.get("/api/items").json()["data"] == []
+
+
+def test_self_delete_omits_admin_status_url(make_client):
+    """用户删除自己后即被停用，响应不指向其无法访问的管理接口"""
+    client = make_client(JOBS_ENABLED=False)
+    admin = create_admin(client)
+    bob = create_user(client, admin, "bob")
+
+    response = client.delete("/api/users/2", headers=bob)
+
+    assert response.status_code == 202
+    assert response.json()["data"] == {"user_id": 2}
+    assert client.get("/api/users/2", headers=bob).status_code == 403
+
+
+def test_reactivation_cancels_pending_purge(make_client):
+    client = make_client(JOBS_ENABLED=False)
+    admin = create_admin(client)
+    bob = create_user(client, admin, "bob")
+    create_items(client, bob, 2)
+    job_id = client.delete("/api/users/2", headers=admin).json()["data"]["job_id"]
+
+    response = client.put("/api/users/2", headers=admin, json={"is_active": True})
+
+    assert response.status_code == 200
+    assert response.json()["data"]["is_active"] is True
+    assert client.get(f"/api/admin/jobs/{job_id}", headers=admin).json()["data"]["status"] == "cancelled"
+    assert len(client.get("/api/items").json()["data"]) == 2
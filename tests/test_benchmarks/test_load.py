@@ -0,0 +1,34 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+def run_benchmark(module: str, cwd: Path, *args: str) -> subprocess.CompletedProcess:
+    """在干净的环境中以子进程运行基准脚本（配置只在进程首次导入时读取）"""
+    env = {key: value for key, value in os.environ.items()
+           if not key.startswith(("DATABASE_", "LOG_", "APP_"))}
+    env["PYTHONPATH"] = str(PROJECT_ROOT)
+    return subprocess.run([sys.executable, "-m", module, *args], cwd=cwd, env=env,
+                          capture_output=True, text=True, timeout=120)
+
+
+def test_load_benchmark_smoke(tmp_path):
+    """数据库和输出都在临时目录，工作目录中不应出现 app.db 或日志目录"""
+    output = tmp_path / "result.json"
+    result = run_benchmark(
+        "benchmarks.load", tmp_path,
+        "--users", "5", "--items", "50", "--database", str(tmp_path / "bench.db"),
+        "--scenarios", "item_read", "--duration", "0.2", "--warmup", "0",
+        "--concurrency", "2", "--output", str(output),
+    )
+
+    assert result.returncode == 0, result.stderr
+    [scenario] = json.loads(output.read_text(encoding="utf-8"))["results"]
+    assert scenario["name"] == "item_read"
+    assert scenario["requests"] > 0 and scenario["errors"] == 0
+    assert not (tmp_path / "app.db").exists()
+    assert not (tmp_path / "logs").exists()
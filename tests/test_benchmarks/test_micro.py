@@ -0,0 +1,18 @@
+import json
+
+from tests.test_benchmarks.test_load import run_benchmark
+
+
+def test_micro_benchmark_repository_group(tmp_path):
+    output = tmp_path / "micro.json"
+    result = run_benchmark(
+        "benchmarks.micro", tmp_path,
+        "--rows", "5", "--groups", "repository", "--repeat", "1", "--min-time", "0.01",
+        "--database", str(tmp_path / "micro.db"), "--output", str(output),
+    )
+
+    assert result.returncode == 0, result.stderr
+    results = json.loads(output.read_text(encoding="utf-8"))["results"]
+    assert {entry["group"] for entry in results} == {"repository"}
+    assert {entry["name"] for entry in results} >= {"ItemRepository.get_all", "ItemRepository.get_by_id"}
+    assert not (tmp_path / "app.db").exists()
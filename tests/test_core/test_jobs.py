@@ -0,0 +1,170 @@
+import asyncio
+
+import pytest
+
+from app.core import jobs
+from app.core.jobs import Job, JobRunner, LeaseLost, enqueue_job, job_handler
+from app.db.repositories.job_repository import JobRepository
+from tests.conftest import run_with_engine
+
+
+@pytest.fixture
+def handlers():
+    """测试注册的处理函数在结束后移除"""
+    before = dict(jobs._HANDLERS)
+    yield
+    jobs._HANDLERS.clear()
+    jobs._HANDLERS.update(before)
+
+
+async def enqueue(engine, job_type="test", **kwargs) -> int:
+    async with engine.begin() as conn:
+        return await JobRepository(conn).enqueue(job_type, {"n": 1}, **kwargs)
+
+
+async def get_job(engine, job_id) -> dict:
+    async with engine.connect() as conn:
+        return await JobRepository(conn).get_by_id(job_id)
+
+
+async def claim(engine, job_type="test", lease=60):
+    async with engine.begin() as conn:
+        return await JobRepository(conn).claim(job_type, lease)
+
+
+def test_claim_in_order_and_only_due():
+    """按 run_at 顺序领取到期任务，未到期和其他类型的任务不被领取"""
+    async def scenario(engine):
+        first = await enqueue(engine)
+        second = await enqueue(engine)
+        await enqueue(engine, delay=3600)
+        await enqueue(engine, job_type="other")
+
+        claimed = [await claim(engine), await claim(engine), await claim(engine)]
+        async with engine.connect() as conn:
+            due = await JobRepository(conn).due_types(["test", "other", "missing"])
+        return first, second, claimed, due
+
+    first, second, claimed, due = run_with_engine(scenario)
+
+    assert [claimed[0]["id"], claimed[1]["id"], claimed[2]] == [first, second, None]
+    assert claimed[0]["attempts"] == 1
+    assert claimed[0]["payload"] == {"n": 1}
+    assert claimed[0]["lock_token"] != claimed[1]["lock_token"]
+    assert due == ["other"]
+
+
+def test_expired_lease_reclaimed_and_stale_updates_rejected():
+    """租约过期后任务被重新领取，原执行者的写回不再生效"""
+    async def scenario(engine):
+        job_id = await enqueue(engine)
+        stale = await claim(engine, lease=-1)
+        fresh = await claim(engine)
+        async with engine.begin() as conn:
+            repository = JobRepository(conn)
+            results = {
+                "stale_progress": await repository.set_progress(job_id, stale["lock_token"], {"x": 1}),
+                "stale_renew": await repository.renew({job_id: stale["lock_token"]}, 60),
+                "stale_complete": await repository.complete(job_id, stale["lock_token"]),
+                "stale_fail": await repository.fail(job_id, stale["lock_token"], "boom"),
+                "stale_release": await repository.release(job_id, stale["lock_token"]),
+                "fresh_complete": await repository.complete(job_id, fresh["lock_token"]),
+            }
+        return stale, fresh, results, await get_job(engine, job_id)
+
+    stale, fresh, results, job = run_with_engine(scenario)
+
+    assert stale["id"] == fresh["id"]
+    assert fresh["attempts"] == 2
+    assert results == {
+        "stale_progress": False, "stale_renew": [stale["id"]], "stale_complete": False,
+        "stale_fail": False, "stale_release": False, "fresh_complete": True,
+    }
+    assert job["status"] == "succeeded"
+    assert job["progress"] == {}
+
+
+def test_live_lease_not_reclaimed():
+    async def scenario(engine):
+        await enqueue(engine)
+        await claim(engine, lease=60)
+        return await claim(engine)
+
+    assert run_with_engine(scenario) is None
+
+
+def test_retry_delays_next_claim():
+    async def scenario(engine):
+        job_id = await enqueue(engine)
+        row = await claim(engine)
+        async with engine.begin() as conn:
+            applied = await JobRepository(conn).retry(job_id, row["lock_token"], 3600, "boom")
+        return applied, await claim(engine), await get_job(engine, job_id)
+
+    applied, reclaimed, job = run_with_engine(scenario)
+
+    assert applied is True
+    assert reclaimed is None
+    assert (job["status"], job["last_error"]) == ("pending", "boom")
+
+
+def test_retry_backoff(monkeypatch):
+    """指数退避，上限为 backoff_max，抖动范围为 [0.5, 1] 倍"""
+    runner = JobRunner(engine=None, concurrency={}, backoff=5, backoff_max=60)
+
+    monkeypatch.setattr(jobs.random, "uniform", lambda low, high: high)
+    assert [runner.retry_delay(attempts) for attempts in (1, 2, 3, 4, 5)] == [5, 10, 20, 40, 60]
+
+    monkeypatch.setattr(jobs.random, "uniform", lambda low, high: low)
+    assert runner.retry_delay(2) == 5
+
+
+def test_save_progress_after_lease_lost_raises():
+    async def scenario(engine):
+        job_id = await enqueue(engine)
+        row = await claim(engine, lease=-1)
+        await claim(engine)
+        job = Job(engine=engine, **row)
+        with pytest.raises(LeaseLost):
+            async with engine.begin() as conn:
+                await job.save_progress(conn, {"done": 1})
+        return await get_job(engine, job_id)
+
+    assert run_with_engine(scenario)["progress"] == {}
+
+
+def test_runner_retries_then_succeeds(handlers):
+    """处理函数失败后按退避重试，提交的任务在事务提交后立即唤醒调度"""
+    calls = []
+
+    @job_handler("flaky")
+    async def flaky(job: Job) -> None:
+        calls.append(job.attempts)
+        if job.attempts == 1:
+            raise RuntimeError("first attempt fails")
+
+    async def scenario(engine):
+        # 轮询间隔很长，只有提交后的唤醒才能让任务及时执行
+        runner = jobs.job_runner = JobRunner(engine, {"*": 1}, poll_interval=60, backoff=0)
+        jobs.install_commit_notify(engine)
+        runner.start()
+        try:
+            await asyncio.sleep(0.05)
+            async with engine.begin() as conn:
+                job_id = await enqueue_job(conn, "flaky")
+            for _ in range(200):
+                job = await get_job(engine, job_id)
+                if job["status"] == "succeeded":
+                    return job
+                await asyncio.sleep(0.01)
+            return job
+        finally:
+            await runner.stop()
+            jobs.job_runner = None
+
+    job = run_with_engine(scenario)
+
+    assert job["status"] == "succeeded"
+    assert job["attempts"] == 2
+    assert job["last_error"] is None
+    assert calls == [1, 2]
@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+# 解析参数后才导入配置，输出配置中的 APP_ENV
+SCRIPT = "import sys, run; run.parse_args(sys.argv[1:]); from config import settings; print(settings.APP_ENV)"
+
+
+@pytest.mark.parametrize("argv, expected", [
+    ([], "development"),
+    (["--env", "testing"], "testing"),
+    (["--prod"], "production"),
+    (["--prod", "--env", "testing"], "testing"),
+])
+def test_env_applied_before_config_import(tmp_path, argv, expected):
+    env = {key: value for key, value in os.environ.items() if key != "APP_ENV"}
+    env["PYTHONPATH"] = str(PROJECT_ROOT)
+    result = subprocess.run([sys.executable, "-c", SCRIPT, *argv], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, timeout=60)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == expected
@@ -0,0 +1,105 @@
+import signal
+
+import pytest
+
+from app.core import server
+from app.core.server import Supervisor, WorkerSlot, available_cpus
+
+
+def exit_status(code: int) -> int:
+    """构造 os.waitpid 返回的正常退出状态"""
+    return code << 8
+
+
+class FakeCpuMax:
+    def __init__(self, content):
+        self.content = content
+
+    def __call__(self, path):
+        return self
+
+    def read_text(self):
+        if self.content is None:
+            raise FileNotFoundError
+        return self.content
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(server, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.mark.parametrize("cpu_max, expected", [
+    (None, 8),
+    ("max 100000", 8),
+    ("200000 100000", 2),
+    ("150000 100000", 2),
+    ("10000 100000", 1),
+    ("1600000 100000", 8),
+    ("garbage", 8),
+])
+def test_available_cpus(monkeypatch, cpu_max, expected):
+    """CPU 亲和性数量按 cgroup cpu.max 配额向上取整后取较小值"""
+    monkeypatch.setattr(server.os, "sched_getaffinity", lambda pid: set(range(8)), raising=False)
+    monkeypatch.setattr(server, "Path", FakeCpuMax(cpu_max))
+    assert available_cpus() == expected
+
+
+def test_workers_default_to_available_cpus(monkeypatch):
+    monkeypatch.setattr(server, "available_cpus", lambda: 3)
+    assert Supervisor(None).workers == 3
+    assert Supervisor(None, workers=5).workers == 5
+
+
+def test_crash_backoff_doubles_up_to_limit(clock):
+    """连续崩溃时按 1、2、4……秒退避，最长 _MAX_BACKOFF"""
+    supervisor = Supervisor(None, workers=1)
+    slot = supervisor.slots[0]
+    delays = []
+    for _ in range(8):
+        slot.pid, slot.started = 123, clock[0]
+        clock[0] += 1
+        supervisor._on_exit(slot, exit_status(1))
+        assert slot.pid is None
+        delays.append(slot.restart_at - clock[0])
+    assert delays == [1, 2, 4, 8, 16, 30, 30, 30]
+    assert slot.failures == 8
+
+
+def test_backoff_resets_after_stable_run(clock):
+    supervisor = Supervisor(None, workers=1)
+    slot = WorkerSlot(0, pid=123, started=clock[0], failures=5)
+    clock[0] += server._STABLE_AFTER
+    supervisor._on_exit(slot, exit_status(1))
+    assert slot.failures == 1
+    assert slot.restart_at == clock[0] + 1
+
+
+def test_clean_exit_and_recycle_restart_immediately(clock):
+    """达到 max_requests 正常退出或被回收时立即补上，并清零失败计数"""
+    supervisor = Supervisor(None, workers=1)
+    slot = WorkerSlot(0, pid=123, started=clock[0], failures=3, restart_at=clock[0] + 4)
+    supervisor._on_exit(slot, exit_status(0))
+    assert (slot.failures, slot.restart_at) == (0, 0.0)
+
+    slot = WorkerSlot(0, pid=123, started=clock[0], failures=3, recycling=True)
+    supervisor._on_exit(slot, signal.SIGTERM)
+    assert (slot.failures, slot.restart_at) == (0, 0.0)
+
+
+def test_exit_while_stopping_is_not_rescheduled(clock):
+    supervisor = Supervisor(None, workers=1)
+    supervisor._stopping = True
+    slot = WorkerSlot(0, pid=123, started=clock[0])
+    supervisor._on_exit(slot, exit_status(1))
+    assert slot.pid is None
+    assert (slot.failures, slot.restart_at) == (0, 0.0)
+
+
+def test_max_requests_jitter_passed_to_uvicorn():
+    config = Supervisor(None, workers=1, max_requests=1000, max_requests_jitter=50).config
+    assert (config.limit_max_requests, config.limit_max_requests_jitter) == (1000, 50)
+    config = Supervisor(None, workers=1, max_requests_jitter=50).config
+    assert (config.limit_max_requests, config.limit_max_requests_jitter) == (None, 0)
@@ -0,0 +1,116 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+import pytest
+from fastapi import FastAPI
+from pydantic import BaseModel
+from sqlalchemy import event
+
+from app.core import startup
+from app.core.startup import startup_step, warm_pool, warm_serializers, warm_statements, warm_threadpool
+from app.schemas.response import ApiResponse
+from tests.conftest import run_with_engine
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+def test_startup_step_records_duration_even_on_error(monkeypatch):
+    timings = []
+    monkeypatch.setattr(startup, "startup_timings", timings)
+
+    with startup_step("sleep"):
+        time.sleep(0.02)
+    with pytest.raises(RuntimeError):
+        with startup_step("fail"):
+            raise RuntimeError
+
+    assert [name for name, _ in timings] == ["sleep", "fail"]
+    assert timings[0][1] >= 0.02
+
+
+def test_warm_pool_opens_connections():
+    async def scenario(engine):
+        pool = engine.sync_engine.pool
+        before = pool.checkedin()
+        await warm_pool(engine, 0)
+        unchanged = pool.checkedin() == before
+        await warm_pool(engine, 3)
+        return unchanged, pool.checkedin(), pool.checkedout()
+
+    unchanged, checked_in, checked_out = run_with_engine(scenario)
+
+    # 连接全部归还连接池，之后的请求直接复用
+    assert unchanged
+    assert checked_in >= 3
+    assert checked_out == 0
+
+
+def test_warm_statements_runs_read_queries():
+    async def scenario(engine):
+        statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        await warm_statements(engine)
+        return statements
+
+    statements = run_with_engine(scenario)
+
+    assert all(statement.lstrip().upper().startswith("SELECT") for statement in statements)
+    assert any("FROM items" in statement for statement in statements)
+    assert any("FROM users" in statement for statement in statements)
+    assert len(statements) >= 12
+
+
+class Strict(BaseModel):
+    value: int
+
+
+def test_warm_serializers_counts_api_response_routes():
+    app = FastAPI()
+
+    @app.get("/list", response_model=ApiResponse[List[Strict]])
+    async def list_route():
+        pass
+
+    @app.get("/strict", response_model=Strict)
+    async def strict_route():
+        pass
+
+    @app.get("/plain")
+    async def plain_route():
+        pass
+
+    # 响应模型不是 ApiResponse 的路由校验失败并被跳过，没有响应模型的路由不参与
+    assert asyncio.run(warm_serializers(app)) == 1
+
+
+def test_warm_threadpool_starts_worker_thread():
+    async def scenario():
+        await warm_threadpool()
+        return [thread.name for thread in threading.enumerate()]
+
+    assert "AnyIO worker thread" in asyncio.run(scenario())
+
+
+def test_startup_profile_reports_steps(tmp_path):
+    """启动耗时报告列出各启动步骤和首次请求延迟"""
+    env = {key: value for key, value in os.environ.items() if not key.startswith(("DATABASE_", "LOG_"))}
+    env.update({
+        "PYTHONPATH": str(PROJECT_ROOT),
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'startup.db'}",
+        "LOG_FILE_ENABLED": "false",
+        "LOG_LEVEL": "ERROR",
+    })
+    result = subprocess.run([sys.executable, "-m", "app.core.startup_profile", "--skip-imports"],
+                            cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120)
+
+    assert result.returncode == 0, result.stderr
+    for step in ("init_database", "warm_threadpool", "warm_pool", "warm_statements", "warm_serializers"):
+        assert f"ms  {step}" in result.stdout
+    assert "GET /api/items?limit=10 -> 200" in result.stdout
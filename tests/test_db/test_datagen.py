@@ -0,0 +1,23 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+
+from app.db.datagen import DataGenerator
+from tests.conftest import TEST_DIR
+
+
+def test_admin_always_active():
+    path = TEST_DIR / "datagen.db"
+    if path.exists():
+        path.unlink()
+    engine = create_engine(f"sqlite:///{path}")
+    generator = DataGenerator(engine, seed=1)
+    try:
+        generator.ensure_schema()
+        generator.generate_users(5, ["x"], datetime(2024, 1, 1), timedelta(days=1), inactive_rate=1.0)
+        with engine.connect() as conn:
+            rows = conn.execute(text("SELECT role, is_active FROM users ORDER BY id")).all()
+    finally:
+        engine.dispose()
+
+    assert [tuple(row) for row in rows] == [("admin", 1)] + [("user", 0)] * 4
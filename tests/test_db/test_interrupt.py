@@ -0,0 +1,68 @@
+import asyncio
+from time import monotonic
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.interrupt import install_sqlite_interrupt
+from app.db.repositories.base import BaseRepository
+from app.utils.deadline import DeadlineExceeded, request_deadline
+from tests.conftest import TEST_DIR
+
+# 不被中断时需要执行很久的查询
+LONG_QUERY = text(
+    "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c LIMIT 500000000) "
+    "SELECT count(*) FROM c"
+)
+
+
+def run_with_deadline(coro_factory, seconds: float):
+    """在设置了截止时间的上下文中运行，返回 (结果或异常, 耗时)"""
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{TEST_DIR / 'interrupt.db'}")
+        install_sqlite_interrupt(engine)
+        try:
+            async with engine.connect() as conn:
+                token = request_deadline.set(monotonic() + seconds)
+                start = monotonic()
+                try:
+                    outcome = await coro_factory(conn)
+                except Exception as e:
+                    outcome = e
+                finally:
+                    request_deadline.reset(token)
+                elapsed = monotonic() - start
+                # 中断后连接仍可继续使用
+                assert (await conn.execute(text("SELECT 1"))).scalar() == 1
+                return outcome, elapsed
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+def test_progress_handler_interrupts_long_query():
+    """进度回调在截止时间后中断 SQLite 内部正在执行的语句"""
+    outcome, elapsed = run_with_deadline(lambda conn: conn.execute(LONG_QUERY), 0.05)
+
+    assert isinstance(outcome, OperationalError)
+    assert "interrupted" in str(outcome.orig)
+    assert elapsed < 2
+
+
+def test_repository_raises_deadline_exceeded():
+    outcome, elapsed = run_with_deadline(lambda conn: BaseRepository(conn)._execute(LONG_QUERY), 0.05)
+
+    assert isinstance(outcome, DeadlineExceeded)
+    assert elapsed < 2
+
+
+def test_no_deadline_does_not_interrupt():
+    """截止时间之前完成的语句不受影响"""
+    short = text("WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c LIMIT 1000) SELECT count(*) FROM c")
+
+    outcome, _ = run_with_deadline(lambda conn: conn.execute(short), 5)
+
+    assert outcome.scalar() == 1000
@@ -0,0 +1,178 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+
+from app.db.init_db import init_database
+from app.db.repositories.item_repository import ItemRepository
+from benchmarks.seed import seed_database
+from tests.conftest import TEST_DIR, run_with_engine
+
+# 从 items 直接聚合，与增量维护的统计对比
+_EXPECTED = text("""
+    SELECT :owner_id AS owner_id, COUNT(*) AS item_count, COUNT(price) AS priced_count,
+           COALESCE(SUM(price), 0) AS total_price, MAX(created_at) AS last_created_at
+    FROM items WHERE owner_id = :owner_id
+""")
+
+
+async def create_owners(conn, count: int = 2) -> None:
+    for owner_id in range(1, count + 1):
+        await conn.execute(text(
+            "INSERT INTO users (email, username, hashed_password) VALUES (:email, :username, 'x')"
+        ), {"email": f"u{owner_id}@example.com", "username": f"u{owner_id}"})
+
+
+async def create_items(repository: ItemRepository, owner_id: int, prices) -> list:
+    """创建物品并把 created_at 设为按顺序递增的不同时间"""
+    ids = []
+    for index, price in enumerate(prices):
+        item = await repository.create(f"item {index}", None, price, owner_id)
+        ids.append(item["id"])
+        await repository.conn.execute(
+            text("UPDATE items SET created_at = :created_at WHERE id = :item_id"),
+            {"created_at": f"2024-01-{index + 1:02d} 00:00:00", "item_id": item["id"]},
+        )
+    # created_at 被直接修改过，重建一次作为增量维护的起点
+    await repository.rebuild_owner_stats()
+    return ids
+
+
+async def snapshot(repository: ItemRepository, owner_id: int):
+    """(增量维护的统计, 从 items 聚合的期望值)"""
+    expected = dict((await repository.conn.execute(_EXPECTED, {"owner_id": owner_id})).first()._mapping)
+    return await repository.get_owner_stats(owner_id), expected
+
+
+def assert_matches(actual, expected):
+    assert actual is not None
+    assert actual["item_count"] == expected["item_count"]
+    assert actual["priced_count"] == expected["priced_count"]
+    assert actual["total_price"] == pytest.approx(expected["total_price"])
+    assert actual["last_created_at"] == expected["last_created_at"]
+
+
+def run(scenario):
+    async def main(engine):
+        async with engine.begin() as conn:
+            await create_owners(conn)
+            return await scenario(ItemRepository(conn))
+    return run_with_engine(main)
+
+
+def test_create_updates_stats():
+    async def scenario(repository):
+        await repository.create("a", None, 10.0, 1)
+        await repository.create("b", None, None, 1)
+        await repository.create("c", None, 5.5, 1)
+        await repository.create("other", None, 100.0, 2)
+        return await snapshot(repository, 1)
+
+    actual, expected = run(scenario)
+
+    assert_matches(actual, expected)
+    assert (actual["item_count"], actual["priced_count"], actual["total_price"]) == (3, 2, 15.5)
+
+
+def test_update_price_including_to_none():
+    async def scenario(repository):
+        first, second = await create_items(repository, 1, [10.0, None])
+        results = []
+        await repository.update(first, price=25.0)
+        results.append(await snapshot(repository, 1))
+        await repository.update(second, price=4.0)
+        results.append(await snapshot(repository, 1))
+        await repository.update(first, price=None)
+        results.append(await snapshot(repository, 1))
+        await repository.update(second, title="renamed")
+        results.append(await snapshot(repository, 1))
+        return results
+
+    results = run(scenario)
+
+    for actual, expected in results:
+        assert_matches(actual, expected)
+    assert [(actual["priced_count"], actual["total_price"]) for actual, _ in results] == [
+        (1, 25.0), (2, 29.0), (1, 4.0), (1, 4.0),
+    ]
+
+
+def test_delete_latest_item_recomputes_last_created_at():
+    async def scenario(repository):
+        ids = await create_items(repository, 1, [1.0, 2.0, 3.0])
+        before = await repository.get_owner_stats(1)
+        await repository.delete(ids[-1])
+        after_latest = await snapshot(repository, 1)
+        await repository.delete(ids[0])
+        after_oldest = await snapshot(repository, 1)
+        return before, after_latest, after_oldest
+
+    before, after_latest, after_oldest = run(scenario)
+
+    assert before["last_created_at"] == "2024-01-03 00:00:00"
+    for actual, expected in (after_latest, after_oldest):
+        assert_matches(actual, expected)
+    assert after_latest[0]["last_created_at"] == "2024-01-02 00:00:00"
+    assert after_oldest[0]["last_created_at"] == "2024-01-02 00:00:00"
+    assert after_oldest[0]["item_count"] == 1
+
+
+def test_delete_by_owner_in_chunks():
+    async def scenario(repository):
+        await create_items(repository, 1, [1.0, None, 3.0, 4.0, None])
+        await create_items(repository, 2, [7.0])
+        results = []
+        while await repository.delete_by_owner(1, 2):
+            results.append(await snapshot(repository, 1))
+        return results, await snapshot(repository, 2)
+
+    results, other = run(scenario)
+
+    for actual, expected in results:
+        assert_matches(actual, expected)
+    assert [actual["item_count"] for actual, _ in results] == [3, 1, 0]
+    last = results[-1][0]
+    assert (last["priced_count"], last["total_price"], last["last_created_at"]) == (0, 0, None)
+    assert_matches(*other)
+    assert other[0]["item_count"] == 1
+
+
+def test_benchmark_seed_builds_owner_stats():
+    """基准测试数据库写入物品后重建所有者统计"""
+    path = TEST_DIR / "seed.db"
+    seed_database(str(path), users=20, items=500)
+
+    conn = sqlite3.connect(path)
+    try:
+        stats = conn.execute("SELECT COUNT(*), SUM(item_count), SUM(priced_count) FROM owner_item_stats").fetchone()
+        expected = conn.execute("SELECT COUNT(DISTINCT owner_id), COUNT(*), COUNT(price) FROM items").fetchone()
+    finally:
+        conn.close()
+    assert stats == expected
+    assert stats[1] == 500
+
+
+def test_init_database_backfills_stats_for_existing_items():
+    """升级前的数据库没有统计表：初始化时新建并从 items 重建，之后的增量维护在此基础上进行"""
+    async def main(engine):
+        async with engine.begin() as conn:
+            await create_owners(conn)
+            repository = ItemRepository(conn)
+            await create_items(repository, 1, [10.0, None])
+            await create_items(repository, 2, [3.0])
+            await conn.execute(text("DROP TABLE owner_item_stats"))
+
+        await init_database(engine)
+
+        async with engine.begin() as conn:
+            repository = ItemRepository(conn)
+            backfilled = [await snapshot(repository, owner_id) for owner_id in (1, 2)]
+            await repository.create("new", None, 5.0, 1)
+            return backfilled, await snapshot(repository, 1)
+
+    backfilled, after_create = run_with_engine(main)
+
+    for actual, expected in backfilled:
+        assert_matches(actual, expected)
+    assert_matches(*after_create)
+    assert after_create[0]["item_count"] == 3
@@ -0,0 +1,61 @@
+import pytest
+
+from app.db.slow_query import parameter_shapes, slow_query_log
+from tests.conftest import create_admin
+from tests.test_api.test_items import create_items
+
+
+@pytest.fixture
+def capture_all(monkeypatch):
+    """把所有语句都当作慢查询记录"""
+    monkeypatch.setattr(slow_query_log, "threshold", 0.0)
+    slow_query_log.clear()
+    yield slow_query_log
+    slow_query_log.clear()
+
+
+def test_parameter_shapes():
+    assert parameter_shapes({"id": 1, "name": "x"}) == "{id: int, name: str}"
+    assert parameter_shapes((1, None)) == "(int, NoneType)"
+    assert parameter_shapes([(1, "a"), (2, "b")], executemany=True) == "2 x (int, str)"
+    assert parameter_shapes([], executemany=True) == "0 x ()"
+
+
+def test_slow_query_captured_with_caller_and_plan(client, capture_all):
+    admin = create_admin(client)
+    create_items(client, admin, 1)
+    capture_all.clear()
+
+    assert client.get("/api/items/1").status_code == 200
+    events = [event for event in capture_all.events if event["caller"] == "ItemRepository.get_by_id"]
+    assert len(events) == 1
+    event = events[0]
+    assert event["statement"].startswith("SELECT")
+    # 参数只记录类型，不记录值
+    assert "int" in event["parameters"] and "1" not in event["parameters"]
+    assert event["plan"] and any("items" in line for line in event["plan"])
+    assert event["suppressed"] == 0
+
+    response = client.get("/api/admin/slow-queries", headers=admin)
+    assert response.status_code == 200
+    assert any(entry["caller"] == "ItemRepository.get_by_id" for entry in response.json()["data"])
+
+    assert client.delete("/api/admin/slow-queries", headers=admin).status_code == 200
+    assert len(capture_all.events) == 0
+
+
+def test_repeated_statement_is_rate_limited(client, capture_all, monkeypatch):
+    """同一语句在间隔内只记录一次，下一次记录带上被抑制的次数"""
+    admin = create_admin(client)
+    create_items(client, admin, 1)
+    capture_all.clear()
+
+    for _ in range(3):
+        client.get("/api/items/1")
+    events = [event for event in capture_all.events if event["caller"] == "ItemRepository.get_by_id"]
+    assert len(events) == 1
+
+    monkeypatch.setattr(capture_all, "interval", 0.0)
+    client.get("/api/items/1")
+    events = [event for event in capture_all.events if event["caller"] == "ItemRepository.get_by_id"]
+    assert [event["suppressed"] for event in events] == [0, 2]
@@ -0,0 +1,86 @@
+import pytest
+from fastapi.testclient import TestClient
+from loguru import logger
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.middlewares.access_log import AccessLogMiddleware
+
+
+@pytest.fixture
+def access_records():
+    """收集访问日志记录"""
+    records = []
+    handler_id = logger.add(lambda message: records.append(message.record),
+                            filter=lambda record: record["extra"].get("access"), level="DEBUG")
+    yield records
+    logger.remove(handler_id)
+
+
+def make_client(**options) -> TestClient:
+    async def ok(request):
+        return PlainTextResponse("ok")
+
+    async def missing(request):
+        return PlainTextResponse("missing", status_code=404)
+
+    async def boom(request):
+        return PlainTextResponse("boom", status_code=500)
+
+    app = Starlette(routes=[Route("/ok", ok), Route("/missing", missing), Route("/boom", boom)])
+    app.add_middleware(AccessLogMiddleware, **options)
+    return TestClient(app)
+
+
+def test_access_log_fields(access_records):
+    make_client().get("/ok")
+
+    [record] = access_records
+    assert record["level"].name == "INFO"
+    assert record["message"].startswith("GET /ok 200 2B ")
+    extra = record["extra"]
+    assert (extra["method"], extra["path"], extra["status"], extra["bytes"]) == ("GET", "/ok", 200, 2)
+    assert extra["request_id"]
+
+
+def test_sampling_skips_successes_but_keeps_errors(access_records, monkeypatch):
+    """采样只作用于成功请求，4xx / 5xx 始终记录"""
+    monkeypatch.setattr("app.middlewares.access_log.random.random", lambda: 0.5)
+    client = make_client(sample_rate=0.1)
+
+    for path in ("/ok", "/missing", "/boom"):
+        client.get(path)
+    assert [(record["extra"]["status"], record["level"].name) for record in access_records] == [
+        (404, "INFO"), (500, "WARNING"),
+    ]
+
+    access_records.clear()
+    monkeypatch.setattr("app.middlewares.access_log.random.random", lambda: 0.05)
+    client.get("/ok")
+    assert len(access_records) == 1
+
+
+def test_zero_sample_rate_still_logs_slow_requests(access_records):
+    client = make_client(sample_rate=0.0, slow_ms=0)
+    client.get("/ok")
+
+    [record] = access_records
+    assert record["level"].name == "WARNING"
+
+    access_records.clear()
+    make_client(sample_rate=0.0).get("/ok")
+    assert access_records == []
+
+
+def test_request_id_propagated_or_generated():
+    client = make_client()
+
+    response = client.get("/ok", headers={"X-Request-ID": "abc-123"})
+    assert response.headers["x-request-id"] == "abc-123"
+
+    # 非法的请求 ID 重新生成
+    response = client.get("/ok", headers={"X-Request-ID": "bad id"})
+    assert len(response.headers["x-request-id"]) == 32
+    response = client.get("/ok", headers={"X-Request-ID": "x" * 200})
+    assert len(response.headers["x-request-id"]) == 32
@@ -0,0 +1,134 @@
+import asyncio
+import json
+
+import pytest
+
+from app.middlewares import admission
+from app.middlewares.admission import AdmissionControlMiddleware, ConcurrencyLimiter, parse_limits, request_group
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(admission, "monotonic", lambda: now[0])
+    return now
+
+
+def http_scope(path: str, method: str = "GET") -> dict:
+    return {"type": "http", "method": method, "path": path, "headers": []}
+
+
+def test_parse_limits_and_groups():
+    assert parse_limits("read=64, write=16,login=0") == {"read": 64, "write": 16, "login": 1}
+    with pytest.raises(ValueError):
+        parse_limits("upload=4")
+
+    assert request_group(http_scope("/api/health")) is None
+    assert request_group(http_scope("/api/auth/login", "POST")) == "login"
+    assert request_group(http_scope("/api/admin/jobs")) == "admin"
+    assert request_group(http_scope("/api/items", "POST")) == "write"
+    assert request_group(http_scope("/api/items")) == "read"
+
+
+def test_additive_increase_up_to_max(clock):
+    """快速完成的请求每轮（约 limit 个请求）把上限加 1，不超过 max_limit"""
+    limiter = ConcurrencyLimiter(10, max_queue=0, queue_timeout=1, adaptive=True, target_latency=0.2)
+    limiter.limit = 4.0
+    for _ in range(4):
+        limiter.in_flight += 1
+        limiter.release(0.01, failed=False)
+    assert 4.9 < limiter.limit < 5.0
+
+    for _ in range(200):
+        limiter.in_flight += 1
+        limiter.release(0.01, failed=False)
+    assert limiter.limit == 10
+    assert limiter.in_flight == 0
+
+
+def test_multiplicative_decrease_once_per_window(clock):
+    """超时或 5xx 时上限乘以 0.9，每个 target_latency 窗口最多下调一次，不低于 min_limit"""
+    limiter = ConcurrencyLimiter(10, max_queue=0, queue_timeout=1, adaptive=True, target_latency=0.2, min_limit=8)
+    limiter.in_flight = 3
+    limiter.release(0.5, failed=False)
+    assert limiter.limit == pytest.approx(9)
+    limiter.release(0.01, failed=True)
+    assert limiter.limit == pytest.approx(9)
+
+    clock[0] += 0.2
+    limiter.release(0.01, failed=True)
+    assert limiter.limit == pytest.approx(8.1)
+    clock[0] += 0.2
+    limiter.in_flight += 1
+    limiter.release(0.5, failed=False)
+    assert limiter.limit == 8
+
+
+def test_fixed_limit_ignores_latency(clock):
+    limiter = ConcurrencyLimiter(4, max_queue=0, queue_timeout=1)
+    limiter.in_flight = 1
+    limiter.release(10, failed=True)
+    assert limiter.limit == 4
+
+
+def test_queue_hands_over_and_rejects():
+    """额度用完后排队，队列满时拒绝；释放的额度按顺序转交给排队请求"""
+    async def scenario():
+        limiter = ConcurrencyLimiter(1, max_queue=1, queue_timeout=1)
+        assert await limiter.acquire() is None
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+        assert await limiter.acquire() == "queue_full"
+
+        limiter.release(0.01, failed=False)
+        assert await waiter is None
+        assert (limiter.in_flight, limiter.queued) == (1, 0)
+
+        limiter.queue_timeout = 0.01
+        assert await limiter.acquire() == "timeout"
+        assert limiter.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_rejected_request_gets_503():
+    async def scenario():
+        release = asyncio.Event()
+        calls = []
+
+        async def app(scope, receive, send):
+            calls.append(scope["path"])
+            await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        middleware = AdmissionControlMiddleware(app, {"read": 1}, max_queue=0, retry_after=3)
+
+        async def request(path):
+            messages = []
+
+            async def send(message):
+                messages.append(message)
+
+            await middleware(http_scope(path), None, send)
+            return messages
+
+        first = asyncio.ensure_future(request("/api/items"))
+        await asyncio.sleep(0)
+        rejected = await request("/api/items")
+        # 健康检查不受限制
+        exempt = asyncio.ensure_future(request("/api/health"))
+        await asyncio.sleep(0)
+        release.set()
+        await first
+        await exempt
+        return rejected, calls, middleware.limiters["read"]
+
+    rejected, calls, limiter = asyncio.run(scenario())
+    start, body = rejected
+    assert start["status"] == 503
+    assert dict(start["headers"])[b"retry-after"] == b"3"
+    assert json.loads(body["body"])["code"] == 503
+    assert calls == ["/api/items", "/api/health"]
+    assert limiter.in_flight == 0
@@ -0,0 +1,132 @@
+import gzip
+
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.middlewares.compression import CompressionCache, CompressionMiddleware, select_encoding
+
+BODY = "x" * 4096
+
+
+def make_client(cache: CompressionCache = None) -> TestClient:
+    async def large(request):
+        return PlainTextResponse(BODY)
+
+    async def small(request):
+        return PlainTextResponse("tiny")
+
+    async def tagged(request):
+        return PlainTextResponse(BODY, headers={"ETag": '"v1"'})
+
+    async def binary(request):
+        return PlainTextResponse(BODY, media_type="application/octet-stream")
+
+    async def stream(request):
+        async def chunks():
+            for index in range(3):
+                yield f"chunk-{index}-".encode() * 100
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    app = Starlette(routes=[
+        Route("/large", large), Route("/small", small), Route("/tagged", tagged),
+        Route("/binary", binary), Route("/stream", stream),
+    ])
+    app.add_middleware(CompressionMiddleware, minimum_size=1024,
+                       cache=cache if cache is not None else CompressionCache(1024 * 1024))
+    return TestClient(app)
+
+
+def test_select_encoding():
+    """按 q 值和服务端偏好选择编码"""
+    supported = ("zstd", "br", "gzip")
+
+    assert select_encoding("gzip, br", supported) == "br"
+    assert select_encoding("br;q=0.5, gzip", supported) == "gzip"
+    assert select_encoding("identity", supported) is None
+    assert select_encoding("*", supported) == "zstd"
+    assert select_encoding("*, zstd;q=0", supported) == "br"
+
+
+def test_large_body_compressed():
+    response = make_client().get("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(BODY)
+    assert response.text == BODY
+
+
+def test_no_accept_encoding_not_compressed():
+    """不接受压缩时原样返回，但仍带 Vary 以免共享缓存混用"""
+    response = make_client().get("/large", headers={"Accept-Encoding": "identity"})
+
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.text == BODY
+
+
+def test_small_body_not_compressed():
+    response = make_client().get("/small", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.text == "tiny"
+
+
+def test_incompressible_type_untouched():
+    response = make_client().get("/binary", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert "vary" not in response.headers
+
+
+def test_streaming_response_compressed_incrementally():
+    client = make_client()
+
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    expected = b"".join(f"chunk-{index}-".encode() * 100 for index in range(3))
+    assert gzip.decompress(raw) == expected
+
+
+def test_etag_response_reuses_compressed_bytes():
+    cache = CompressionCache(1024 * 1024)
+    client = make_client(cache)
+
+    first = client.get("/tagged", headers={"Accept-Encoding": "gzip"})
+    second = client.get("/tagged", headers={"Accept-Encoding": "gzip"})
+
+    assert first.text == second.text == BODY
+    assert (cache.misses, cache.hits) == (1, 1)
+
+
+def test_compressed_response_has_weak_etag():
+    """压缩后的字节与原响应不同，ETag 改为弱 ETag；未压缩的响应保持原样"""
+    client = make_client()
+
+    assert client.get("/tagged", headers={"Accept-Encoding": "gzip"}).headers["etag"] == 'W/"v1"'
+    assert client.get("/tagged", headers={"Accept-Encoding": "identity"}).headers["etag"] == '"v1"'
+
+
+def test_body_without_key_not_cached():
+    cache = CompressionCache(1024 * 1024)
+    client = make_client(cache)
+
+    client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert (cache.hits, cache.misses, cache.size) == (0, 0, 0)
+
+
+def test_cache_evicts_by_size():
+    cache = CompressionCache(10)
+    cache.put(("gzip", "a"), b"123456")
+    cache.put(("gzip", "b"), b"123456")
+
+    assert cache.get(("gzip", "a")) is None
+    assert cache.get(("gzip", "b")) == b"123456"
+    assert cache.size == 6
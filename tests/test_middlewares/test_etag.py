@@ -0,0 +1,53 @@
+from app.middlewares.compression import compression_cache
+from app.middlewares.etag import etag_matches, parse_routes
+from tests.conftest import create_admin
+from tests.test_api.test_items import create_items
+
+
+def test_parse_routes_and_weak_comparison():
+    assert parse_routes(" /api/items, ,/api/items/{item_id}") == {"/api/items", "/api/items/{item_id}"}
+    assert etag_matches('"a"', '"a"')
+    assert etag_matches('W/"a"', '"a"')
+    assert etag_matches('"b", W/"a"', '"a"')
+    assert etag_matches("*", '"a"')
+    assert not etag_matches('"b"', '"a"')
+
+
+def test_item_detail_etag_and_not_modified(client):
+    admin = create_admin(client)
+    [item_id] = create_items(client, admin, 1)
+
+    first = client.get(f"/api/items/{item_id}")
+    etag = first.headers["etag"]
+    assert etag.startswith('"') and etag == client.get(f"/api/items/{item_id}").headers["etag"]
+
+    not_modified = client.get(f"/api/items/{item_id}", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+
+    client.put(f"/api/items/{item_id}", headers=admin, json={"title": "renamed"})
+    changed = client.get(f"/api/items/{item_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    # 错误响应和未配置的路由不生成 ETag
+    assert "etag" not in client.get("/api/items/999").headers
+    assert "etag" not in client.get("/api/health").headers
+
+
+def test_item_list_reuses_compressed_bytes(client):
+    """物品列表的强 ETag 作为压缩缓存键，压缩后客户端带回的弱 ETag 仍能得到 304"""
+    admin = create_admin(client)
+    create_items(client, admin, 20)
+    headers = {"Accept-Encoding": "gzip"}
+
+    first = client.get("/api/items", headers=headers)
+    hits = compression_cache.hits
+    second = client.get("/api/items", headers=headers)
+
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.headers["etag"].startswith('W/"')
+    assert second.json() == first.json()
+    assert compression_cache.hits == hits + 1
+    response = client.get("/api/items", headers={**headers, "If-None-Match": first.headers["etag"]})
+    assert response.status_code == 304
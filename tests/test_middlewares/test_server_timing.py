@@ -0,0 +1,69 @@
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.middlewares.server_timing import ServerTimingMiddleware
+from app.utils.timing import QueryBudgetExceeded, request_timings
+from tests.conftest import create_admin
+
+
+def parse_server_timing(header: str) -> dict:
+    """{指标名: (耗时毫秒, 描述)}"""
+    metrics = {}
+    for entry in header.split(", "):
+        name, *params = entry.split(";")
+        values = dict(param.split("=", 1) for param in params)
+        metrics[name] = (float(values["dur"]), values.get("desc", "").strip('"'))
+    return metrics
+
+
+def test_server_timing_header(make_client):
+    client = make_client(SERVER_TIMING_ENABLED=True)
+    admin = create_admin(client)
+
+    response = client.get("/api/users", headers=admin)
+    metrics = parse_server_timing(response.headers["server-timing"])
+
+    assert list(metrics) == ["db", "auth", "svc", "ser", "total"]
+    _, description = metrics["db"]
+    assert re.fullmatch(r"[1-9]\d* queries", description)
+    assert all(value >= 0 for value, _ in metrics.values())
+    assert metrics["total"][0] >= metrics["svc"][0]
+
+
+def test_unauthenticated_request_has_no_auth_span(make_client):
+    client = make_client(SERVER_TIMING_ENABLED=True)
+
+    metrics = parse_server_timing(client.get("/api/items").headers["server-timing"])
+
+    assert "auth" not in metrics
+    assert {"db", "svc", "ser", "total"} <= set(metrics)
+
+
+def test_header_disabled_by_default(client):
+    assert "server-timing" not in client.get("/api/items").headers
+
+
+def budget_client(queries: int, action: str) -> TestClient:
+    """每个请求记录 queries 条语句、查询预算为 2 的应用"""
+    async def endpoint(request):
+        for _ in range(queries):
+            request_timings.get().count_query()
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[Route("/", endpoint)])
+    app.add_middleware(ServerTimingMiddleware, emit_header=False, query_budget=2,
+                       raise_on_budget=action == "raise")
+    return TestClient(app)
+
+
+def test_query_budget():
+    """warn 模式只记录警告；raise 模式下超出预算时抛出异常（开发和测试环境用于发现 N+1 查询）"""
+    assert budget_client(3, "warn").get("/").status_code == 200
+    assert budget_client(2, "raise").get("/").status_code == 200
+    with pytest.raises(QueryBudgetExceeded):
+        budget_client(3, "raise").get("/")
@@ -0,0 +1,91 @@
+import pytest
+from sqlalchemy import text
+
+from app.core.jobs import Job
+from app.db.repositories.item_repository import ItemRepository
+from app.db.repositories.job_repository import JobRepository
+from app.services.user_service import purge_user
+from config import settings
+from tests.conftest import run_with_engine
+
+
+async def create_user_with_items(engine, count: int) -> int:
+    async with engine.begin() as conn:
+        await conn.execute(text("INSERT INTO users (email, username, hashed_password) VALUES ('b@example.com', 'bob', 'x')"))
+        items = ItemRepository(conn)
+        for index in range(count):
+            await items.create(f"item {index}", None, 1.0, 1)
+        return await JobRepository(conn).enqueue("purge_user", {"user_id": 1})
+
+
+async def claim(engine) -> Job:
+    async with engine.begin() as conn:
+        row = await JobRepository(conn).claim("purge_user", 60)
+    return Job(engine=engine, **row)
+
+
+async def remaining_items(engine) -> int:
+    async with engine.connect() as conn:
+        return await ItemRepository(conn).count_by_owner(1)
+
+
+def test_purge_resumes_from_saved_progress(monkeypatch):
+    """中断后重新领取的任务从保存的进度继续，已删除的块不重复计数"""
+    monkeypatch.setattr(settings, "USER_PURGE_CHUNK_SIZE", 2)
+    monkeypatch.setattr(settings, "USER_PURGE_PAUSE_MS", 0)
+    delete_by_owner = ItemRepository.delete_by_owner
+    calls = []
+
+    async def interrupted_after_first_chunk(self, owner_id, limit):
+        calls.append(limit)
+        if len(calls) == 2:
+            raise RuntimeError("worker crashed")
+        return await delete_by_owner(self, owner_id, limit)
+
+    async def scenario(engine):
+        job_id = await create_user_with_items(engine, 5)
+
+        monkeypatch.setattr(ItemRepository, "delete_by_owner", interrupted_after_first_chunk)
+        first = await claim(engine)
+        with pytest.raises(RuntimeError):
+            await purge_user(first)
+        after_crash = await remaining_items(engine)
+        async with engine.begin() as conn:
+            await JobRepository(conn).retry(job_id, first.lock_token, 0, "worker crashed")
+
+        monkeypatch.setattr(ItemRepository, "delete_by_owner", delete_by_owner)
+        second = await claim(engine)
+        resumed_from = dict(second.progress)
+        await purge_user(second)
+        async with engine.connect() as conn:
+            saved = (await JobRepository(conn).get_by_id(job_id))["progress"]
+            user = (await conn.execute(text("SELECT id FROM users WHERE id = 1"))).first()
+        return after_crash, resumed_from, saved, await remaining_items(engine), user
+
+    after_crash, resumed_from, saved, remaining, user = run_with_engine(scenario)
+
+    assert after_crash == 3
+    assert resumed_from == {"items_total": 5, "items_deleted": 2}
+    assert saved == {"items_total": 5, "items_deleted": 5, "user_deleted": True}
+    assert remaining == 0
+    assert user is None
+
+
+def test_cancelled_purge_stops_before_next_chunk(monkeypatch):
+    """任务被取消（用户重新启用）后，正在执行的处理函数在下一块回滚并停止"""
+    monkeypatch.setattr(settings, "USER_PURGE_CHUNK_SIZE", 2)
+    monkeypatch.setattr(settings, "USER_PURGE_PAUSE_MS", 0)
+
+    async def scenario(engine):
+        job_id = await create_user_with_items(engine, 5)
+        job = await claim(engine)
+        async with engine.begin() as conn:
+            await JobRepository(conn).cancel(job_id)
+        with pytest.raises(Exception) as excinfo:
+            await purge_user(job)
+        return excinfo.value, await remaining_items(engine)
+
+    error, remaining = run_with_engine(scenario)
+
+    assert type(error).__name__ == "LeaseLost"
+    assert remaining == 5
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from app.utils.dataloader import DataLoader
+
+
+def make_loader(calls, delay=0.0, error=None):
+    async def batch_load(keys):
+        calls.append(list(keys))
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return {key: key * 10 for key in keys if key > 0}
+    return DataLoader(batch_load)
+
+
+def test_loads_in_one_batch_and_caches():
+    calls = []
+
+    async def scenario():
+        loader = make_loader(calls)
+        first = await loader.load_many([1, 2, 1, -1])
+        second = await loader.load(2)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first == [10, 20, 10, None]
+    assert second == 20
+    assert calls == [[1, 2, -1]]
+
+
+def test_cancelled_waiter_does_not_fail_batch():
+    """等待方被取消后批量结果仍交给其他等待方，被取消的 key 之后重新加载"""
+    calls = []
+
+    async def scenario():
+        loader = make_loader(calls, delay=0.01)
+        cancelled = asyncio.ensure_future(loader.load(1))
+        other = loader.load(2)
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        value = await asyncio.wait_for(other, 1)
+        reloaded = await loader.load(1)
+        return value, reloaded
+
+    assert asyncio.run(scenario()) == (20, 10)
+    assert calls == [[1, 2], [1]]
+
+
+def test_batch_error_propagates_and_is_not_cached():
+    calls = []
+
+    async def scenario():
+        loader = make_loader(calls, error=RuntimeError("db down"))
+        with pytest.raises(RuntimeError):
+            await loader.load_many([1, 2])
+        loader._batch_load_fn = make_loader(calls)._batch_load_fn
+        return await loader.load(1)
+
+    assert asyncio.run(scenario()) == 10
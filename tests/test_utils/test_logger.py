@@ -0,0 +1,119 @@
+import inspect
+import json
+import logging
+from types import SimpleNamespace
+
+import pytest
+from loguru import logger
+
+from app.utils.logger import InterceptHandler, LogFilter, _json_format, parse_sampling
+
+
+def make_record(name: str, level: int = logging.INFO) -> dict:
+    return {"name": name, "level": SimpleNamespace(no=level), "extra": {}}
+
+
+def test_parse_sampling():
+    assert parse_sampling(" uvicorn.access=0.1, app.db=2,broken, =0.5") == {"uvicorn.access": 0.1, "app.db": 1.0}
+
+
+def test_sampling_by_longest_prefix():
+    """采样按最长前缀匹配，比例 0 全部丢弃、1 全部保留；WARNING 及以上不采样"""
+    log_filter = LogFilter({"app": 0.0, "app.db": 1.0}, rate_limit=0)
+
+    assert not log_filter(make_record("app.api"))
+    assert not log_filter(make_record("app"))
+    assert log_filter(make_record("app.db.session"))
+    assert log_filter(make_record("application"))
+    assert log_filter(make_record("app.api", logging.WARNING))
+    assert log_filter.dropped == {("app.api", "sampled"): 1, ("app", "sampled"): 1}
+
+
+def test_decision_shared_between_sinks():
+    log_filter = LogFilter({"app": 0.0}, rate_limit=0)
+    record = make_record("app")
+
+    assert not log_filter(record)
+    assert not log_filter(record)
+    assert log_filter.dropped[("app", "sampled")] == 1
+
+
+def test_rate_limit_per_logger_and_second(monkeypatch):
+    now = [100.2]
+    monkeypatch.setattr("app.utils.logger.monotonic", lambda: now[0])
+    log_filter = LogFilter({}, rate_limit=2)
+
+    assert [log_filter(make_record("app")) for _ in range(3)] == [True, True, False]
+    # 各 logger 独立计数
+    assert log_filter(make_record("other"))
+    assert log_filter(make_record("app", logging.ERROR))
+
+    now[0] = 100.9
+    assert not log_filter(make_record("app"))
+    now[0] = 101.0
+    assert [log_filter(make_record("app")) for _ in range(3)] == [True, True, False]
+    assert log_filter.dropped == {("app", "rate_limited"): 3}
+
+
+@pytest.fixture
+def capture():
+    """收集 loguru 输出（message 为格式化后的文本）及其记录"""
+    messages = []
+    handler_ids = []
+
+    def add(**options):
+        handler_ids.append(logger.add(messages.append, level="DEBUG", **options))
+        return messages
+
+    yield add
+    for handler_id in handler_ids:
+        logger.remove(handler_id)
+
+
+def test_json_format_fields_and_escaping(capture):
+    messages = capture(format=_json_format, filter=lambda record: record["extra"].get("json_test"))
+
+    logger.bind(json_test=True, user='a"b').info('quote " 中文\nsecond line')
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.bind(json_test=True).exception("failed")
+
+    lines = [str(message) for message in messages]
+    assert all(line.endswith("\n") and line.count("\n") == 1 for line in lines)
+    first, second = (json.loads(line) for line in lines)
+    assert set(first) == {"time", "level", "logger", "function", "line", "message", "extra"}
+    assert first["level"] == "INFO"
+    assert first["logger"] == __name__
+    assert first["function"] == "test_json_format_fields_and_escaping"
+    assert first["message"] == 'quote " 中文\nsecond line'
+    # 以下划线开头的内部字段不输出；setup_logging 配置的默认 request_id 是否存在取决于测试顺序
+    assert {key: first["extra"][key] for key in ("json_test", "user")} == {"json_test": True, "user": 'a"b'}
+    assert not any(key.startswith("_") for key in first["extra"])
+    assert "中文" in lines[0]
+    assert second["level"] == "ERROR"
+    assert "ValueError: boom" in second["exception"]
+
+
+def log_from_stdlib(std_logger: logging.Logger) -> int:
+    line = inspect.currentframe().f_lineno + 1
+    std_logger.warning("from %s", "stdlib")
+    return line
+
+
+def test_intercepted_record_keeps_original_caller(capture):
+    messages = capture(filter=lambda record: record["name"] == "tests.stdlib")
+    std_logger = logging.getLogger("tests.stdlib")
+    std_logger.addHandler(InterceptHandler())
+    std_logger.propagate = False
+    try:
+        line = log_from_stdlib(std_logger)
+    finally:
+        std_logger.handlers.clear()
+        std_logger.propagate = True
+
+    [message] = messages
+    record = message.record
+    assert record["message"] == "from stdlib"
+    assert record["level"].name == "WARNING"
+    assert (record["name"], record["function"], record["line"]) == ("tests.stdlib", "log_from_stdlib", line)
@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+import pytest
+from loguru import logger
+
+from app.middlewares.loop_budget import LoopBlockedError, LoopBudgetMiddleware
+from app.utils import loop_monitor
+from app.utils.loop_monitor import LoopMonitor
+
+
+def block_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+def test_blocking_task_recorded_with_stack():
+    """看门狗在循环被阻塞时记录日志，并登记阻塞超出预算的任务及其调用栈"""
+    warnings = []
+    handler_id = logger.add(lambda message: warnings.append(message.record["message"]), level="WARNING")
+
+    async def scenario():
+        monitor = LoopMonitor(interval=0.01, threshold=0.05, budget=0.05)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.05)
+            task = asyncio.current_task()
+            block_loop(0.3)
+            return monitor.pop_blocked(task), monitor.pop_blocked(task)
+        finally:
+            await monitor.stop()
+
+    try:
+        blocked, again = asyncio.run(scenario())
+    finally:
+        logger.remove(handler_id)
+
+    assert blocked is not None
+    duration, stack = blocked
+    assert duration >= 0.05
+    assert "block_loop" in stack
+    # 每个任务的阻塞记录只取出一次
+    assert again is None
+    assert any("事件循环已阻塞" in message and "block_loop" in message for message in warnings)
+
+
+def test_lag_sampled_after_block():
+    """阻塞结束后的第一次采样记录调度延迟，之后回落"""
+    async def scenario():
+        monitor = LoopMonitor(interval=0.01, threshold=0, budget=0)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.02)
+            block_loop(0.15)
+            await asyncio.sleep(0.001)
+            lag_after_block = monitor.lag
+            await asyncio.sleep(0.05)
+            return monitor.running, lag_after_block, monitor.lag
+        finally:
+            await monitor.stop()
+
+    running, lag_after_block, settled_lag = asyncio.run(scenario())
+    assert running
+    assert lag_after_block >= 0.1
+    assert settled_lag < 0.05
+
+
+def test_budget_middleware_fails_blocking_request(monkeypatch):
+    async def blocking_app(scope, receive, send):
+        block_loop(0.3)
+
+    async def fast_app(scope, receive, send):
+        await asyncio.sleep(0)
+
+    async def scenario():
+        monitor = await loop_monitor.start_loop_monitor(interval=0.01, threshold=0, budget=0.05)
+        try:
+            scope = {"type": "http", "method": "GET", "path": "/slow"}
+            await LoopBudgetMiddleware(fast_app)(scope, None, None)
+            with pytest.raises(LoopBlockedError, match="GET /slow"):
+                await LoopBudgetMiddleware(blocking_app)(scope, None, None)
+        finally:
+            await monitor.stop()
+
+    monkeypatch.setattr(loop_monitor, "loop_monitor", None)
+    asyncio.run(scenario())
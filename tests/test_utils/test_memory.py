@@ -0,0 +1,51 @@
+import threading
+import tracemalloc
+
+from app.utils.memory import MemoryProfiler
+from app.utils.paths import PROJECT_ROOT, project_relative
+
+
+def test_project_relative():
+    assert project_relative(str(PROJECT_ROOT / "app" / "main.py")) == "app/main.py"
+    assert project_relative("/usr/lib/python3/json/__init__.py") == "/usr/lib/python3/json/__init__.py"
+
+
+def test_snapshots_taken_concurrently_with_listing():
+    """线程池中拍摄快照的同时在其他线程列出快照，不出现迭代期间被修改的错误"""
+    profiler = MemoryProfiler(max_snapshots=3)
+    profiler.start(frames=1)
+    errors = []
+
+    def take():
+        for _ in range(5):
+            profiler.take_snapshot()
+
+    def read(done: threading.Event):
+        try:
+            while not done.is_set():
+                [snapshot.summary() for snapshot in profiler.list_snapshots()]
+        except Exception as e:
+            errors.append(e)
+
+    done = threading.Event()
+    reader = threading.Thread(target=read, args=(done,))
+    reader.start()
+    try:
+        takers = [threading.Thread(target=take) for _ in range(3)]
+        for thread in takers:
+            thread.start()
+        for thread in takers:
+            thread.join()
+    finally:
+        done.set()
+        reader.join()
+        profiler.stop()
+
+    assert errors == []
+    snapshots = profiler.list_snapshots()
+    assert len(snapshots) == 3
+    assert profiler.get(snapshots[0].id) is snapshots[0]
+
+    profiler.clear()
+    assert profiler.list_snapshots() == []
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,89 @@
+import re
+
+from app.utils.metrics import CallbackGauge, Counter, Gauge, Histogram, Registry
+from app.utils.shared_metrics import SharedMetricsRegion, SlotStore
+from tests.conftest import create_admin
+from tests.test_api.test_items import create_items
+
+
+def test_histogram_buckets_are_cumulative():
+    """与分桶上限相等的值计入该桶（le），输出累计计数、总和与次数"""
+    registry = Registry()
+    histogram = registry.register(Histogram("test_latency_seconds", "耗时", ("route",), buckets=(0.1, 0.5)))
+    for value in (0.05, 0.1, 0.3, 2.0):
+        histogram.observe(value, ("/items",))
+
+    assert histogram.count(("/items",)) == 4
+    assert registry.render().splitlines() == [
+        "# HELP test_latency_seconds 耗时",
+        "# TYPE test_latency_seconds histogram",
+        'test_latency_seconds_bucket{route="/items",le="0.1"} 2',
+        'test_latency_seconds_bucket{route="/items",le="0.5"} 3',
+        'test_latency_seconds_bucket{route="/items",le="+Inf"} 4',
+        'test_latency_seconds_sum{route="/items"} 2.45',
+        'test_latency_seconds_count{route="/items"} 4',
+    ]
+
+
+def test_counter_gauge_and_label_escaping():
+    registry = Registry()
+    counter = registry.register(Counter("test_requests_total", "请求数", ("path",)))
+    gauge = registry.register(Gauge("test_in_flight", "处理中"))
+    counter.inc(('a"b\\c',))
+    counter.inc(('a"b\\c',), 2)
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+
+    output = registry.render()
+    assert 'test_requests_total{path="a\\"b\\\\c"} 3' in output
+    assert "test_in_flight 1" in output
+    assert counter.value(('a"b\\c',)) == 3
+
+
+def test_shared_store_sums_across_workers():
+    """共享存储时输出所有工作进程的汇总，回调指标按 aggregate 汇总"""
+    region = SharedMetricsRegion(2, 8192)
+    values = {}
+    registry = Registry()
+    counter = registry.register(Counter("test_shared_total", "计数"))
+    histogram = registry.register(Histogram("test_shared_seconds", "耗时", buckets=(1.0,)))
+    healthy = registry.register(CallbackGauge("test_shared_up", "状态", lambda: {(): values["up"]}, aggregate="min"))
+
+    for index, up in ((0, 1), (1, 0)):
+        region.activate(index, 100 + index)
+        registry.use_store(SlotStore(region, index))
+        values["up"] = up
+        counter.inc(amount=index + 1)
+        histogram.observe(0.5 * (index + 1))
+        registry.publish()
+
+    values["up"] = 1
+    output = registry.render()
+    assert "test_shared_total 3" in output
+    assert 'test_shared_seconds_bucket{le="1"} 2' in output
+    assert "test_shared_seconds_count 2" in output
+    # 渲染前本进程（槽位 1）重新发布回调的当前值，min 汇总存活进程
+    assert "test_shared_up 1" in output
+    region.deactivate(0)
+    values["up"] = 0
+    assert "test_shared_up 0" in registry.render()
+
+
+def test_metrics_endpoint(client):
+    admin = create_admin(client)
+    create_items(client, admin, 1)
+    client.get("/api/items/1")
+    client.get("/api/items/999")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    output = response.text
+    # 按路由模板而不是具体路径分组
+    assert re.search(r'http_requests_total\{method="GET",route="/api/items/\{item_id\}",status="200"\} [1-9]', output)
+    assert re.search(r'http_requests_total\{method="GET",route="/api/items/\{item_id\}",status="404"\} [1-9]', output)
+    assert 'route="/api/items/1"' not in output
+    assert re.search(r'http_request_duration_seconds_count\{method="GET",route="/api/items/\{item_id\}"\} [1-9]', output)
+    assert re.search(r'db_statement_duration_seconds_count\{statement="SELECT [^"]* FROM items WHERE id = \?"\} [1-9]', output)
+    assert "# TYPE db_pool_connections gauge" in output
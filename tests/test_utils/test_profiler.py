@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from app.utils.profiler import Profile, StackSampler, request_profiler
+from tests.conftest import create_admin
+
+
+def spin(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_sampler_records_stacks_until_stopped():
+    """stop() 不等待采样线程，返回后不再写入样本，采样线程随后自行退出"""
+    sampler = StackSampler(threading.get_ident(), interval=0.001)
+    sampler.start()
+    spin(0.1)
+    stacks = sampler.stop()
+
+    assert stacks is sampler.stacks
+    assert any(stack[-1][0] == "spin" for stack in stacks)
+    # 根帧在前，文件名相对于项目根目录
+    assert all(stack[-1][1] == "tests/test_utils/test_profiler.py" for stack in stacks if stack[-1][0] == "spin")
+    snapshot = Counter(stacks)
+    spin(0.05)
+    assert stacks == snapshot
+    sampler._thread.join(1)
+    assert not sampler._thread.is_alive()
+
+
+def test_collapsed_and_speedscope_output():
+    profile = Profile("GET", "/api/items/1", "/api/items/{item_id}", interval=0.002)
+    handler = ("handler", "app/api/items.py", 10)
+    profile.stacks = Counter({
+        (("main", "app/main.py", 1), handler): 3,
+        (("main", "app/main.py", 1),): 1,
+    })
+
+    assert profile.collapsed() == (
+        "main (app/main.py:1);handler (app/api/items.py:10) 3\n"
+        "main (app/main.py:1) 1\n"
+    )
+    document = profile.speedscope()
+    assert document["shared"]["frames"] == [
+        {"name": "main", "file": "app/main.py", "line": 1},
+        {"name": "handler", "file": "app/api/items.py", "line": 10},
+    ]
+    [sampled] = document["profiles"]
+    assert sampled["samples"] == [[0, 1], [0]]
+    assert sampled["weights"] == [6.0, 2.0]
+    assert profile.summary()["samples"] == 4
+
+
+@pytest.fixture
+def profiler():
+    request_profiler.disarm()
+    request_profiler.clear()
+    yield request_profiler
+    request_profiler.disarm()
+    request_profiler.clear()
+
+
+def test_admin_profile_endpoints(client, profiler):
+    admin = create_admin(client)
+
+    response = client.post("/api/admin/profiles/arm", headers=admin,
+                           json={"route": "/api/items/{item_id}", "method": "get", "count": 1})
+    assert response.status_code == 200
+    assert response.json()["data"]["remaining"] == 1
+
+    client.get("/api/items")
+    client.get("/api/items/1")
+    # 布防次数已用完，之后的请求不再采样
+    client.get("/api/items/1")
+    assert client.get("/api/admin/profiles/arm", headers=admin).json()["data"]["remaining"] == 0
+
+    [summary] = client.get("/api/admin/profiles", headers=admin).json()["data"]
+    assert (summary["method"], summary["path"], summary["route"], summary["status"]) == (
+        "GET", "/api/items/1", "/api/items/{item_id}", 404,
+    )
+
+    collapsed = client.get(f"/api/admin/profiles/{summary['id']}", params={"format": "collapsed"}, headers=admin)
+    assert collapsed.status_code == 200
+    assert collapsed.headers["content-type"].startswith("text/plain")
+    speedscope = client.get(f"/api/admin/profiles/{summary['id']}", headers=admin)
+    assert speedscope.json()["profiles"][0]["name"] == "GET /api/items/{item_id}"
+    assert client.get("/api/admin/profiles/missing", headers=admin).status_code == 404
+
+    assert client.delete("/api/admin/profiles", headers=admin).status_code == 200
+    assert client.get("/api/admin/profiles", headers=admin).json()["data"] == []
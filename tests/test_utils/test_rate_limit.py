@@ -0,0 +1,97 @@
+import pytest
+
+from app.utils import rate_limit
+from app.utils.rate_limit import MemoryRateLimiter, RateLimitRule, parse_rules
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit, "monotonic", lambda: now[0])
+    return now
+
+
+def test_parse_rules():
+    rules = parse_rules("POST /api/auth/login=10/60, /api/items=120/60,*=600")
+    assert rules == [
+        RateLimitRule("POST", "/api/auth/login", 10, 60.0),
+        RateLimitRule("*", "/api/items", 120, 60.0),
+        RateLimitRule("*", "*", 600, 1.0),
+    ]
+    with pytest.raises(ValueError):
+        parse_rules("GET /api/items=0/60")
+
+
+def test_burst_then_reject(clock):
+    """满额时可一次性突发 limit 次，之后拒绝并给出到下一个额度的等待时间"""
+    limiter = MemoryRateLimiter()
+    rule = RateLimitRule("GET", "/x", limit=5, period=10)
+    results = [limiter.hit("k", rule) for _ in range(5)]
+    assert [r.allowed for r in results] == [True] * 5
+    assert [r.remaining for r in results] == [4, 3, 2, 1, 0]
+    assert results[-1].reset_after == pytest.approx(10)
+
+    rejected = limiter.hit("k", rule)
+    assert not rejected.allowed
+    assert rejected.remaining == 0
+    assert rejected.retry_after == pytest.approx(2)
+    # 被拒绝的请求不消耗额度
+    assert limiter.hit("k", rule).retry_after == pytest.approx(2)
+    # 其他键互不影响
+    assert limiter.hit("other", rule).allowed
+
+
+def test_refill_at_interval(clock):
+    """额度按 period / limit 的间隔逐个恢复"""
+    limiter = MemoryRateLimiter()
+    rule = RateLimitRule("GET", "/x", limit=5, period=10)
+    for _ in range(5):
+        limiter.hit("k", rule)
+
+    clock[0] += 1.9
+    assert not limiter.hit("k", rule).allowed
+    clock[0] += 0.1
+    result = limiter.hit("k", rule)
+    assert result.allowed and result.remaining == 0
+    assert not limiter.hit("k", rule).allowed
+
+    clock[0] += 6
+    assert limiter.hit("k", rule).remaining == 2
+
+    # 长时间空闲后回到满额，不会超过 limit
+    clock[0] += 1000
+    assert limiter.hit("k", rule).remaining == 4
+
+
+def test_sweep_removes_idle_keys(clock):
+    limiter = MemoryRateLimiter(sweep_interval=60)
+    rule = RateLimitRule("GET", "/x", limit=2, period=10)
+    limiter.hit("a", rule)
+    limiter.hit("b", rule)
+    limiter.hit("b", rule)
+    assert len(limiter) == 2
+
+    clock[0] += 5
+    assert limiter.sweep() == 1
+    assert len(limiter) == 1
+    clock[0] += 5
+    assert limiter.sweep() == 1
+    assert len(limiter) == 0
+
+
+def test_rejected_request_has_retry_after(make_client):
+    client = make_client(RATE_LIMIT_ENABLED=True, RATE_LIMITS="GET /api/health=2/60")
+    for remaining in ("1", "0"):
+        response = client.get("/api/health")
+        assert response.status_code == 200
+        assert response.headers["ratelimit-limit"] == "2"
+        assert response.headers["ratelimit-remaining"] == remaining
+        assert "retry-after" not in response.headers
+
+    response = client.get("/api/health")
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "30"
+    assert response.json()["code"] == 429
+
+    # 未配置规则的路由不限流
+    assert "ratelimit-limit" not in client.get("/api/").headers
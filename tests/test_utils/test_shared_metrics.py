@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+from app.utils.shared_metrics import (
+    KIND_COUNTER, KIND_GAUGE, KIND_HISTOGRAM, SharedMetricsRegion, SlotStore,
+)
+
+
+def test_append_and_collect_across_slots():
+    """每个槽位独立登记序列，汇总时按标签收集各槽位的数值"""
+    region = SharedMetricsRegion(2, 4096)
+    first, second = SlotStore(region, 0), SlotStore(region, 1)
+
+    offset = first.allocate("requests_total", ("GET",), 1, KIND_COUNTER)
+    first.cells[offset] += 3
+    # 同一序列重复登记返回相同偏移
+    assert first.allocate("requests_total", ("GET",), 1, KIND_COUNTER) == offset
+
+    second.cells[second.allocate("requests_total", ("GET",), 1, KIND_COUNTER)] += 2
+    second.cells[second.allocate("requests_total", ("POST",), 1, KIND_COUNTER)] += 1
+    latency = second.allocate("latency", (), 3, KIND_HISTOGRAM)
+    second.cells[latency + 1] = 5
+
+    assert region.collect("requests_total") == {("GET",): [[3.0], [2.0]], ("POST",): [[1.0]]}
+    assert first.collect("latency") == {(): [[0.0, 5.0, 0.0]]}
+    assert region.collect("missing") == {}
+
+
+def test_restarted_worker_reuses_slot_series():
+    """工作进程重启后沿用槽位中的序列，计数器继续累加"""
+    region = SharedMetricsRegion(1, 4096)
+    store = SlotStore(region, 0)
+    offset = store.allocate("requests_total", ("GET",), 1, KIND_COUNTER)
+    store.cells[offset] += 7
+
+    restarted = SlotStore(region, 0)
+    assert restarted.allocate("requests_total", ("GET",), 1, KIND_COUNTER) == offset
+    restarted.cells[offset] += 1
+    assert region.collect("requests_total") == {("GET",): [[8.0]]}
+
+
+def test_activate_zeroes_gauges_and_deactivate_hides_them():
+    region = SharedMetricsRegion(2, 4096)
+    for index in range(2):
+        region.activate(index, 100 + index)
+        store = SlotStore(region, index)
+        store.cells[store.allocate("requests_total", (), 1, KIND_COUNTER)] = 10
+        store.cells[store.allocate("in_flight", (), 1, KIND_GAUGE)] = 4
+
+    region.deactivate(1)
+    # 已退出进程的瞬时值不计入汇总，计数器保留
+    assert region.collect("in_flight", (KIND_GAUGE,)) == {(): [[4.0]]}
+    assert region.collect("requests_total", (KIND_COUNTER,)) == {(): [[10.0], [10.0]]}
+
+    region.activate(1, 200)
+    assert region.collect("in_flight", (KIND_GAUGE,)) == {(): [[4.0], [0.0]]}
+    assert region.collect("requests_total", (KIND_COUNTER,)) == {(): [[10.0], [10.0]]}
+
+
+def test_full_slot_writes_to_scratch():
+    region = SharedMetricsRegion(1, 1024)
+    store = SlotStore(region, 0)
+    offsets = [store.allocate("series", (str(index),), 1, KIND_COUNTER) for index in range(100)]
+    assert region.cell_count in offsets
+    registered = region.collect("series")
+    assert 0 < len(registered) < 100
+    # 写入暂存区的序列不出现在汇总结果中
+    store.cells[region.cell_count] = 99
+    assert all(values == [[0.0]] for values in registered.values())
+
+    with pytest.raises(ValueError):
+        SharedMetricsRegion(1, 64)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="需要 fork")
+def test_child_process_writes_visible_to_parent():
+    """fork 后子进程写入自己的槽位，父进程可以读取"""
+    region = SharedMetricsRegion(2, 4096)
+    pid = os.fork()
+    if pid == 0:
+        try:
+            store = SlotStore(region, 1)
+            store.cells[store.allocate("requests_total", ("GET",), 1, KIND_COUNTER)] = 42
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    assert region.collect("requests_total") == {("GET",): [[42.0]]}